@@ -11,7 +11,9 @@ from io import BytesIO
 from django.core.files.base import ContentFile
 from django.conf import settings
 from django.shortcuts import redirect
-import requests
+from asgiref.sync import sync_to_async
+from njjc.aio import AsyncAPIView, json_response
+from njjc.http import get_async_client
 
 # Create your views here.
 
@@ -157,14 +159,14 @@ class KakaoMockAuthView(APIView):
         mock_code = "sample_mock_auth_code_123"
         return redirect(f"{redirect_uri}?code={mock_code}&is_mock=true&state={state}")
 
-class KakaoCallbackView(APIView):
-    permission_classes = [AllowAny]
-    def get(self, request):
+class KakaoCallbackView(AsyncAPIView):
+    # Async: the two Kakao round trips are awaited instead of holding a worker
+    async def get(self, request):
         code = request.GET.get('code')
         is_mock = request.GET.get('is_mock') == 'true'
         
         if not code:
-            return Response({'error': 'No code provided'}, status=400)
+            return json_response({'error': 'No code provided'}, status=400)
             
         if is_mock and settings.DEBUG:
             # Simulate Kakao's response for a 25-year-old user
@@ -174,6 +176,7 @@ class KakaoCallbackView(APIView):
             }
             access_token = 'mock_access_token'
         else:
+            http = get_async_client()
             # 1. Exchange code for access token
             token_url = "https://kauth.kakao.com/oauth/token"
             data = {
@@ -182,17 +185,17 @@ class KakaoCallbackView(APIView):
                 'redirect_uri': settings.KAKAO_REDIRECT_URI,
                 'code': code,
             }
-            token_res = requests.post(token_url, data=data)
+            token_res = await http.post(token_url, data=data)
             token_data = token_res.json()
             access_token = token_data.get('access_token')
             
             if not access_token:
-                return Response({'error': 'Failed to get access token', 'details': token_data}, status=400)
+                return json_response({'error': 'Failed to get access token', 'details': token_data}, status=400)
                 
             # 2. Get user info
             user_info_url = "https://kapi.kakao.com/v2/user/me"
             headers = {'Authorization': f'Bearer {access_token}'}
-            user_res = requests.get(user_info_url, headers=headers)
+            user_res = await http.get(user_info_url, headers=headers)
             user_data = user_res.json()
             kakao_account = user_data.get('kakao_account', {})
         age_range = kakao_account.get('age_range') # "20~29", "10~14" etc.
@@ -226,6 +229,11 @@ class KakaoCallbackView(APIView):
         if not is_adult:
             return redirect(f"{redirect_to}?verification=fail&reason=underage")
 
+        access_token, refresh_token = await sync_to_async(self._login)(stored_user_id, email)
+        return redirect(f"{redirect_to}?verification=success&access={access_token}&refresh={refresh_token}")
+
+    def _login(self, stored_user_id, email):
+        """Find or create the verified user and issue JWTs. Returns (access, refresh)."""
         # Get or create user
         User = get_user_model()
         user = None
@@ -256,10 +264,7 @@ class KakaoCallbackView(APIView):
         # Generate JWT Tokens
         from rest_framework_simplejwt.tokens import RefreshToken
         refresh = RefreshToken.for_user(user)
-        access_token = str(refresh.access_token)
-        refresh_token = str(refresh)
-        
-        return redirect(f"{redirect_to}?verification=success&access={access_token}&refresh={refresh_token}")
+        return str(refresh.access_token), str(refresh)
 
 
 class UserDeleteView(APIView):
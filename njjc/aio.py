@@ -0,0 +1,116 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .renderers import ORJSONRenderer
+
+# Async (ASGI) building blocks for the I/O-bound endpoints
+# - Outbound HTTP (OpenSearch, Kakao) goes through httpx.AsyncClient, one pool per event loop
+#   (njjc/http.py), so a request waiting on an upstream holds a socket, not a thread.
+# - Calls that only exist as blocking SDKs (boto3: Bedrock, S3; local model inference) run on one
+#   bounded executor, so a burst of slow Bedrock calls can't grow the thread count without limit.
+# - ORM access goes through run_orm(): sync_to_async (thread-sensitive, one thread per request under
+#   ASGI), then the thread's connection goes back to the pool, so a view awaiting an upstream after a
+#   query doesn't hold one of the DB_POOL_MAX_SIZE connections for the length of that call.
+
+_executor = None
+_executor_lock = threading.Lock()
+_renderer = ORJSONRenderer()
+
+
+def blocking_workers():
+    return getattr(settings, 'ASYNC_BLOCKING_WORKERS', 32)
+
+
+def get_blocking_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=blocking_workers(), thread_name_prefix='blocking-io')
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Await a blocking call on the bounded executor, with the caller's contextvars.
+    Not for the ORM: Django connections are per thread, use run_orm for database work.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_blocking_executor(), call)
+
+
+def release_connections():
+    """
+    close_old_connections() for this thread, minus connections inside a transaction (atomic blocks,
+    TestCase): pooled and CONN_MAX_AGE=0 connections are returned now, persistent ones are kept.
+    """
+    for conn in connections.all(initialized_only=True):
+        if not conn.in_atomic_block:
+            conn.close_if_unusable_or_obsolete()
+
+
+def _run_and_release(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        release_connections()
+
+
+async def run_orm(func, *args, **kwargs):
+    """
+    Await database work from an async view: func runs via sync_to_async and the connection it used
+    is released before returning, instead of at the end of the request.
+    """
+    return await sync_to_async(_run_and_release)(func, *args, **kwargs)
+
+
+def json_response(data, status=200):
+    """JSON response rendered the same way as the DRF views (ORJSONRenderer)."""
+    return HttpResponse(_renderer.render(data), status=status, content_type='application/json')
+
+
+async def authenticate(request):
+    """
+    Set request.user from the JWT Authorization header (AnonymousUser without one).
+    Raises AuthenticationFailed for an invalid or expired token, like the DRF views.
+    """
+    result = await run_orm(JWTAuthentication().authenticate, request)
+    request.user = result[0] if result else AnonymousUser()
+    return request.user
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of a JWT-authenticated DRF APIView, for views served under ASGI.
+    DRF views are sync only, so authentication, the login check and rendering are done here.
+    Handlers are `async def` and return json_response()s.
+    """
+    login_required = False
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token authenticated like the DRF views, so no CSRF
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await authenticate(request)
+        except AuthenticationFailed as e:
+            return json_response(e.detail if isinstance(e.detail, dict) else {'detail': e.detail}, status=401)
+        if self.login_required and not request.user.is_authenticated:
+            return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+        return await super().dispatch(request, *args, **kwargs)
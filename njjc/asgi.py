@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Run with: uvicorn njjc.asgi:application --workers N
+The semantic search, similar posts, image upload and Kakao callback views are async
+(see njjc/aio.py); the DRF views keep running as sync views in a thread per request.
 """
 
 import os
@@ -0,0 +1,12 @@
+from django.conf import settings
+
+# Cache backends whose entries only exist in the process that wrote them
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    """Whether keys written by one process (web worker, qcluster worker, command) are seen by the others."""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
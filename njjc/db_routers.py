@@ -0,0 +1,144 @@
+import contextvars
+import random
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import cache_is_shared
+
+# Read replicas
+# - Reads go to a replica only inside replica_reads() (feeds, search, recommendation retrieval,
+#   MF training), never by default: tasks and write paths keep reading the primary.
+# - Writes always go to the primary. A request that writes reads the primary for the rest of the
+#   request, and PrimaryPinningMiddleware pins that user to the primary for DB_REPLICA_PIN_SECONDS,
+#   so they read their own writes while the replicas catch up. The pin is a cache key, so replicas
+#   need a cache shared by every web process (REDIS_URL); the middleware refuses to start without one.
+# - Without DB_REPLICA_HOSTS there are no replica aliases and nothing changes.
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+# {'pinned': bool, 'wrote': bool} for the current request; a dict so that writes made in
+# sync_to_async threads (copied contexts) are still seen by the middleware
+_request_state = contextvars.ContextVar('db_request_state', default=None)
+
+PIN_CACHE_KEY = 'db:pin:{}'
+
+
+def replica_aliases():
+    return getattr(settings, 'DB_REPLICA_ALIASES', [])
+
+
+@contextmanager
+def replica_reads():
+    """Let reads inside the block go to a replica (unless the request/user is pinned to the primary)."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaReadMixin:
+    """For DRF views: GET/HEAD requests read from a replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas:
+            return None
+        state = _request_state.get()
+        if not _replica_reads.get() or (state and (state['pinned'] or state['wrote'])):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        # Enqueuing a django-q task (ORM broker) isn't a write the user will read back
+        if state is not None and model._meta.app_label != 'django_q':
+            state['wrote'] = True
+        if not replica_aliases():
+            return None
+        # Explicit: instances loaded from a replica must still be saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are physical copies of the primary
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def _token_user_id(request):
+    """User id from the JWT Authorization header without a database query, or None."""
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(header) != 2 or header[0] not in api_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        return AccessToken(header[1]).get(api_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+
+
+class PrimaryPinningMiddleware:
+    """Read-your-writes across requests: after a user's request writes, their reads stay on the primary for a while."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if replica_aliases() and not cache_is_shared():
+            # A pin set by one process would be invisible to the next request's process
+            raise ImproperlyConfigured(
+                'DB_REPLICA_HOSTS needs a cache shared across processes (set REDIS_URL): '
+                'primary pins are stored in the default cache.'
+            )
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+        user_id = _token_user_id(request)
+        state = {'pinned': bool(user_id and cache.get(PIN_CACHE_KEY.format(user_id))), 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_state.reset(token)
+            if state['wrote'] and user_id:
+                cache.set(PIN_CACHE_KEY.format(user_id), True, timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+        user_id = _token_user_id(request)
+        state = {'pinned': bool(user_id and await cache.aget(PIN_CACHE_KEY.format(user_id))), 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+            if state['wrote'] and user_id:
+                await cache.aset(PIN_CACHE_KEY.format(user_id), True, timeout=settings.DB_REPLICA_PIN_SECONDS)
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Outbound HTTP (Kakao, S3 image fetches for captioning, OpenSearch from async views)
+# Every call goes through a shared keep-alive pool with connect/read timeouts and a few retries,
+# instead of a new TCP+TLS connection per call and no timeout (a hung upstream hung the worker).
+# - get_session(): requests.Session for sync code (signals, django-q tasks, management commands)
+# - get_async_client(): httpx.AsyncClient for async views, one per event loop
+
+_session = None
+_session_lock = threading.Lock()
+
+# event loop -> {name: httpx.AsyncClient}; a client is bound to the loop that created it
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def default_timeout():
+    """(connect, read) seconds."""
+    return (getattr(settings, 'HTTP_CONNECT_TIMEOUT', 3.05), getattr(settings, 'HTTP_READ_TIMEOUT', 10.0))
+
+
+class PooledSession(requests.Session):
+    """requests.Session that applies the default timeout to calls that don't pass one."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', default_timeout())
+        return super().request(method, url, **kwargs)
+
+
+def build_session():
+    retries = getattr(settings, 'HTTP_RETRIES', 2)
+    # Only idempotent requests are retried on 5xx/429; connection errors are retried for any method
+    # (the request never reached the server)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    pool_size = getattr(settings, 'HTTP_POOL_SIZE', 20)
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size, max_retries=retry)
+    session = PooledSession()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Per-process pooled session. Safe to share between threads as long as nobody relies on its cookies."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def get_async_client(name='default', **options):
+    """
+    Shared httpx.AsyncClient for the running event loop. `options` (e.g. base_url, auth, verify)
+    are only used when the client is first created for that loop.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(name)
+    if client is None:
+        max_connections = getattr(settings, 'ASYNC_HTTP_MAX_CONNECTIONS', 200)
+        connect, read = default_timeout()
+        options.setdefault('timeout', httpx.Timeout(read, connect=connect))
+        # httpx retries connection failures only, which is safe for POSTs too
+        options['transport'] = httpx.AsyncHTTPTransport(
+            verify=options.pop('verify', True),
+            retries=getattr(settings, 'HTTP_RETRIES', 2),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 4),
+        )
+        client = clients[name] = httpx.AsyncClient(**options)
+    return client
@@ -0,0 +1,314 @@
+import atexit
+import fcntl
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# In-process metrics registry, scraped in the Prometheus text format at /metrics/
+# - Counters and histograms live in process memory; recording is a lock + dict update.
+# - With METRICS_DIR set, every process (web workers, django-q workers, management commands) writes
+#   its values to METRICS_DIR/<pid>.json every METRICS_FLUSH_SECONDS and at exit, and the scrape sums
+#   every process on the node. Files of processes that have exited are folded into one archive file,
+#   so their counts are kept and the directory doesn't grow.
+# - Collectors (register_collector) compute gauges at scrape time, e.g. the task queue depth.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ARCHIVE_FILE = 'archive.json'
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = {}  # name -> Counter / Histogram
+        self.collectors = []
+        self._reset()
+        self._flusher = None
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+
+    def register(self, metric):
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def inc(self, name, labels, amount):
+        with self._lock:
+            self._check_fork()
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+        self._ensure_flusher()
+
+    def observe(self, name, labels, buckets, value):
+        with self._lock:
+            self._check_fork()
+            key = (name, labels)
+            state = self.histograms.get(key)
+            if state is None:
+                state = self.histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+        self._ensure_flusher()
+
+    def _check_fork(self):
+        # A forked child (django-q worker) must not report its parent's values a second time
+        if os.getpid() != self.pid:
+            self._reset()
+            self._flusher = None
+
+    def snapshot(self):
+        with self._lock:
+            self._check_fork()
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(state)] for (name, labels), state in self.histograms.items()],
+            }
+
+    # Multi-process files
+
+    def _ensure_flusher(self):
+        if self._flusher is not None or not metrics_dir():
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name='metrics-flush')
+                self._flusher.start()
+
+    def _flush_loop(self):
+        interval = getattr(settings, 'METRICS_FLUSH_SECONDS', 5.0)
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to METRICS_DIR/<pid>.json (atomically)."""
+        directory = metrics_dir()
+        if not directory or (not self.counters and not self.histograms):
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', '')
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+
+    def inc(self, amount=1, **labels):
+        REGISTRY.inc(self.name, _labels(labels), amount)
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        REGISTRY.observe(self.name, _labels(labels), self.buckets, value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def counter(name, documentation):
+    return REGISTRY.register(Counter(name, documentation))
+
+
+def histogram(name, documentation, buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, buckets))
+
+
+def register_collector(func):
+    """
+    func() -> [(name, type, documentation, [(labels dict, value), ...]), ...], called on every scrape.
+    Usable as a decorator.
+    """
+    REGISTRY.collectors.append(func)
+    return func
+
+
+COMMAND_RUNS = counter('management_command_runs_total', 'Management command runs by result.')
+COMMAND_SECONDS = histogram(
+    'management_command_seconds', 'Management command duration.', buckets=(1, 5, 15, 60, 300, 900, 3600, 14400)
+)
+
+
+def command_metrics(handle):
+    """Decorator for a management command's handle(): count and time its runs."""
+    command = handle.__module__.rsplit('.', 1)[-1]
+
+    @functools.wraps(handle)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        result = 'error'
+        try:
+            value = handle(*args, **kwargs)
+            result = 'ok'
+            return value
+        finally:
+            COMMAND_SECONDS.observe(time.perf_counter() - started, command=command)
+            COMMAND_RUNS.inc(command=command, result=result)
+    return wrapper
+
+
+# Application cache lookups (posts.categories, posts.popularity)
+CACHE_REQUESTS = counter(
+    'cache_requests_total', 'Application cache lookups by cache and where they were answered (local, shared, miss).'
+)
+
+
+# Scraping
+
+def _merge(total, snapshot):
+    for name, labels, value in snapshot.get('counters', []):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    for name, labels, state in snapshot.get('histograms', []):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        current = total['histograms'].get(key)
+        if current is None or len(current) != len(state):
+            total['histograms'][key] = list(state)
+        else:
+            total['histograms'][key] = [a + b for a, b in zip(current, state)]
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """Values of every process on this node (or just this one without METRICS_DIR)."""
+    total = {'counters': {}, 'histograms': {}}
+    _merge(total, REGISTRY.snapshot())
+    directory = metrics_dir()
+    if not directory or not os.path.isdir(directory):
+        return total
+
+    own = f'{os.getpid()}.json'
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        archive = {'counters': {}, 'histograms': {}}
+        if os.path.exists(archive_path):
+            with open(archive_path) as f:
+                _merge(archive, json.load(f))
+        archived = False
+        for filename in os.listdir(directory):
+            if not filename.endswith('.json') or filename in (own, ARCHIVE_FILE):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            pid = int(filename[:-5]) if filename[:-5].isdigit() else None
+            if pid is not None and not _pid_alive(pid):
+                _merge(archive, snapshot)
+                os.remove(path)
+                archived = True
+            else:
+                _merge(total, snapshot)
+        if archived:
+            with open(f'{archive_path}.tmp', 'w') as f:
+                json.dump(_as_snapshot(archive), f)
+            os.replace(f'{archive_path}.tmp', archive_path)
+    _merge(total, _as_snapshot(archive))
+    return total
+
+
+def _as_snapshot(total):
+    return {
+        'counters': [[name, [list(p) for p in labels], value] for (name, labels), value in total['counters'].items()],
+        'histograms': [[name, [list(p) for p in labels], state] for (name, labels), state in total['histograms'].items()],
+    }
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        f'{k}="' + str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for k, v in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def render():
+    """Prometheus text exposition format (0.0.4)."""
+    total = collect()
+    by_name = {}
+    for (name, labels), value in total['counters'].items():
+        by_name.setdefault(name, []).append((labels, value))
+    for (name, labels), state in total['histograms'].items():
+        by_name.setdefault(name, []).append((labels, state))
+
+    lines = []
+    for name in sorted(by_name):
+        metric = REGISTRY.metrics.get(name)
+        kind = metric.type if metric else ('histogram' if isinstance(by_name[name][0][1], list) else 'counter')
+        if metric:
+            lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            buckets = metric.buckets if metric else DEFAULT_BUCKETS
+            counts = value[:-2]
+            for bound, count in zip(buckets, counts):
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {value[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+
+    for collector in REGISTRY.collectors:
+        for name, kind, documentation, samples in collector():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(_labels(labels))} {value}')
+    return '\n'.join(lines) + '\n'
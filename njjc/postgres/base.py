@@ -0,0 +1,93 @@
+import threading
+import time
+
+from django.db.backends.postgresql import base
+
+# PostgreSQL backend (DATABASES ENGINE 'njjc.postgres') that times connection checkouts.
+# Without a pool every checkout is a new connection (TCP + auth); with OPTIONS['pool'] it is a
+# pool getconn() (wait for a free connection, plus connect if the pool has to grow).
+
+
+class CheckoutStats:
+    """Per-process connection checkout counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.errors = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+
+    def record(self, ms):
+        with self._lock:
+            self.checkouts += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'checkout_errors': self.errors,
+                'checkout_avg_ms': round(self.total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'checkout_max_ms': round(self.max_ms, 3),
+            }
+
+
+_checkout_stats = {}
+_checkout_stats_lock = threading.Lock()
+
+
+def get_checkout_stats(alias):
+    if alias not in _checkout_stats:
+        with _checkout_stats_lock:
+            _checkout_stats.setdefault(alias, CheckoutStats())
+    return _checkout_stats[alias]
+
+
+def connection_stats(alias):
+    """How this process connects to `alias`: settings, checkout latency and, when pooled, the pool's state."""
+    from django.db import connections
+    connection = connections[alias]
+    stats = {
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        **get_checkout_stats(alias).snapshot(),
+        'pool': None,
+    }
+    pool = connection.pool
+    if pool is not None:
+        pool_stats = pool.get_stats()
+        requests = pool_stats.get('requests_num', 0)
+        stats['pool'] = {
+            'min_size': pool_stats.get('pool_min'),
+            'max_size': pool_stats.get('pool_max'),
+            'size': pool_stats.get('pool_size'),
+            'available': pool_stats.get('pool_available'),
+            'waiting': pool_stats.get('requests_waiting', 0),
+            'requests': requests,
+            'wait_avg_ms': round(pool_stats.get('requests_wait_ms', 0) / requests, 3) if requests else 0.0,
+            'timeouts': pool_stats.get('requests_errors', 0),
+        }
+    return stats
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        stats = get_checkout_stats(self.alias)
+        started = time.perf_counter()
+        try:
+            connection = super().get_new_connection(conn_params)
+        except Exception:
+            stats.record_error()
+            raise
+        stats.record((time.perf_counter() - started) * 1000)
+        return connection
@@ -0,0 +1,20 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from .timing import span
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson.
+    Output matches DRF's compact, non-ASCII-escaped JSON; types orjson doesn't know
+    (Decimal, lazy strings, ...) go through DRF's encoder. Indented output uses the stock renderer.
+    """
+    _default = JSONRenderer.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with span('render'):
+            if self.get_indent(accepted_media_type, renderer_context or {}):
+                return super().render(data, accepted_media_type, renderer_context)
+            if data is None:
+                return b''
+            return orjson.dumps(data, default=self._default, option=orjson.OPT_NON_STR_KEYS)
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import os
+import sys
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -52,7 +53,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'njjc.timing.ServerTimingMiddleware',  # first, so 'total' covers the other middleware
     'corsheaders.middleware.CorsMiddleware',
+    'njjc.db_routers.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,7 +72,7 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'njjc.renderers.ORJSONRenderer',
     )
 }
 
@@ -96,21 +99,59 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'njjc.wsgi.application'
+# Served with uvicorn (njjc/asgi.py) so the async views can wait on Bedrock/OpenSearch/Kakao/S3 concurrently
+ASGI_APPLICATION = 'njjc.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Database connections depend on the process type (DB_PROCESS_TYPE overrides the detection):
+# - worker (manage.py qcluster): each worker runs one task at a time on one thread, so it keeps one
+#   persistent connection for DB_CONN_MAX_AGE seconds instead of connecting per task.
+# - web: under ASGI every sync view runs in a fresh thread, where a persistent connection would never
+#   be reused, so web processes check connections out of a psycopg_pool pool of DB_POOL_MAX_SIZE
+#   (DB_POOL_MAX_SIZE=0 goes back to CONN_MAX_AGE connections). Async views return their connection
+#   after each ORM step (njjc.aio.run_orm), so requests awaiting Bedrock/OpenSearch don't count
+#   against the pool; only the time spent in queries does.
+# CONN_HEALTH_CHECKS re-checks a reused connection before the first query of a request/task.
+# Checkout latency and pool state: /health/db/ and `manage.py benchmark_db_connections`.
+DB_PROCESS_TYPE = os.environ.get('DB_PROCESS_TYPE') or ('worker' if 'qcluster' in sys.argv else 'web')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600 if DB_PROCESS_TYPE == 'worker' else 0))
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10 if DB_PROCESS_TYPE == 'web' else 0))  # 0 = no pool
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'njjc.postgres',  # django.db.backends.postgresql + connection checkout stats
         'NAME': 'articles_shorts',
         'USER': 'njjc_admin_user',
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': '5432',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
+if DB_POOL_MAX_SIZE:
+    # Pooled connections are returned to the pool at the end of each request, so no CONN_MAX_AGE
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {'min_size': DB_POOL_MIN_SIZE, 'max_size': DB_POOL_MAX_SIZE, 'timeout': DB_POOL_TIMEOUT},
+    }
+
+# Read replicas (njjc/db_routers.py): DB_REPLICA_HOSTS=host1,host2 adds replica_1, replica_2, ...
+# with the primary's credentials. Feed/search/recommendation/training reads use them; writes and
+# users who wrote in the last DB_REPLICA_PIN_SECONDS stay on the primary (pins live in the cache, so
+# replicas require REDIS_URL).
+DB_REPLICA_HOSTS = [host.strip() for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+DB_REPLICA_ALIASES = []
+for i, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    DATABASES[f'replica_{i}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DB_REPLICA_ALIASES.append(f'replica_{i}')
+DATABASE_ROUTERS = ['njjc.db_routers.ReplicaRouter']
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -157,6 +198,18 @@ AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_STORAGE_BUCKET_NAME = 'njjc-media'
 AWS_S3_REGION_NAME = 'ap-northeast-2'
 BEDROCK_REGION = os.environ.get('BEDROCK_REGION', 'ap-northeast-2')
+# Embedding model behind OpenSearch: 'bedrock' (Titan, 1024 dim) or 'local' (the pgvector model, 768 dim).
+# Switching requires rebuilding the index: python manage.py index_all_to_opensearch --recreate
+SEARCH_EMBEDDING_BACKEND = os.environ.get('SEARCH_EMBEDDING_BACKEND', 'bedrock')
+# Local stand-ins (posts/stand_ins.py) for benchmarks, load tests and tests without AWS or a cluster
+# BEDROCK_BACKEND='fake': deterministic hash-seeded embeddings with injected latency / ThrottlingException rate
+# OPENSEARCH_BACKEND='memory': in-process kNN; OPENSEARCH_MEMORY_LOAD_POSTS indexes every post on first search
+BEDROCK_BACKEND = os.environ.get('BEDROCK_BACKEND', 'aws')
+FAKE_BEDROCK_LATENCY_MS = float(os.environ.get('FAKE_BEDROCK_LATENCY_MS', 0))
+FAKE_BEDROCK_THROTTLE_RATE = float(os.environ.get('FAKE_BEDROCK_THROTTLE_RATE', 0))
+OPENSEARCH_BACKEND = os.environ.get('OPENSEARCH_BACKEND', 'opensearch')
+OPENSEARCH_MEMORY_LOAD_POSTS = os.environ.get('OPENSEARCH_MEMORY_LOAD_POSTS', 'False').lower() == 'true'
+FAKE_OPENSEARCH_LATENCY_MS = float(os.environ.get('FAKE_OPENSEARCH_LATENCY_MS', 0))
 AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.{AWS_S3_REGION_NAME}.amazonaws.com'
 
 # For simple usage in views without full django-storages backend swap, 
@@ -166,6 +219,83 @@ AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.{AWS_S3_REGION_NAME}.amazo
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# Outbound HTTP (njjc/http.py): keep-alive pools, (connect, read) timeouts, retries
+HTTP_CONNECT_TIMEOUT = 3.05
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 20))
+HTTP_RETRIES = 2
+
+# Per-request timing (njjc/timing.py): share of requests that get a Server-Timing header
+# and a JSON log line on the njjc.timing logger (SQL, Bedrock, OpenSearch, S3, inference, serialization)
+SERVER_TIMING_SAMPLE_RATE = float(os.environ.get('SERVER_TIMING_SAMPLE_RATE', 1.0 if DEBUG else 0.01))
+
+# Metrics (njjc/metrics.py, scraped at /metrics/). With several processes per node (uvicorn workers,
+# django-q workers, commands) set METRICS_DIR to a node-local directory shared by all of them.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = 5.0
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'njjc.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Async views (njjc/aio.py): threads for blocking SDK calls (boto3 Bedrock/S3, model inference)
+# and the per-event-loop httpx connection pool (OpenSearch, Kakao)
+ASYNC_BLOCKING_WORKERS = int(os.environ.get('ASYNC_BLOCKING_WORKERS', 32))
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.environ.get('ASYNC_HTTP_MAX_CONNECTIONS', 200))
+
+# Local vector index (memory-mapped snapshot of Post.embedding, see posts/vector_index.py)
+# Build with: python manage.py build_vector_index
+LOCAL_VECTOR_INDEX_ENABLED = os.environ.get('LOCAL_VECTOR_INDEX_ENABLED', 'False').lower() == 'true'
+LOCAL_VECTOR_INDEX_DIR = os.environ.get('LOCAL_VECTOR_INDEX_DIR', str(BASE_DIR / 'var' / 'vector_index'))
+LOCAL_VECTOR_INDEX_REFRESH_SECONDS = int(os.environ.get('LOCAL_VECTOR_INDEX_REFRESH_SECONDS', 60))
+
+# Recommendation feed: MMR diversity trade-off (0 = rank by relevance only, see posts/ranking.py)
+RECSYS_DIVERSITY = float(os.environ.get('RECSYS_DIVERSITY', 0.3))
+
+# Post popularity rollup (posts/popularity.py)
+# Compact periodically with: python manage.py compact_popularity
+POPULARITY_HALF_LIFE_HOURS = float(os.environ.get('POPULARITY_HALF_LIFE_HOURS', 24))
+POPULARITY_MIN_SCORE = 0.01
+POPULARITY_TRENDING_SIZE = 100
+POPULARITY_TRENDING_CACHE_SECONDS = 300
+POPULARITY_LOCAL_CACHE_SECONDS = 60
+# Interactions are folded into the rollup every N seconds per process (0 = write-through)
+POPULARITY_FLUSH_SECONDS = float(os.environ.get('POPULARITY_FLUSH_SECONDS', 1.0))
+POPULARITY_MAX_PENDING = 1000
+
+# Like write path (posts/likes.py): like_count deltas are flushed every N seconds (0 = write-through)
+LIKE_COUNTER_FLUSH_SECONDS = float(os.environ.get('LIKE_COUNTER_FLUSH_SECONDS', 1.0))
+LIKE_COUNTER_MAX_PENDING = 1000
+# Likes/unlikes within this window share one (trailing) preference vector recompute (posts/utils.py)
+USER_VECTOR_DEBOUNCE_SECONDS = 10
+
+# Shared cache for cross-process caches (category list, trending posts, debounce keys).
+# Set REDIS_URL in multi-process deployments; defaults to per-process memory.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Serialized category list, versioned and invalidated on Category writes (posts/categories.py).
+# Versions expire after this many seconds, so every process converges even without a shared cache.
+CATEGORY_VERSION_SECONDS = int(os.environ.get('CATEGORY_VERSION_SECONDS', 60))
+
 # Django Q2 Configuration
 Q_CLUSTER = {
     'name': 'njjc_cluster',
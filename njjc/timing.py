@@ -0,0 +1,143 @@
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('njjc.timing')
+
+# Per-request timing
+# ServerTimingMiddleware samples a fraction of requests (SERVER_TIMING_SAMPLE_RATE). For a sampled
+# request it collects the SQL query count/time and the span() durations (Bedrock, OpenSearch, S3,
+# model inference, serialization, rendering), then sends them as a Server-Timing header and logs
+# one JSON line. Unsampled requests pay one contextvar lookup per query/span.
+#
+# The collector lives in a contextvar, so work done in sync_to_async / run_blocking threads
+# (which run in copies of the request context) is counted too.
+
+_timer = contextvars.ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}  # name -> [total ms, count]
+
+    def add(self, name, ms):
+        with self._lock:
+            total = self.spans.setdefault(name, [0.0, 0])
+            total[0] += ms
+            total[1] += 1
+
+    def header(self, total_ms):
+        """Server-Timing header value."""
+        metrics = [f'total;dur={total_ms:.1f}']
+        for name, (ms, count) in self.spans.items():
+            metrics.append(f'{name};dur={ms:.1f};desc="{count}x"')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        data = {}
+        for name, (ms, count) in self.spans.items():
+            data[f'{name}_ms'] = round(ms, 2)
+            data[f'{name}_count'] = count
+        return data
+
+
+@contextmanager
+def span(name):
+    """Time the block under `name` if the current request is sampled."""
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, (time.perf_counter() - started) * 1000)
+
+
+def _time_query(execute, sql, params, many, context):
+    timer = _timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.add('db', (time.perf_counter() - started) * 1000)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created receiver: time every query on every connection (a no-op outside sampled requests)."""
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+connection_created.connect(install_query_timer, dispatch_uid='njjc.timing.install_query_timer')
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 0.0)
+        # Connections opened before this module was imported
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(None, connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+        timer, token, started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self._finish(request, response, timer, started)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+        timer, token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self._finish(request, response, timer, started)
+
+    def _sampled(self):
+        return self.sample_rate >= 1.0 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def _start(self):
+        timer = RequestTimer()
+        return timer, _timer.set(timer), time.perf_counter()
+
+    def _finish(self, request, response, timer, started):
+        # DRF responses are rendered before they reach middleware, so 'render' is already in the spans
+        total_ms = (time.perf_counter() - started) * 1000
+        response['Server-Timing'] = timer.header(total_ms)
+        # Lets the (cross-origin) frontend read the header in the Resource Timing API
+        response['Timing-Allow-Origin'] = '*'
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            **timer.as_dict(),
+        }))
+        return response
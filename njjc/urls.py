@@ -18,11 +18,13 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from .views import health_check
+from .views import health_check, db_health_check, metrics_view
 from accounts.views import KakaoLoginView, KakaoCallbackView, KakaoMockAuthView
 
 urlpatterns = [
     path('health/', health_check, name='health_check'),
+    path('health/db/', db_health_check, name='db_health_check'),
+    path('metrics/', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('posts/', include('posts.urls')), 
     path('accounts/api/kakao/login/', KakaoLoginView.as_view(), name='kakao_login_direct'),
@@ -1,4 +1,29 @@
-from django.http import JsonResponse
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import HttpResponse, JsonResponse
+from . import metrics
+from .postgres.base import connection_stats
 
 def health_check(request):
     return JsonResponse({"status": "OK"})
+
+def db_health_check(request):
+    """Round trip to the database plus this process's connection/pool stats."""
+    started = time.perf_counter()
+    try:
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError as e:
+        return JsonResponse({"status": "ERROR", "error": str(e)}, status=503)
+    return JsonResponse({
+        "status": "OK",
+        "query_ms": round((time.perf_counter() - started) * 1000, 3),
+        "process_type": settings.DB_PROCESS_TYPE,
+        **connection_stats(DEFAULT_DB_ALIAS),
+    })
+
+def metrics_view(request):
+    """Prometheus scrape endpoint: every process on this node when METRICS_DIR is set."""
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,12 +1,24 @@
 import boto3
 import json
+from botocore.config import Config
 import logging
 from django.conf import settings
+from njjc import metrics
+from njjc.timing import span
+from .stand_ins import FakeBedrockRuntime
 
 logger = logging.getLogger(__name__)
 
+BEDROCK_REQUESTS = metrics.counter(
+    'bedrock_requests_total', 'Bedrock invoke_model calls by result (ok, throttled, too_long, error).'
+)
+BEDROCK_RETRIES = metrics.counter('bedrock_retries_total', 'Bedrock calls retried after a throttle or error.')
+BEDROCK_SECONDS = metrics.histogram('bedrock_request_seconds', 'Bedrock invoke_model latency, per attempt.')
+
 class BedrockClient:
     _instance = None
+    max_retries = 5
+    retry_base_delay = 1 # seconds, doubled on every throttled attempt
     
     def __new__(cls):
         if cls._instance is None:
@@ -15,13 +27,19 @@ class BedrockClient:
         return cls._instance
 
     def _init_client(self):
+        # BEDROCK_BACKEND='fake': deterministic local embeddings (posts/stand_ins.py)
+        if getattr(settings, 'BEDROCK_BACKEND', 'aws') == 'fake':
+            self.client = FakeBedrockRuntime()
+            return
         try:
             region = getattr(settings, 'BEDROCK_REGION', 'ap-northeast-2')
             self.client = boto3.client(
                 'bedrock-runtime',
                 region_name=region,
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                # One pooled connection per blocking-executor thread (see njjc/aio.py); botocore defaults to 10
+                config=Config(max_pool_connections=getattr(settings, 'ASYNC_BLOCKING_WORKERS', 32))
             )
         except Exception as e:
             logger.error(f"Failed to initialize Bedrock client: {e}")
@@ -32,8 +50,8 @@ class BedrockClient:
             return None
         
         import time
-        max_retries = 5
-        base_delay = 1
+        max_retries = self.max_retries
+        base_delay = self.retry_base_delay
         
         for attempt in range(max_retries):
             try:
@@ -45,29 +63,35 @@ class BedrockClient:
                     "normalize": True
                 })
                 
-                response = self.client.invoke_model(
-                    body=body,
-                    modelId=model_id,
-                    accept="application/json",
-                    contentType="application/json"
-                )
-                
-                response_body = json.loads(response.get("body").read())
+                with span('bedrock'), BEDROCK_SECONDS.time():
+                    response = self.client.invoke_model(
+                        body=body,
+                        modelId=model_id,
+                        accept="application/json",
+                        contentType="application/json"
+                    )
+                    response_body = json.loads(response.get("body").read())
                 embedding = response_body.get("embedding")
+                BEDROCK_REQUESTS.inc(result='ok')
                 return embedding
                 
             except Exception as e:
                 # Check for throttling (429 or ThrottlingException)
                 error_str = str(e)
                 if "ThrottlingException" in error_str or "Too many requests" in error_str:
+                    BEDROCK_REQUESTS.inc(result='throttled')
+                    BEDROCK_RETRIES.inc()
                     delay = base_delay * (2 ** attempt)
                     logger.warning(f"Bedrock throttled (attempt {attempt+1}/{max_retries}). Retrying in {delay}s...")
                     time.sleep(delay)
                 elif "ValidationException" in error_str and "Too many input tokens" in error_str:
                     logger.error(f"Bedrock validation error: {e}. Text too long.")
+                    BEDROCK_REQUESTS.inc(result='too_long')
                     break
                 else:
                     logger.error(f"Bedrock embedding generation failed: {e}")
+                    BEDROCK_REQUESTS.inc(result='error')
+                    BEDROCK_RETRIES.inc()
                     # For other transient errors, still try next attempt
                     time.sleep(base_delay)
                     
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from njjc.metrics import CACHE_REQUESTS
+
+from .models import Category
+from .serializers import CategorySerializer
+
+# The category list almost never changes, so the serialized list is cached under a version:
+# - shared cache: 'posts:categories:version' -> version, 'posts:categories:<version>' -> list + ETag
+# - process memory: the last list seen, reused while the shared version is unchanged
+# Category save/delete signals bump the version (see signals.py). A version also expires after
+# CATEGORY_VERSION_SECONDS, so processes that can't see a bump (a per-process cache, or categories
+# written without signals) serve a fresh list within that time.
+
+VERSION_CACHE_KEY = 'posts:categories:version'
+
+_local = {'version': None, 'value': None}
+_local_lock = threading.Lock()
+
+
+def _version_timeout():
+    return getattr(settings, 'CATEGORY_VERSION_SECONDS', 60)
+
+
+def bump_category_version():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=_version_timeout())
+
+
+def get_category_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=_version_timeout())
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def get_category_list():
+    """{'data': serialized categories, 'etag': strong ETag of the data}; queries only on a version change."""
+    version = get_category_version()
+    if _local['version'] == version:
+        CACHE_REQUESTS.inc(cache='category_list', result='local')
+        return _local['value']
+
+    key = f'posts:categories:{version}'
+    value = cache.get(key)
+    CACHE_REQUESTS.inc(cache='category_list', result='shared' if value is not None else 'miss')
+    if value is None:
+        data = CategorySerializer(Category.objects.all().order_by('name'), many=True).data
+        # ETag from the content, so a lost version key doesn't invalidate clients' copies
+        digest = hashlib.md5(json.dumps(data, sort_keys=True).encode(), usedforsecurity=False).hexdigest()
+        value = {'data': data, 'etag': f'"{digest}"'}
+        # Only read while its version lives
+        cache.set(key, value, timeout=_version_timeout())
+
+    with _local_lock:
+        _local['version'] = version
+        _local['value'] = value
+    return value
@@ -0,0 +1,47 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from .models import Comment
+
+# Threads are two levels deep: top-level comments (parent IS NULL) and their replies.
+# A page of threads costs a fixed number of queries whatever the thread sizes:
+# one for the top-level page (reply counts as a correlated subquery on the (parent, created_at) index)
+# and one for the reply previews of every thread on the page (ROW_NUMBER() per parent).
+
+
+def reply_count_subquery():
+    replies = Comment.objects.filter(parent_id=OuterRef('pk')).order_by() \
+        .values('parent_id').annotate(n=Count('*')).values('n')
+    return Coalesce(Subquery(replies, output_field=IntegerField()), 0)
+
+
+def top_level_comments(post_id):
+    """Top-level comments of a post with author and reply_count, oldest first."""
+    return Comment.objects.filter(post_id=post_id, parent__isnull=True) \
+        .select_related('author').annotate(reply_count=reply_count_subquery()).order_by('created_at', 'id')
+
+
+def replies_of(comment_id):
+    """Replies of one thread, oldest first."""
+    return Comment.objects.filter(parent_id=comment_id).select_related('author').order_by('created_at', 'id')
+
+
+def attach_reply_previews(comments, limit):
+    """
+    Set `reply_previews` on each comment to its first `limit` replies, in one query.
+    """
+    previews = {comment.id: [] for comment in comments}
+    if previews and limit > 0:
+        replies = Comment.objects.filter(parent_id__in=list(previews)).select_related('author').annotate(
+            position=Window(RowNumber(), partition_by=F('parent_id'), order_by=[F('created_at'), F('id')])
+        ).filter(position__lte=limit).order_by('parent_id', 'position')
+        for reply in replies:
+            previews[reply.parent_id].append(reply)
+    for comment in comments:
+        comment.reply_previews = previews[comment.id]
+    return comments
+
+
+def thread_root_id(parent):
+    """Replies to a reply join the thread of its top-level comment."""
+    return parent.parent_id or parent.id
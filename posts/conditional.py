@@ -0,0 +1,103 @@
+import hashlib
+
+from django.db.models import CharField, StringAgg, Value, prefetch_related_objects
+from django.db.models.functions import MD5, Cast, Coalesce, Concat
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from njjc.timing import span
+
+from .models import Comment
+
+# Conditional GET for posts
+# A post's representation changes when it is saved (updated_at), when its like/comment counters move,
+# when the requesting user likes/unlikes it, or when its author's name/avatar or its category's name
+# changes. Those are all on the row, annotated or select_related, so the ETag is computed before
+# anything is serialized, and unchanged posts/pages get a 304.
+# The detail view also shows the comments inline, so its ETag adds a digest of them from one aggregate
+# query: comment_count alone misses a delete plus an add, and commenters changing their name or avatar.
+#
+# Only ETags are sent: counters change without touching updated_at, so Last-Modified would let
+# If-Modified-Since revalidate stale like/comment counts.
+
+
+def post_version(post):
+    """Version token of one post as the requesting user sees it (author and category must be loaded)."""
+    return (
+        f"{post.pk}:{post.updated_at.timestamp()}:{post.like_count}:{post.comment_count}:"
+        f"{int(bool(getattr(post, 'is_liked', False)))}:"
+        f"{post.author.username}:{post.author.profile_img}:{post.category.name}"
+    )
+
+
+def make_etag(*parts):
+    digest = hashlib.md5('|'.join(str(p) for p in parts).encode(), usedforsecurity=False).hexdigest()
+    # Weak: the same versions always serialize to equivalent, not byte-identical, JSON
+    return f'W/"{digest}"'
+
+
+def comments_version(post):
+    """Digest of the comments shown with a post: which ones, their text and their authors' name and avatar."""
+    text = lambda expression: Coalesce(Cast(expression, CharField()), Value(''))
+    row = Concat(
+        text('id'), Value(':'), MD5('content'), Value(':'),
+        text('author__username'), Value(':'), text('author__profile_img'),
+        output_field=CharField(),
+    )
+    digest = Comment.objects.filter(post_id=post.pk).aggregate(
+        digest=MD5(StringAgg(row, delimiter=Value(','), order_by='id'))
+    )['digest']
+    return digest or ''
+
+
+def post_detail_etag(post):
+    return make_etag(post_version(post), comments_version(post))
+
+
+def page_etag(posts, *extra):
+    """ETag of a page of posts; `extra` covers whatever else the page shows (count, links)."""
+    return make_etag(*extra, *(post_version(p) for p in posts))
+
+
+def conditional_response(request, etag, build):
+    """304 if the client's If-None-Match matches, else the response from build(). Both carry the ETag."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build()
+    response['ETag'] = etag
+    # is_liked is per user
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class ConditionalPageMixin:
+    """
+    For paginated post ListAPIViews: answer If-None-Match with 304 before prefetching or serializing.
+    get_queryset() should not prefetch; `page_prefetch` is applied to the page only when it is sent.
+    """
+    page_prefetch = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        paginator = self.paginator
+        etag = page_etag(page, paginator.page.paginator.count, paginator.page.number, request.get_full_path())
+
+        def build():
+            prefetch_related_objects(page, *self.page_prefetch)
+            with span('serialize'):
+                data = self.get_serializer(page, many=True).data
+            return self.get_paginated_response(data)
+
+        return conditional_response(request, etag, build)
+
+
+def send_post_page(request, paginator, page, serialize):
+    """Conditional paginated response for a page that was paginated from a list (e.g. the recommended feed)."""
+    etag = page_etag(page, paginator.page.paginator.count, paginator.page.number, request.get_full_path())
+
+    def build():
+        with span('serialize'):
+            data = serialize(page)
+        return paginator.get_paginated_response(data)
+
+    return conditional_response(request, etag, build)
+
@@ -0,0 +1,122 @@
+import logging
+import threading
+
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Post, Comment
+
+logger = logging.getLogger(__name__)
+
+# Post.like_count / Post.comment_count are denormalized counters.
+# Signals apply relative F() updates (a single UPDATE, no read-modify-write race);
+# reconcile() recomputes them from the source tables to repair any drift.
+
+
+def add_to_counter(field, post_ids, delta):
+    """Atomically add delta to a counter on the given posts (clamped at 0)."""
+    if not post_ids:
+        return 0
+    return Post.objects.filter(pk__in=post_ids).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def reconcile(post_ids=None):
+    """
+    Recompute like_count and comment_count from the like table and comments in bulk.
+    Only rows that drifted are written. Returns {'like_count': n, 'comment_count': n} rows fixed.
+    """
+    post_table = Post._meta.db_table
+    sources = {
+        'like_count': Post.like_users.through._meta.db_table,
+        'comment_count': Comment._meta.db_table,
+    }
+    where, params = '', []
+    if post_ids is not None:
+        where, params = 'AND p.id = ANY(%s)', [list(post_ids)]
+
+    fixed = {}
+    with connection.cursor() as cursor:
+        for field, table in sources.items():
+            cursor.execute(f"""
+                UPDATE {post_table} p
+                SET {field} = COALESCE(c.n, 0)
+                FROM {post_table} p2
+                LEFT JOIN (SELECT post_id, COUNT(*) AS n FROM {table} GROUP BY post_id) c ON c.post_id = p2.id
+                WHERE p.id = p2.id AND p.{field} IS DISTINCT FROM COALESCE(c.n, 0) {where}
+            """, params)
+            fixed[field] = cursor.rowcount
+    if any(fixed.values()):
+        logger.info(f"Reconciled post counters: {fixed}")
+    return fixed
+
+
+class WriteBehindBuffer:
+    """
+    Per-process write-behind buffer of per-post updates, so hot posts don't take one row lock per event.
+
+    Updates for the same post are merged in memory and written in one statement per flush:
+    by a timer `interval` seconds after the first buffered update, immediately once `max_pending`
+    posts are pending, and at interpreter exit. With interval <= 0 every update is written through.
+    Subclasses define merge() (must be order independent, failed flushes are merged back) and write().
+    """
+
+    def __init__(self, interval=1.0, max_pending=1000):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def merge(self, current, value):
+        raise NotImplementedError
+
+    def is_noop(self, value):
+        return False
+
+    def write(self, items):
+        """Write [(post_id, value)] (sorted by post id). Returns the number of rows written."""
+        raise NotImplementedError
+
+    def add(self, post_id, value):
+        if self.interval <= 0:
+            self.write([(post_id, value)])
+            return
+        with self._lock:
+            self._pending[post_id] = self.merge(self._pending.get(post_id), value)
+            full = len(self._pending) >= self.max_pending
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write every pending update in one statement. Returns the number of posts updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        # Sorted, so concurrent flushes from several processes lock rows in the same order
+        items = [(post_id, value) for post_id, value in sorted(pending.items()) if not self.is_noop(value)]
+        if not items:
+            return 0
+        try:
+            return self.write(items)
+        except Exception as e:
+            # Put the updates back so the next flush retries them
+            logger.error(f"{type(self).__name__} flush failed ({len(items)} posts): {e}")
+            with self._lock:
+                for post_id, value in items:
+                    self._pending[post_id] = self.merge(self._pending.get(post_id), value)
+            return 0
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread has its own connection; don't leave it open
+            close_old_connections()
+            connection.close()
@@ -0,0 +1,68 @@
+import logging
+import threading
+
+from django.conf import settings
+from njjc.timing import span
+
+from .bedrock_client import BedrockClient
+
+logger = logging.getLogger(__name__)
+
+LOCAL_EMBEDDING_MODEL = 'jhgan/ko-sroberta-multitask'
+LOCAL_EMBEDDING_DIMENSION = 768    # Post.embedding (pgvector)
+BEDROCK_EMBEDDING_DIMENSION = 1024 # Titan Text Embeddings v2
+
+# Model will be lazy-loaded to prevent blocking startup
+_embed_model = None
+_embed_model_lock = threading.Lock()
+
+
+def get_embed_model():
+    global _embed_model
+    if _embed_model is None:
+        with _embed_model_lock:
+            if _embed_model is None:
+                try:
+                    logger.info("Loading SentenceTransformer model...")
+                    from sentence_transformers import SentenceTransformer
+                    _embed_model = SentenceTransformer(LOCAL_EMBEDDING_MODEL)
+                except Exception as e:
+                    logger.error(f"Failed to load SentenceTransformer model: {e}")
+    return _embed_model
+
+
+def encode_text(text):
+    """Local SentenceTransformer embedding (same space as Post.embedding), or None."""
+    embed_model = get_embed_model()
+    if not embed_model:
+        return None
+    with span('inference'):
+        return embed_model.encode(text).tolist()
+
+
+def search_embedding_backend():
+    """
+    Which model feeds OpenSearch (post documents and search queries).
+    - 'bedrock': Titan via Bedrock, 1024 dim (default)
+    - 'local':   the local SentenceTransformer that already feeds pgvector, 768 dim.
+                 Posts are embedded once and queries never leave the process.
+    """
+    return getattr(settings, 'SEARCH_EMBEDDING_BACKEND', 'bedrock')
+
+
+def search_embedding_dimension():
+    if search_embedding_backend() == 'local':
+        return LOCAL_EMBEDDING_DIMENSION
+    return BEDROCK_EMBEDDING_DIMENSION
+
+
+def get_search_embedding(text, local_vector=None):
+    """
+    Embedding for the OpenSearch index.
+    In local mode an already computed Post.embedding can be passed as local_vector to skip encoding.
+    """
+    if search_embedding_backend() == 'local':
+        if local_vector is not None:
+            return [float(x) for x in local_vector]
+        return encode_text(text)
+    return BedrockClient().get_embedding(text)
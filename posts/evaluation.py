@@ -0,0 +1,204 @@
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max
+
+from njjc.db_routers import replica_reads
+
+from .models import Post, UserInteraction
+from .popularity import scores_as_of
+from .ranking import diversify
+from .utils import weighted_preference_vector
+from .views import RecommendedPostListView
+
+# Offline evaluation of the recommendation feed (python manage.py evaluate_recommendations)
+# - Interactions after a cutoff are held out, and the pipeline runs as of the cutoff: eligible posts,
+#   the user's preference vector, their CF vector and post popularity only use the history before it.
+# - A user's relevant posts are the ones they engaged with (VIEW/LIKE/COMMENT) after the cutoff,
+#   among posts that existed and that they hadn't seen before it.
+# - The feed is scored with recall@k / NDCG@k and the candidate pool with its recall, next to
+#   the latency of every stage.
+# - Post CF vectors are the last training run's and may have seen held-out interactions; the user
+#   side is folded in from pre-cutoff interactions only (u = Σ score · post vector, as TruncatedSVD does).
+
+POSITIVE_TYPES = ('VIEW', 'LIKE', 'COMMENT')
+STAGES = ('candidates', 'score', 'diversify', 'total')
+# Same window as calculate_user_vector
+PREFERENCE_HISTORY = 50
+
+
+def recall_at_k(ranked_ids, relevant, k):
+    if not relevant:
+        return 0.0
+    return len(set(ranked_ids[:k]) & relevant) / len(relevant)
+
+
+def ndcg_at_k(ranked_ids, relevant, k):
+    """NDCG with binary relevance."""
+    dcg = sum(1.0 / np.log2(rank + 2) for rank, post_id in enumerate(ranked_ids[:k]) if post_id in relevant)
+    ideal = sum(1.0 / np.log2(rank + 2) for rank in range(min(len(relevant), k)))
+    return dcg / ideal if ideal else 0.0
+
+
+class Holdout:
+    """The evaluation users as of `cutoff` (with rebuilt vectors), their relevant posts and post popularity."""
+
+    def __init__(self, cutoff, users, relevant, popularity):
+        self.cutoff = cutoff
+        self.users = users
+        self.relevant = relevant      # user id -> set of post ids
+        self.popularity = popularity  # post id -> engagement score at the cutoff
+
+
+def _post_vectors(field, post_ids, chunk_size=5000):
+    post_ids = list(post_ids)
+    vectors = {}
+    for start in range(0, len(post_ids), chunk_size):
+        rows = Post.objects.filter(id__in=post_ids[start:start + chunk_size], **{f'{field}__isnull': False})
+        vectors.update(rows.values_list('id', field))
+    return vectors
+
+
+def build_holdout(holdout_days=7, max_users=200, min_history=5, seed=0):
+    """Split interactions at (latest interaction - holdout_days) and sample up to max_users users."""
+    latest = UserInteraction.objects.aggregate(latest=Max('created_at'))['latest']
+    if latest is None:
+        return None
+    cutoff = latest - timedelta(days=holdout_days)
+
+    relevant = defaultdict(set)
+    held_out = UserInteraction.objects.filter(
+        created_at__gte=cutoff, interaction_type__in=POSITIVE_TYPES, post__created_at__lt=cutoff
+    ).values_list('user_id', 'post_id')
+    for user_id, post_id in held_out.iterator(chunk_size=10000):
+        relevant[user_id].add(post_id)
+
+    eligible = sorted(
+        UserInteraction.objects.filter(created_at__lt=cutoff, user_id__in=list(relevant))
+        .values('user_id').annotate(n=Count('id')).filter(n__gte=min_history).values_list('user_id', flat=True)
+    )
+    sampled = random.Random(seed).sample(eligible, min(max_users, len(eligible)))
+
+    history = defaultdict(list)  # user id -> [(post id, score)], newest first
+    rows = UserInteraction.objects.filter(user_id__in=sampled, created_at__lt=cutoff).order_by('user_id', '-created_at')
+    for user_id, post_id, score in rows.values_list('user_id', 'post_id', 'score').iterator(chunk_size=10000):
+        history[user_id].append((post_id, score))
+
+    recent_posts = {post_id for items in history.values() for post_id, _ in items[:PREFERENCE_HISTORY]}
+    embeddings = _post_vectors('embedding', recent_posts)
+    cf_vectors = _post_vectors('cf_latent_vector', {post_id for items in history.values() for post_id, _ in items})
+
+    User = get_user_model()
+    users = []
+    for user in User.objects.filter(id__in=sampled).only('id', 'is_pass_verified').order_by('id'):
+        items = history[user.id]
+        seen = {post_id for post_id, _ in items}
+        relevant[user.id] -= seen
+        user.preference_vector = weighted_preference_vector(
+            (embeddings.get(post_id), score) for post_id, score in items[:PREFERENCE_HISTORY]
+        )
+        user.cf_latent_vector = _fold_in(items, cf_vectors)
+        # Without a preference vector the view would compute (and save) one from the full history
+        if relevant[user.id] and user.preference_vector is not None:
+            users.append(user)
+
+    return Holdout(cutoff, users, {user.id: relevant[user.id] for user in users}, scores_as_of(cutoff))
+
+
+def _fold_in(items, cf_vectors):
+    """CF user vector from a user's interactions: mean score per post (like the training pivot) times the post vectors."""
+    scores = defaultdict(list)
+    for post_id, score in items:
+        if post_id in cf_vectors:
+            scores[post_id].append(score)
+    if not scores:
+        return None
+    return sum(np.asarray(cf_vectors[post_id]) * np.mean(values) for post_id, values in scores.items())
+
+
+class OfflineRecommender(RecommendedPostListView):
+    """The feed pipeline as of the holdout cutoff, with pool sizes etc. set per run."""
+
+    def __init__(self, holdout, local_index=None, **config):
+        super().__init__(**config)
+        self.as_of = holdout.cutoff
+        self.holdout = holdout
+        self.local_index = local_index
+
+    def _get_local_index(self):
+        return self.local_index
+
+    def _generate_candidates(self, user):
+        candidates = super()._generate_candidates(user)
+        # The live rollup includes held-out interactions
+        for post_id, data in candidates.items():
+            data['engagement'] = self.holdout.popularity.get(post_id, 0.0)
+        return candidates
+
+
+def evaluate(holdout, config, ks=(10, 50, 100), local_index=None):
+    """
+    Run the pipeline for every holdout user with `config` (RecommendedPostListView attributes:
+    cf_pool_size, content_pool_size, cold_start_pool_size, feed_size, diversity).
+    Returns mean recall@k / NDCG@k, candidate pool recall and size, and p50/p95 latency per stage.
+    """
+    recommender = OfflineRecommender(holdout, local_index, **config)
+    recall = {k: [] for k in ks}
+    ndcg = {k: [] for k in ks}
+    pool_recall, pool_sizes = [], []
+    timings = {stage: [] for stage in STAGES}
+
+    for user in holdout.users:
+        relevant = holdout.relevant[user.id]
+        started = time.perf_counter()
+        with replica_reads():
+            candidates = recommender._generate_candidates(user)
+        scored = time.perf_counter()
+        posts, scores = recommender._score(user, candidates)
+        ranked = time.perf_counter()
+        feed = diversify(posts, scores, k=recommender.feed_size, diversity=recommender.diversity)
+        finished = time.perf_counter()
+
+        for stage, ms in zip(STAGES, (scored - started, ranked - scored, finished - ranked, finished - started)):
+            timings[stage].append(ms * 1000)
+        feed_ids = [post.id for post in feed]
+        for k in ks:
+            recall[k].append(recall_at_k(feed_ids, relevant, k))
+            ndcg[k].append(ndcg_at_k(feed_ids, relevant, k))
+        pool_recall.append(recall_at_k(list(candidates), relevant, len(candidates)))
+        pool_sizes.append(len(candidates))
+
+    def mean(values):
+        return float(np.mean(values)) if values else 0.0
+
+    return {
+        'users': len(holdout.users),
+        'recall': {k: mean(values) for k, values in recall.items()},
+        'ndcg': {k: mean(values) for k, values in ndcg.items()},
+        'pool_recall': mean(pool_recall),
+        'pool_size': mean(pool_sizes),
+        'latency_ms': {
+            stage: {
+                'p50': float(np.percentile(values, 50)) if values else 0.0,
+                'p95': float(np.percentile(values, 95)) if values else 0.0,
+            }
+            for stage, values in timings.items()
+        },
+    }
+
+
+def pareto_front(results, quality, cost):
+    """Indices of the results no other result beats on quality without costing more (and vice versa)."""
+    front = []
+    for i, a in enumerate(results):
+        dominated = any(
+            quality(b) >= quality(a) and cost(b) <= cost(a) and (quality(b) > quality(a) or cost(b) < cost(a))
+            for j, b in enumerate(results) if j != i
+        )
+        if not dominated:
+            front.append(i)
+    return front
@@ -0,0 +1,105 @@
+import atexit
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .counters import WriteBehindBuffer
+from .models import Post, UserInteraction
+from .utils import async_calculate_user_vector
+
+# Like write path for hot posts
+# - toggle_like() flips the (post, user) row with one DELETE ... RETURNING or INSERT ... ON CONFLICT,
+#   so concurrent toggles never race on an exists() check.
+# - like_count deltas are buffered per process and flushed as one UPDATE ... FROM (VALUES ...)
+#   every LIKE_COUNTER_FLUSH_SECONDS, instead of every like updating the same post row.
+
+
+class LikeCounterBuffer(WriteBehindBuffer):
+    """Per-process write-behind buffer of Post.like_count deltas."""
+
+    def merge(self, current, delta):
+        return (current or 0) + delta
+
+    def is_noop(self, delta):
+        return not delta
+
+    def pending(self, post_id):
+        """Delta buffered in this process and not yet written."""
+        return self._pending.get(post_id, 0)
+
+    def write(self, items):
+        table = Post._meta.db_table
+        values = ', '.join(['(%s, %s)'] * len(items))
+        params = [value for row in items for value in row]
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {table} p SET like_count = GREATEST(p.like_count + v.delta, 0)
+                FROM (VALUES {values}) AS v(id, delta)
+                WHERE p.id = v.id
+            """, params)
+            return cursor.rowcount
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_like_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = LikeCounterBuffer(
+                    interval=getattr(settings, 'LIKE_COUNTER_FLUSH_SECONDS', 1.0),
+                    max_pending=getattr(settings, 'LIKE_COUNTER_MAX_PENDING', 1000),
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def toggle_like(user_id, post_id):
+    """
+    Like the post if the user hasn't, unlike it otherwise. Returns (is_liked, like_count).
+
+    Safe under concurrency: of two racing likes only one INSERT lands (the other hits ON CONFLICT),
+    and only the toggle that actually changed a row records an interaction or a counter delta.
+    like_count is the stored count plus this process's unflushed delta plus this toggle's,
+    so it can lag slightly behind toggles buffered in other processes.
+    """
+    table = Post.like_users.through._meta.db_table
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE post_id = %s AND user_id = %s RETURNING id",
+                [post_id, user_id],
+            )
+            removed = cursor.fetchone() is not None
+            added = False
+            if not removed:
+                cursor.execute(
+                    f"INSERT INTO {table} (post_id, user_id) VALUES (%s, %s) "
+                    f"ON CONFLICT (post_id, user_id) DO NOTHING RETURNING id",
+                    [post_id, user_id],
+                )
+                added = cursor.fetchone() is not None
+
+        # Same side effects as the like_users m2m_changed handlers in signals.py
+        if added:
+            UserInteraction.objects.create(user_id=user_id, post_id=post_id, interaction_type='LIKE', score=5.0)
+        elif removed:
+            UserInteraction.objects.filter(user_id=user_id, post_id=post_id, interaction_type='LIKE').delete()
+
+        delta = 1 if added else -1 if removed else 0
+        buffer = get_like_buffer()
+        # Read before registering the add: inside an enclosing atomic block it only runs at the outer commit
+        pending = buffer.pending(post_id)
+        if delta:
+            transaction.on_commit(lambda: buffer.add(post_id, delta))
+            transaction.on_commit(lambda: async_calculate_user_vector(user_id, debounce=True))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT like_count FROM {Post._meta.db_table} WHERE id = %s", [post_id])
+            row = cursor.fetchone()
+    like_count = row[0] if row else 0
+    return not removed, max(like_count + pending + delta, 0)
@@ -1,17 +1,19 @@
 import re
 import os
-import requests
 from io import BytesIO
 from PIL import Image
 from django.core.management.base import BaseCommand
+from njjc.metrics import command_metrics
 from django.conf import settings
 from posts.models import Post
+from njjc.http import get_session
 from sentence_transformers import SentenceTransformer
 from transformers import BlipProcessor, BlipForConditionalGeneration
 
 class Command(BaseCommand):
     help = 'Backfill embeddings for posts that are missing them, including image captions from S3.'
 
+    @command_metrics
     def handle(self, *args, **options):
         self.stdout.write("Loading embedding model...")
         embed_model = SentenceTransformer('jhgan/ko-sroberta-multitask')
@@ -47,7 +49,7 @@ class Command(BaseCommand):
                     for full_rel_path, filename in image_matches:
                         s3_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{filename}"
                         try:
-                            response = requests.get(s3_url, timeout=5)
+                            response = get_session().get(s3_url)
                             if response.status_code == 200:
                                 raw_image = Image.open(BytesIO(response.content)).convert('RGB')
                                 inputs = caption_processor(raw_image, return_tensors="pt")
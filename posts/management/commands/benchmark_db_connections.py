@@ -0,0 +1,94 @@
+import threading
+import time
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from njjc.postgres.base import connection_stats, get_checkout_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark requests/sec through the full Django request cycle with a new database connection '
+        'per request, persistent connections and the driver pool.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/health/db/', help='GET endpoint to call (no authentication).')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        settings_dict = connections[DEFAULT_DB_ALIAS].settings_dict
+        original = (settings_dict['CONN_MAX_AGE'], dict(settings_dict.get('OPTIONS', {})))
+        modes = [
+            ('new connection per request', 0, None),
+            ('persistent connections', 600, None),
+            ('driver pool', 0, {'min_size': options['threads'], 'max_size': options['threads']}),
+        ]
+
+        handler = WSGIHandler()
+        try:
+            for name, max_age, pool in modes:
+                connections[DEFAULT_DB_ALIAS].close_pool()
+                settings_dict['CONN_MAX_AGE'] = max_age
+                settings_dict['OPTIONS'] = {**original[1], 'pool': pool} if pool else {
+                    k: v for k, v in original[1].items() if k != 'pool'
+                }
+                get_checkout_stats(DEFAULT_DB_ALIAS).reset()
+                total, elapsed, errors = self._run(handler, options)
+                stats = connection_stats(DEFAULT_DB_ALIAS)
+                self.stdout.write(
+                    f"{name:<28} {total / elapsed:>8.0f} req/sec  "
+                    f"{stats['checkouts']:>6} checkouts  avg {stats['checkout_avg_ms']:.2f} ms  "
+                    f"max {stats['checkout_max_ms']:.2f} ms"
+                    + (f"  pool wait avg {stats['pool']['wait_avg_ms']:.2f} ms" if stats['pool'] else '')
+                )
+                for e in errors[:5]:
+                    self.stderr.write(f"  Request failed: {e}")
+        finally:
+            connections[DEFAULT_DB_ALIAS].close_pool()
+            settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS'] = original
+
+    def _run(self, handler, options):
+        """Hammer `path` from `threads` threads; every call goes through request_started/finished like a real request."""
+        deadline = time.monotonic() + options['seconds']
+        counts = [0] * options['threads']
+        errors = []
+
+        def start_response(status, headers):
+            if not status.startswith('200'):
+                errors.append(status)
+
+        def worker(index):
+            try:
+                while time.monotonic() < deadline:
+                    response = handler(self._environ(options['path']), start_response)
+                    b''.join(response)
+                    response.close()  # sends request_finished, which closes or keeps the connection
+                    counts[index] += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return sum(counts), time.monotonic() - started, errors
+
+    def _environ(self, path):
+        return {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'localhost',
+            'wsgi.input': BytesIO(),
+            'wsgi.url_scheme': 'http',
+        }
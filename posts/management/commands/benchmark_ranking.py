@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from posts.ranking import (
+    gather_features, get_ranking_weights, mmr_indices, rank_candidates, score_features, top_k_indices
+)
+
+
+def rank_with_loop(candidates, k):
+    """The previous per-candidate Python implementation, kept as the baseline."""
+    now = datetime.now(timezone.utc)
+    w_cf, w_content = 0.4, 0.4
+    ranked_list = []
+    for pid, data in candidates.items():
+        post = data['post']
+        final_score = (w_cf * data['cf_score']) + (w_content * data['content_score'])
+        if now - post.created_at < timedelta(hours=24):
+            final_score += 0.2
+            final_score *= 1.2
+        ranked_list.append((final_score, post))
+    ranked_list.sort(key=lambda x: x[0], reverse=True)
+    return [p for s, p in ranked_list][:k]
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark the recommendation ranking stage (Python loop vs vectorized) on synthetic candidates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000', help='Comma separated candidate counts.')
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('-k', type=int, default=100)
+        parser.add_argument('--mmr-sizes', default='100,200,500', help='Candidate counts for the MMR re-ranking benchmark.')
+        parser.add_argument('--dim', type=int, default=768)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        now = datetime.now(timezone.utc)
+        weights = get_ranking_weights()
+
+        for size in [int(x) for x in options['sizes'].split(',')]:
+            ages = rng.uniform(0, 24 * 14, size)
+            candidates = {
+                i: {
+                    'post': SimpleNamespace(id=i, created_at=now - timedelta(hours=float(ages[i]))),
+                    'cf_score': float(rng.random()),
+                    'content_score': float(rng.random()),
+                }
+                for i in range(size)
+            }
+
+            loop_ms = self._time(lambda: rank_with_loop(candidates, options['k']), options['repeat'])
+            vector_ms = self._time(lambda: rank_candidates(candidates, weights, k=options['k']), options['repeat'])
+            features = gather_features(candidates)
+            score_ms = self._time(lambda: top_k_indices(score_features(features, weights), options['k']), options['repeat'])
+            self.stdout.write(
+                f"{size:>6} candidates: loop {loop_ms:.3f}ms  vectorized {vector_ms:.3f}ms  "
+                f"({loop_ms / vector_ms:.1f}x, of which scoring + top-k {score_ms:.3f}ms)"
+            )
+
+        for size in [int(x) for x in options['mmr_sizes'].split(',')]:
+            relevance = rng.random(size)
+            embeddings = rng.standard_normal((size, options['dim']), dtype=np.float32)
+            k = min(options['k'], size)
+            mmr_ms = self._time(lambda: mmr_indices(relevance, embeddings, k, 0.3), options['repeat'])
+            self.stdout.write(f"{size:>6} candidates: MMR top-{k} {mmr_ms:.3f}ms")
+
+    def _time(self, fn, repeat):
+        fn()
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start_time) / repeat * 1000
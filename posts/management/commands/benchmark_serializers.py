@@ -0,0 +1,81 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from accounts.models import User
+from njjc.renderers import ORJSONRenderer
+from posts.models import Category, Comment, Post
+from posts.search import first_image_url, make_preview
+from posts.serializers import CommentSerializer, PostListSerializer
+
+
+class LegacyPostListSerializer(serializers.ModelSerializer):
+    """The previous list representation (full body + every comment), kept as the baseline."""
+    author_username = serializers.CharField(source='author.username', read_only=True)
+    author_profile_image = serializers.ImageField(source='author.profile_img', read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    like_count = serializers.IntegerField(read_only=True)
+    comments = CommentSerializer(source='comment_set', many=True, read_only=True)
+    is_liked = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Post
+        fields = [
+            'id', 'title', 'content', 'author_username', 'author_profile_image', 'category', 'category_name',
+            'is_nsfw', 'is_profane', 'created_at', 'like_count', 'comments', 'is_liked',
+        ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark feed serialization + JSON rendering throughput (posts/sec) on in-memory posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=10, help='Comments per post.')
+        parser.add_argument('--content-length', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        posts = self._make_posts(options['posts'], options['comments'], options['content_length'])
+        cases = [
+            ('legacy serializer + JSONRenderer', LegacyPostListSerializer, JSONRenderer()),
+            ('lean serializer + JSONRenderer', PostListSerializer, JSONRenderer()),
+            ('lean serializer + ORJSONRenderer', PostListSerializer, ORJSONRenderer()),
+        ]
+        for name, serializer_class, renderer in cases:
+            best, size = None, 0
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                body = renderer.render(serializer_class(posts, many=True).data)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+                size = len(body)
+            self.stdout.write(
+                f"{name:<36} {len(posts) / best:>9.0f} posts/sec  {size / len(posts):>7.0f} bytes/post"
+            )
+
+    def _make_posts(self, count, comments_per_post, content_length):
+        """Unsaved posts with related objects and prefetched comments attached, so no queries run."""
+        now = datetime.now(timezone.utc)
+        category = Category(id='benchmark', name='Benchmark')
+        authors = [User(id=i, username=f'user{i}') for i in range(1, 51)]
+        body = ('![](/media/example.png)\n' + '오늘의 짧은 이야기 ' * content_length)[:content_length]
+
+        posts = []
+        for i in range(count):
+            post = Post(
+                id=i + 1, title=f'Post {i}', content=body, category=category, author=authors[i % len(authors)],
+                created_at=now, updated_at=now, like_count=i % 100, comment_count=comments_per_post,
+                preview=make_preview(body, 200), thumbnail_url=first_image_url(body),
+            )
+            post.is_liked = bool(i % 2)
+            comments = [
+                Comment(id=i * comments_per_post + j, post=post, author=authors[j % len(authors)],
+                        content='댓글 내용입니다 ' * 5, created_at=now)
+                for j in range(comments_per_post)
+            ]
+            post._prefetched_objects_cache = {'comment_set': comments}
+            posts.append(post)
+        return posts
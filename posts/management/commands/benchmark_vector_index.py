@@ -0,0 +1,57 @@
+import tempfile
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from posts.vector_index import LocalVectorIndex
+
+
+class Command(BaseCommand):
+    help = 'Benchmark top-k latency of the local vector index, on the built snapshot or on synthetic vectors.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic', type=int, default=0, help='Benchmark N random vectors instead of the snapshot (no database needed).')
+        parser.add_argument('--dim', type=int, default=768)
+        parser.add_argument('--dtype', default='float32', choices=['float32', 'float16'], help='float16 halves memory but every search pays a conversion to float32.')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--batch', type=int, default=1, help='Queries per search_batch call.')
+        parser.add_argument('-k', type=int, default=50)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if options['synthetic']:
+                n, dim = options['synthetic'], options['dim']
+                self.stdout.write(f"Writing {n} synthetic {dim}-dim vectors ({options['dtype']})...")
+                vectors = rng.standard_normal((n, dim), dtype=np.float32)
+                LocalVectorIndex.write(tmp_dir, 'embedding', np.arange(1, n + 1), vectors, dtype=options['dtype'])
+                del vectors
+                index = LocalVectorIndex(tmp_dir).load()
+            else:
+                index = LocalVectorIndex(settings.LOCAL_VECTOR_INDEX_DIR)
+                if not index.exists():
+                    self.stdout.write(self.style.ERROR("No snapshot found. Run build_vector_index or pass --synthetic N."))
+                    return
+                index.load()
+
+            n, dim = index.vectors.shape
+            queries = rng.standard_normal((options['queries'], dim), dtype=np.float32)
+            batch, k = options['batch'], options['k']
+
+            index.search_batch(queries[:batch], k=k)  # warm the page cache
+            latencies = []
+            start_time = time.perf_counter()
+            for i in range(0, len(queries), batch):
+                t0 = time.perf_counter()
+                index.search_batch(queries[i:i + batch], k=k)
+                latencies.append((time.perf_counter() - t0) * 1000)
+            elapsed = time.perf_counter() - start_time
+
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        self.stdout.write(
+            f"{n} vectors x {dim} dim, k={k}, batch={batch}: "
+            f"{len(queries) / elapsed:.1f} queries/sec, "
+            f"p50 {p50:.2f}ms  p95 {p95:.2f}ms  p99 {p99:.2f}ms per call"
+        )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from njjc.metrics import command_metrics
+from django.conf import settings
+from posts.vector_index import LocalVectorIndex
+import time
+
+
+class Command(BaseCommand):
+    help = 'Export post vectors into the memory-mapped snapshot used by the local vector index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--field', default='embedding', choices=['embedding', 'cf_latent_vector'])
+        parser.add_argument('--dtype', default='float32', choices=['float32', 'float16'], help='float16 halves memory but every search pays a conversion to float32.')
+        parser.add_argument('--path', default=None, help='Snapshot directory (defaults to LOCAL_VECTOR_INDEX_DIR).')
+
+    @command_metrics
+    def handle(self, *args, **options):
+        path = options['path'] or settings.LOCAL_VECTOR_INDEX_DIR
+        self.stdout.write(f"Exporting Post.{options['field']} to {path} ({options['dtype']})...")
+        start_time = time.time()
+
+        count = LocalVectorIndex.build(path, field=options['field'], dtype=options['dtype'])
+
+        if count == 0:
+            self.stdout.write(self.style.WARNING("No vectors found. Snapshot was not written."))
+            return
+        elapsed = time.time() - start_time
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} vectors in {elapsed:.2f} seconds."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from njjc.metrics import command_metrics
+from posts.popularity import compact, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Decay and prune the post popularity rollup, then rebuild the per-category trending lists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute every rollup from the interaction history first.')
+
+    @command_metrics
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = rebuild()
+            self.stdout.write(f"Rebuilt popularity for {count} posts from interactions.")
+
+        kept, pruned = compact()
+        self.stdout.write(self.style.SUCCESS(f"Compacted popularity: {kept} kept, {pruned} pruned."))
@@ -0,0 +1,100 @@
+import itertools
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from posts.evaluation import build_holdout, evaluate, pareto_front
+from posts.vector_index import LocalVectorIndex
+from posts.views import RecommendedPostListView
+
+
+def _values(cast):
+    def parse(text):
+        return [cast(value) for value in text.split(',') if value.strip()]
+    return parse
+
+
+class Command(BaseCommand):
+    help = (
+        'Hold out recent interactions, run the recommendation feed as of the cutoff for many users and report '
+        'recall@k / NDCG@k next to per-stage latency. Comma separated values run a grid, and the configs on the '
+        'quality/latency frontier are marked with *.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--holdout-days', type=float, default=7, help='Hold out the last N days of interactions.')
+        parser.add_argument('--users', type=int, default=200, help='Users to evaluate (sampled).')
+        parser.add_argument('--min-history', type=int, default=5, help='Pre-cutoff interactions a user needs.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('-k', type=_values(int), default=[10, 50, 100], help='Cutoffs for recall/NDCG, e.g. 10,50,100.')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file.')
+        # Grid (defaults: the view's current values)
+        view = RecommendedPostListView
+        parser.add_argument('--cf-pool', type=_values(int), default=[view.cf_pool_size])
+        parser.add_argument('--content-pool', type=_values(int), default=[view.content_pool_size])
+        parser.add_argument('--cold-start-pool', type=_values(int), default=[view.cold_start_pool_size])
+        parser.add_argument('--feed-size', type=_values(int), default=[view.feed_size])
+        parser.add_argument('--diversity', type=_values(float), default=[None], help='MMR trade-off (default: RECSYS_DIVERSITY).')
+        parser.add_argument('--retrieval', type=_values(str), default=['sql'],
+                            help='Content retrieval: sql (pgvector scan), index (local vector index snapshot), or both.')
+
+    def handle(self, *args, **options):
+        if set(options['retrieval']) - {'sql', 'index'}:
+            raise CommandError('--retrieval takes sql and/or index.')
+        local_index = None
+        if 'index' in options['retrieval']:
+            local_index = LocalVectorIndex(settings.LOCAL_VECTOR_INDEX_DIR)
+            if not local_index.exists():
+                raise CommandError('No vector index snapshot found. Run build_vector_index first.')
+            local_index.load()
+
+        holdout = build_holdout(options['holdout_days'], options['users'], options['min_history'], options['seed'])
+        if holdout is None or not holdout.users:
+            raise CommandError('No users with both history before and interactions after the cutoff.')
+        relevant = sum(len(posts) for posts in holdout.relevant.values())
+        self.stdout.write(
+            f"Cutoff {holdout.cutoff:%Y-%m-%d %H:%M}: {len(holdout.users)} users, "
+            f"{relevant / len(holdout.users):.1f} held-out posts per user"
+        )
+
+        ks = options['k']
+        results = []
+        for cf, content, cold, feed, diversity, retrieval in itertools.product(
+            options['cf_pool'], options['content_pool'], options['cold_start_pool'],
+            options['feed_size'], options['diversity'], options['retrieval'],
+        ):
+            config = {
+                'cf_pool_size': cf, 'content_pool_size': content, 'cold_start_pool_size': cold,
+                'feed_size': feed, 'diversity': diversity,
+            }
+            result = evaluate(holdout, config, ks, local_index if retrieval == 'index' else None)
+            result['config'] = {**config, 'retrieval': retrieval}
+            results.append(result)
+
+        main_k = ks[-1]
+        front = set(pareto_front(
+            results, quality=lambda r: r['ndcg'][main_k], cost=lambda r: r['latency_ms']['total']['p95']
+        ))
+        header = (
+            f"  {'cf':>4}{'cont':>5}{'cold':>5}{'feed':>5}{'div':>5} {'retr':<6}"
+            + ''.join(f"{f'R@{k}':>7}{f'N@{k}':>7}" for k in ks)
+            + f"{'poolR':>7}{'pool':>6}{'cand p50/p95':>15}{'score':>8}{'mmr':>8}{'total p50/p95':>15}"
+        )
+        self.stdout.write(header)
+        for i, result in enumerate(results):
+            config, latency = result['config'], result['latency_ms']
+            diversity = '-' if config['diversity'] is None else f"{config['diversity']:.2f}"
+            self.stdout.write(
+                f"{'*' if i in front else ' '} {config['cf_pool_size']:>4}{config['content_pool_size']:>5}"
+                f"{config['cold_start_pool_size']:>5}{config['feed_size']:>5}{diversity:>5} {config['retrieval']:<6}"
+                + ''.join(f"{result['recall'][k]:>7.3f}{result['ndcg'][k]:>7.3f}" for k in ks)
+                + f"{result['pool_recall']:>7.3f}{result['pool_size']:>6.0f}"
+                f"{latency['candidates']['p50']:>7.1f}/{latency['candidates']['p95']:<7.1f}"
+                f"{latency['score']['p50']:>8.2f}{latency['diversify']['p50']:>8.2f}"
+                f"{latency['total']['p50']:>7.1f}/{latency['total']['p95']:<7.1f}"
+            )
+        self.stdout.write(f"* = quality/latency frontier (NDCG@{main_k} vs total p95). Latencies in ms.")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({'cutoff': holdout.cutoff.isoformat(), 'users': len(holdout.users), 'results': results}, f, indent=2)
@@ -0,0 +1,345 @@
+import io
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from njjc.metrics import command_metrics
+from posts import popularity
+from posts.categories import bump_category_version
+from posts.counters import reconcile
+from posts.embeddings import LOCAL_EMBEDDING_DIMENSION
+from posts.models import Category, Post, UserInteraction
+from posts.search import MAX_INDEXED_CONTENT_LENGTH, SEARCH_CONFIG, build_search_document, make_preview
+
+CF_DIMENSION = 64  # Post/User.cf_latent_vector
+# Syllables for the synthetic Korean words, so keyword search (bigram tsvector) behaves like on real posts
+SYLLABLES = '가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주추기니디리미비시이지치강남동민서영준현진성연은한산별달빛꽃물불'
+
+
+def _unit(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _copy_value(value):
+    """One field in COPY ... FROM STDIN text format."""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return str(value)
+
+
+def _vector_literals(matrix):
+    """pgvector text literals ('[0.1,0.2,...]') for the rows of a matrix."""
+    row_format = '[' + ','.join(['%.5f'] * matrix.shape[1]) + ']'
+    return [row_format % tuple(row) for row in matrix.tolist()]
+
+
+def _timestamps(epochs):
+    return [datetime.fromtimestamp(ts, tz=dt_timezone.utc).isoformat() for ts in epochs.tolist()]
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-create correlated synthetic users, posts (with embeddings and CF vectors), likes and interactions '
+        'for scale and load testing. Rows are streamed with COPY, so no signals run (no model inference, '
+        'OpenSearch indexing or per-row counter updates); counters and popularity are rebuilt at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--interactions', type=int, default=100000,
+                            help='VIEW interactions; likes and NOT_INTERESTED signals come on top of these.')
+        parser.add_argument('--categories', type=int, default=20,
+                            help='Use this many categories, creating synthetic ones if fewer exist.')
+        parser.add_argument('--days', type=int, default=90, help='Posts and interactions are spread over the last N days.')
+        parser.add_argument('--prefix', default='synth', help='Username prefix (usernames are <prefix>_<id>).')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per COPY.')
+        # Distributions
+        parser.add_argument('--category-skew', type=float, default=0.8,
+                            help='Zipf exponent of category popularity (0 = uniform).')
+        parser.add_argument('--post-skew', type=float, default=1.2,
+                            help='Zipf exponent (> 1) of post popularity within a category.')
+        parser.add_argument('--activity-sigma', type=float, default=1.2,
+                            help='Lognormal sigma of interactions per user (heavy users vs lurkers).')
+        parser.add_argument('--focus', type=float, default=0.8,
+                            help="Share of a user's views in their interest categories.")
+        parser.add_argument('--spread', type=float, default=0.8,
+                            help='Noise around the category topic in embeddings (higher = weaker topics).')
+        parser.add_argument('--like-rate', type=float, default=0.08, help='Likes per in-interest view (a quarter of it elsewhere).')
+        parser.add_argument('--not-interested-rate', type=float, default=0.02, help='NOT_INTERESTED per off-interest view.')
+        parser.add_argument('--nsfw-rate', type=float, default=0.02)
+
+    @command_metrics
+    def handle(self, *args, **options):
+        if options['post_skew'] <= 1:
+            raise CommandError('--post-skew must be greater than 1.')
+        self.options = options
+        self.rng = np.random.default_rng(options['seed'])
+        self.now = timezone.now()
+        started = time.monotonic()
+
+        self.categories = self._categories(options['categories'])
+        n_categories = len(self.categories)
+        weights = 1.0 / np.arange(1, n_categories + 1) ** options['category_skew']
+        self.category_weights = weights / weights.sum()
+        # Every category is a topic: a unit direction in the embedding space. Posts scatter around their
+        # category's topic and users around a mix of their interests' topics, so content similarity,
+        # interests and interactions agree with each other like on real data.
+        self.topics = _unit(self.rng.standard_normal((n_categories, LOCAL_EMBEDDING_DIMENSION)))
+        # CF vectors: one shared projection of the same space, so CF and content retrieval are correlated too
+        self.projection = self.rng.standard_normal((LOCAL_EMBEDDING_DIMENSION, CF_DIMENSION)) / np.sqrt(CF_DIMENSION)
+        self.vocabulary = self._vocabulary(n_categories)
+
+        with connection.cursor() as cursor:
+            self._step('users', lambda: self._create_users(cursor))
+            self._step('posts', lambda: self._create_posts(cursor))
+            self._step('interactions', lambda: self._create_interactions(cursor))
+        self._step('counters', reconcile)
+        self._step('popularity', lambda: popularity.rebuild(self.now))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.monotonic() - started:.1f}s. Next: build_vector_index (if LOCAL_VECTOR_INDEX_ENABLED), "
+            f"run_recsys_training, and index_all_to_opensearch for semantic search."
+        ))
+
+    def _step(self, name, func):
+        started = time.monotonic()
+        result = func()
+        self.stdout.write(f"{name}: {result if result is not None else 'ok'} in {time.monotonic() - started:.1f}s")
+
+    # Setup
+
+    def _categories(self, count):
+        existing = list(Category.objects.order_by('id').values_list('id', flat=True)[:count])
+        missing = [f'synthetic_{i}' for i in range(count) if f'synthetic_{i}' not in existing][:count - len(existing)]
+        if missing:
+            Category.objects.bulk_create(
+                [Category(id=category_id, name=category_id.replace('_', ' ').title()) for category_id in missing],
+                ignore_conflicts=True,
+            )
+            # bulk_create sends no post_save, so running servers would keep the cached category list
+            bump_category_version()
+        return existing + missing
+
+    def _word(self, length):
+        return ''.join(self.rng.choice(list(SYLLABLES), size=length))
+
+    def _vocabulary(self, n_categories):
+        """Words shared by every category plus words specific to each, so keyword search also follows the topics."""
+        common = [self._word(self.rng.integers(2, 4)) for _ in range(200)]
+        topical = [[self._word(self.rng.integers(2, 4)) for _ in range(40)] for _ in range(n_categories)]
+        return common, topical
+
+    def _text(self, category, count):
+        common, topical = self.vocabulary
+        words = topical[category]
+        is_topical = self.rng.random(count) < 0.6
+        picks = self.rng.integers(0, len(common) * len(words), size=count)
+        return ' '.join(
+            words[i % len(words)] if topic else common[i % len(common)]
+            for topic, i in zip(is_topical.tolist(), picks.tolist())
+        )
+
+    def _reserve_ids(self, cursor, model, count):
+        """Take `count` consecutive primary keys from the table's sequence; returns the first one."""
+        table = model._meta.db_table
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            "GREATEST(nextval(pg_get_serial_sequence(%s, 'id')), (SELECT COALESCE(MAX(id), 0) + 1 FROM " + table + ")) + %s - 1)",
+            [table, table, count],
+        )
+        return cursor.fetchone()[0] - count + 1
+
+    def _copy(self, cursor, table, columns, rows):
+        """Stream rows into table with COPY."""
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(_copy_value(value) for value in row))
+            buffer.write('\n')
+        with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            copy.write(buffer.getvalue())
+
+    def _batches(self, total):
+        size = self.options['batch_size']
+        for start in range(0, total, size):
+            yield start, min(size, total - start)
+
+    # Users
+
+    def _create_users(self, cursor):
+        User = get_user_model()
+        count = self.options['users']
+        n_categories = len(self.categories)
+        first_id = self._reserve_ids(cursor, User, count)
+        self.user_ids = np.arange(first_id, first_id + count)
+        # Up to three interest categories per user, popular categories more often
+        self.interest_counts = self.rng.integers(1, 4, size=count)
+        self.interests = self.rng.choice(n_categories, size=(count, 3), p=self.category_weights)
+        password = make_password(None)  # unusable, the load test mints JWTs directly
+
+        for start, size in self._batches(count):
+            ids = self.user_ids[start:start + size]
+            interests = self.interests[start:start + size]
+            mask = np.arange(3) < self.interest_counts[start:start + size, None]
+            taste = (self.topics[interests] * mask[..., None]).sum(axis=1)
+            taste = _unit(taste + self.options['spread'] * self.rng.standard_normal(taste.shape) / np.sqrt(taste.shape[1]))
+            cf = taste @ self.projection
+            joined = self.now.timestamp() - self.rng.random(size) * (self.options['days'] + 30) * 86400
+            genders = self.rng.choice(['male', 'female'], size=size)
+            ages = self.rng.integers(14, 60, size=size)
+            verified = self.rng.random(size) < 0.3
+
+            rows = zip(
+                ids.tolist(), [f"{self.options['prefix']}_{i}" for i in ids.tolist()], _timestamps(joined),
+                genders.tolist(), ages.tolist(), verified.tolist(), _vector_literals(taste), _vector_literals(cf),
+            )
+            self._copy(cursor, User._meta.db_table, [
+                'id', 'username', 'date_joined', 'gender', 'age', 'is_pass_verified',
+                'preference_vector', 'cf_latent_vector', 'password', 'is_superuser', 'is_staff', 'is_active',
+                'first_name', 'last_name', 'email',
+            ], (row + (password, False, False, True, '', '', '') for row in rows))
+
+            through = User.interested_categories.through
+            pairs = {
+                (int(user_id), self.categories[category])
+                for user_id, row, n in zip(ids, interests, self.interest_counts[start:start + size])
+                for category in row[:n]
+            }
+            self._copy(cursor, through._meta.db_table, ['user_id', 'category_id'], sorted(pairs))
+        return f"{count} users"
+
+    # Posts
+
+    def _create_posts(self, cursor):
+        count = self.options['posts']
+        users = len(self.user_ids)
+        n_categories = len(self.categories)
+        first_id = self._reserve_ids(cursor, Post, count)
+        self.post_ids = np.arange(first_id, first_id + count)
+        self.post_categories = self.rng.choice(n_categories, size=count, p=self.category_weights)
+        self.post_created = self.now.timestamp() - self.rng.random(count) * self.options['days'] * 86400
+        # Few authors write most posts
+        author_order = self.rng.permutation(users)
+
+        for start, size in self._batches(count):
+            ids = self.post_ids[start:start + size]
+            categories = self.post_categories[start:start + size]
+            embeddings = _unit(
+                self.topics[categories]
+                + self.options['spread'] * self.rng.standard_normal((size, LOCAL_EMBEDDING_DIMENSION)) / np.sqrt(LOCAL_EMBEDDING_DIMENSION)
+            )
+            cf = embeddings @ self.projection
+            authors = self.user_ids[author_order[(self.rng.zipf(1.5, size=size) - 1) % users]]
+            nsfw = self.rng.random(size) < self.options['nsfw_rate']
+            created = _timestamps(self.post_created[start:start + size])
+            titles = [self._text(c, self.rng.integers(2, 6)) for c in categories]
+            contents = [self._text(c, self.rng.integers(15, 60)) for c in categories]
+
+            rows = zip(
+                ids.tolist(), authors.tolist(), [self.categories[c] for c in categories], titles, contents,
+                [make_preview(content) for content in contents], nsfw.tolist(),
+                _vector_literals(embeddings), _vector_literals(cf), created, created,
+            )
+            self._copy(cursor, Post._meta.db_table, [
+                'id', 'author_id', 'category_id', 'title', 'content', 'preview', 'is_nsfw',
+                'embedding', 'cf_latent_vector', 'created_at', 'updated_at',
+                'thumbnail_url', 'is_profane', 'like_count', 'comment_count',
+            ], (row + ('', False, 0, 0) for row in rows))
+
+            # Keyword search vector, same expression as signals.update_post_search_vector, one statement per batch
+            cursor.execute(f"""
+                UPDATE {Post._meta.db_table} p
+                SET search_vector = setweight(to_tsvector('{SEARCH_CONFIG}', v.title), 'A')
+                                 || setweight(to_tsvector('{SEARCH_CONFIG}', v.content), 'B')
+                FROM unnest(%s::bigint[], %s::text[], %s::text[]) AS v(id, title, content)
+                WHERE p.id = v.id
+            """, [
+                ids.tolist(),
+                [build_search_document(title) for title in titles],
+                [build_search_document(content, MAX_INDEXED_CONTENT_LENGTH) for content in contents],
+            ])
+            self.stdout.write(f"  posts {start + size}/{count}")
+        return f"{count} posts"
+
+    # Interactions
+
+    def _create_interactions(self, cursor):
+        options = self.options
+        users, posts = len(self.user_ids), len(self.post_ids)
+        n_categories = len(self.categories)
+        if not users or not posts:
+            return '0 interactions'
+
+        # Posts grouped by category in a random "popularity" order: rank r of category c is by_category[offsets[c] + r]
+        by_category = np.lexsort((self.rng.random(posts), self.post_categories))
+        sizes = np.bincount(self.post_categories, minlength=n_categories)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        activity = self.rng.lognormal(0, options['activity_sigma'], size=users)
+        per_user = self.rng.multinomial(options['interactions'], activity / activity.sum())
+
+        interaction_table = UserInteraction._meta.db_table
+        like_table = Post.like_users.through._meta.db_table
+        interaction_columns = ['user_id', 'post_id', 'interaction_type', 'duration', 'score', 'created_at']
+        totals = {'VIEW': 0, 'LIKE': 0, 'NOT_INTERESTED': 0}
+        now = self.now.timestamp()
+
+        # Users in batches of about batch_size views; a user is never split, so likes dedupe per batch
+        batch_of_user = np.cumsum(per_user) // options['batch_size']
+        for users_in_batch in np.split(np.arange(users), np.flatnonzero(np.diff(batch_of_user)) + 1):
+            user_index = np.repeat(users_in_batch, per_user[users_in_batch])
+            n = len(user_index)
+            if not n:
+                continue
+            focus = self.rng.random(n) < options['focus']
+            picked = (self.rng.random(n) * self.interest_counts[user_index]).astype(int)
+            categories = np.where(
+                focus,
+                self.interests[user_index, picked],
+                self.rng.choice(n_categories, size=n, p=self.category_weights),
+            )
+            keep = sizes[categories] > 0
+            user_index, focus, categories = user_index[keep], focus[keep], categories[keep]
+            n = len(user_index)
+            ranks = (self.rng.zipf(options['post_skew'], size=n) - 1) % sizes[categories]
+            post_index = by_category[offsets[categories] + ranks]
+
+            created = self.post_created[post_index] + self.rng.random(n) * (now - self.post_created[post_index])
+            # Longer dwell on posts in the user's interests
+            durations = np.minimum(self.rng.lognormal(np.log(6) + 0.5 * focus, 0.8), 300).astype(int)
+            scores = 1.0 + np.minimum(durations / 5.0 * 0.1, 1.0)  # PostInteractionView's VIEW score
+            user_ids, post_ids = self.user_ids[user_index], self.post_ids[post_index]
+            timestamps = _timestamps(created)
+
+            rows = [
+                (u, p, 'VIEW', d, s, t)
+                for u, p, d, s, t in zip(user_ids.tolist(), post_ids.tolist(), durations.tolist(), scores.tolist(), timestamps)
+            ]
+
+            liked = self.rng.random(n) < np.where(focus, options['like_rate'], options['like_rate'] / 4)
+            # One like per (user, post)
+            _, first = np.unique(user_ids[liked] * (int(self.post_ids[-1]) + 1) + post_ids[liked], return_index=True)
+            likes = np.flatnonzero(liked)[first]
+            rows.extend((int(user_ids[i]), int(post_ids[i]), 'LIKE', 0, 5.0, timestamps[i]) for i in likes)
+            self._copy(cursor, like_table, ['post_id', 'user_id'], ((int(post_ids[i]), int(user_ids[i])) for i in likes))
+
+            dismissed = np.flatnonzero(~focus & (self.rng.random(n) < options['not_interested_rate']))
+            rows.extend((int(user_ids[i]), int(post_ids[i]), 'NOT_INTERESTED', 0, -5.0, timestamps[i]) for i in dismissed)
+
+            self._copy(cursor, interaction_table, interaction_columns, rows)
+            totals['VIEW'] += n
+            totals['LIKE'] += len(likes)
+            totals['NOT_INTERESTED'] += len(dismissed)
+            self.stdout.write(f"  interactions {sum(totals.values())} ({totals['VIEW']}/{options['interactions']} views)")
+        return ', '.join(f"{n} {kind}" for kind, n in totals.items())
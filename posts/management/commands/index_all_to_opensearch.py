@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from njjc.metrics import command_metrics
 from posts.models import Post
-from posts.opensearch_client import OpenSearchClient
-from posts.bedrock_client import BedrockClient
+from posts.opensearch_client import OpenSearchClient, build_post_document
+from posts.embeddings import get_search_embedding, search_embedding_backend
 import logging
 import time
 
@@ -10,47 +12,51 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Sync all posts to OpenSearch index for semantic search'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--recreate', action='store_true', help='Drop and recreate the index (needed after mapping changes).')
+
+    @command_metrics
     def handle(self, *args, **options):
         self.stdout.write("Initializing clients...")
         os_client = OpenSearchClient()
-        bedrock_client = BedrockClient()
+        backend = search_embedding_backend()
+        self.stdout.write(f"Search embedding backend: {backend}")
+
+        if options['recreate']:
+            self.stdout.write("Dropping existing index...")
+            os_client.delete_index('posts')
 
         self.stdout.write("Ensuring index exists...")
         os_client.create_index_if_not_exists('posts')
 
-        posts = Post.objects.all()
+        posts = Post.objects.select_related('author')
         count = posts.count()
         self.stdout.write(f"Found {count} posts to index.")
 
         indexed_count = 0
         for post in posts:
             try:
-                # We use Bedrock for OpenSearch embeddings (1024 dim)
-                # The user want Bedrock/OpenSearch separate from local SentenceTransformer
+                # Bedrock mode: Titan embeddings (1024 dim)
+                # Local mode: reuse the pgvector embedding (768 dim), encoding only posts that lack one
                 combined_text = f"{post.title} {post.content}"
                 # Truncate to avoid Bedrock token limit (8192 tokens)
                 # 15000 chars is a safe approximation for ~8000 tokens
                 combined_text = combined_text[:15000] 
                 
-                embedding = bedrock_client.get_embedding(combined_text)
+                embedding = get_search_embedding(combined_text, local_vector=post.embedding)
                 
                 if not embedding:
                     self.stdout.write(self.style.WARNING(f"Failed to get embedding for post {post.id}"))
                     continue
 
-                doc = {
-                    'id': str(post.id),
-                    'title': post.title,
-                    'content': post.content,
-                    'author': post.author.username if post.author else 'unknown',
-                    'embedding': embedding
-                }
+                doc = build_post_document(post, embedding)
                 
                 os_client.index_document('posts', str(post.id), doc)
                 indexed_count += 1
                 
-                # Rate limit for Bedrock
-                time.sleep(1.0)
+                # Rate limit for Bedrock (not for the local stand-in)
+                if backend == 'bedrock' and getattr(settings, 'BEDROCK_BACKEND', 'aws') != 'fake':
+                    time.sleep(1.0)
                 
                 if indexed_count % 10 == 0:
                     self.stdout.write(f"Indexed {indexed_count}/{count}...")
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import random
+import time
+
+import httpx
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from posts.models import Post
+from rest_framework_simplejwt.tokens import AccessToken
+
+ENDPOINTS = ['feed', 'view', 'like', 'not_interested', 'detail', 'search', 'semantic_search']
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {name: [] for name in ENDPOINTS}
+        self.errors = {name: 0 for name in ENDPOINTS}
+        self.recording = False
+
+    def record(self, name, ms, ok):
+        if not self.recording:
+            return
+        self.latencies[name].append(ms)
+        if not ok:
+            self.errors[name] += 1
+
+    def report(self, elapsed):
+        rows = []
+        for name in ENDPOINTS:
+            latencies = self.latencies[name]
+            if not latencies:
+                continue
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            rows.append({
+                'endpoint': name, 'requests': len(latencies), 'errors': self.errors[name],
+                'rps': len(latencies) / elapsed, 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+            })
+        return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay shorts swipe sessions (feed pages, dwell VIEWs, likes, detail opens, keyword/semantic search) '
+        'against a running server and report throughput and p50/p95/p99 latency per endpoint. '
+        'Uses the users created by generate_synthetic_data; JWTs are minted locally, so the server must share SECRET_KEY.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent sessions (virtual users).')
+        parser.add_argument('--seconds', type=float, default=60.0)
+        parser.add_argument('--warmup', type=float, default=5.0, help='Seconds of traffic before recording starts.')
+        parser.add_argument('--users', type=int, default=1000, help='Distinct users to sample sessions from.')
+        parser.add_argument('--prefix', default='synth', help='Username prefix used by generate_synthetic_data.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file.')
+        # Session mix
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--pages', type=float, default=3.0, help='Mean feed pages per session (geometric).')
+        parser.add_argument('--like-rate', type=float, default=0.08, help='Likes per viewed post.')
+        parser.add_argument('--not-interested-rate', type=float, default=0.02, help='NOT_INTERESTED per viewed post.')
+        parser.add_argument('--detail-rate', type=float, default=0.05, help='Detail opens per viewed post.')
+        parser.add_argument('--search-rate', type=float, default=0.2, help='Keyword searches per feed page.')
+        parser.add_argument('--semantic-rate', type=float, default=0.05,
+                            help='Semantic searches per feed page (0 without a search backend).')
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help='Multiplier on the simulated dwell time slept between swipes (0 = closed loop, no pauses).')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.tokens = self._tokens(options['users'], options['prefix'])
+        self.queries = self._queries()
+        self.stdout.write(
+            f"{len(self.tokens)} users, {options['concurrency']} concurrent sessions against {options['url']} "
+            f"for {options['seconds']:.0f}s (+{options['warmup']:.0f}s warmup)"
+        )
+
+        stats, elapsed = asyncio.run(self._run())
+        rows = stats.report(elapsed)
+        self.stdout.write(f"{'endpoint':<16}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<16}{row['requests']:>10}{row['errors']:>8}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            )
+        total = sum(row['requests'] for row in rows)
+        self.stdout.write(f"{'total':<16}{total:>10}{sum(row['errors'] for row in rows):>8}{total / elapsed:>9.1f}")
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({'seconds': elapsed, 'options': {k: v for k, v in options.items() if k != 'json_path'}, 'endpoints': rows}, f, indent=2, default=str)
+
+    def _tokens(self, count, prefix):
+        users = list(get_user_model().objects.filter(username__startswith=f'{prefix}_', is_active=True).only('id')[:count])
+        if not users:
+            raise CommandError(f"No '{prefix}_*' users found. Run generate_synthetic_data first.")
+        return [str(AccessToken.for_user(user)) for user in users]
+
+    def _queries(self):
+        """Search terms taken from recent post titles."""
+        titles = Post.objects.order_by('-id').values_list('title', flat=True)[:500]
+        words = sorted({word for title in titles for word in title.split()})
+        return words or ['검색']
+
+    async def _run(self):
+        options = self.options
+        stats = Stats()
+        limits = httpx.Limits(max_connections=options['concurrency'], max_keepalive_connections=options['concurrency'])
+        async with httpx.AsyncClient(base_url=options['url'], limits=limits, timeout=30.0) as client:
+            deadline = time.monotonic() + options['warmup'] + options['seconds']
+            workers = [asyncio.create_task(self._worker(client, stats, deadline)) for _ in range(options['concurrency'])]
+            await asyncio.sleep(options['warmup'])
+            stats.recording = True
+            started = time.monotonic()
+            await asyncio.gather(*workers)
+        return stats, time.monotonic() - started
+
+    async def _worker(self, client, stats, deadline):
+        while time.monotonic() < deadline:
+            headers = {'Authorization': f'Bearer {self.random.choice(self.tokens)}'}
+            await self._session(client, stats, headers, deadline)
+
+    async def _call(self, stats, name, request):
+        started = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        stats.record(name, (time.perf_counter() - started) * 1000, ok)
+        return response if ok else None
+
+    async def _session(self, client, stats, headers, deadline):
+        """One app open: swipe through feed pages, sometimes liking, opening or searching."""
+        options = self.options
+        pages = 1
+        while self.random.random() < 1 - 1 / max(options['pages'], 1):
+            pages += 1
+
+        for page in range(1, pages + 1):
+            if time.monotonic() >= deadline:
+                return
+            response = await self._call(stats, 'feed', client.get(
+                '/posts/recommended/', params={'page': page, 'page_size': options['page_size']}, headers=headers
+            ))
+            if response is None:
+                return
+            data = response.json()
+
+            for post in data.get('results', []):
+                dwell = min(self.random.lognormvariate(1.8, 0.8), 120)
+                if options['think_time']:
+                    await asyncio.sleep(dwell * options['think_time'])
+                post_id = post['id']
+                await self._call(stats, 'view', client.post(
+                    f'/posts/{post_id}/interact/', json={'type': 'VIEW', 'duration': int(dwell)}, headers=headers
+                ))
+                roll = self.random.random()
+                if roll < options['like_rate']:
+                    await self._call(stats, 'like', client.post(f'/posts/{post_id}/like/', headers=headers))
+                elif roll < options['like_rate'] + options['not_interested_rate']:
+                    await self._call(stats, 'not_interested', client.post(
+                        f'/posts/{post_id}/interact/', json={'type': 'NOT_INTERESTED'}, headers=headers
+                    ))
+                if self.random.random() < options['detail_rate']:
+                    await self._call(stats, 'detail', client.get(f'/posts/detail/{post_id}/', headers=headers))
+
+            if self.random.random() < options['search_rate']:
+                await self._call(stats, 'search', client.get(
+                    '/posts/search-posts/', params={'q': self.random.choice(self.queries)}, headers=headers
+                ))
+            if self.random.random() < options['semantic_rate']:
+                query = ' '.join(self.random.sample(self.queries, min(2, len(self.queries))))
+                await self._call(stats, 'semantic_search', client.get(
+                    '/posts/search/semantic/', params={'q': query}, headers=headers
+                ))
+            if not data.get('next'):
+                return
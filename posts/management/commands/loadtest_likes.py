@@ -0,0 +1,91 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from posts.likes import get_like_buffer, toggle_like
+from posts.models import Category, Post
+
+
+def toggle_like_orm(user_id, post_id):
+    """The previous LikeToggleView path (exists() + add/remove + signals), kept as the baseline."""
+    post = Post.objects.get(pk=post_id)
+    if post.like_users.filter(id=user_id).exists():
+        post.like_users.remove(user_id)
+    else:
+        post.like_users.add(user_id)
+
+
+class Command(BaseCommand):
+    help = 'Hammer one post with concurrent like toggles and report sustained toggles/sec and counter consistency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', type=int, help='Post to like (default: a new load test post).')
+        parser.add_argument('--users', type=int, default=500, help='Distinct users toggling likes.')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--legacy', action='store_true', help='Use the ORM exists()/add()/remove() path instead.')
+
+    def handle(self, *args, **options):
+        post = self._get_post(options['post'])
+        user_ids = self._get_users(options['users'])
+        toggle = toggle_like_orm if options['legacy'] else toggle_like
+
+        deadline = time.monotonic() + options['seconds']
+        counts = [0] * options['threads']
+        errors = []
+
+        def worker(index):
+            # Each thread works through its own slice of users, so threads contend on the post, not the user
+            mine = user_ids[index::options['threads']]
+            i = 0
+            try:
+                while time.monotonic() < deadline:
+                    toggle(mine[i % len(mine)], post.id)
+                    counts[index] += 1
+                    i += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+        get_like_buffer().flush()
+
+        total = sum(counts)
+        mode = 'legacy ORM' if options['legacy'] else 'atomic toggle'
+        self.stdout.write(
+            f"{mode}: {total} toggles in {elapsed:.1f}s on post {post.id} "
+            f"with {options['threads']} threads = {total / elapsed:.0f} toggles/sec"
+        )
+        for e in errors:
+            self.stderr.write(f"Worker failed: {e}")
+
+        post.refresh_from_db(fields=['like_count'])
+        actual = post.like_users.count()
+        if post.like_count == actual:
+            self.stdout.write(self.style.SUCCESS(f"like_count consistent ({actual})."))
+        else:
+            self.stdout.write(self.style.ERROR(f"like_count drifted: stored {post.like_count}, actual {actual}."))
+
+    def _get_post(self, post_id):
+        if post_id:
+            return Post.objects.get(pk=post_id)
+        User = get_user_model()
+        author, _ = User.objects.get_or_create(username='loadtest_author')
+        category, _ = Category.objects.get_or_create(id='loadtest', defaults={'name': 'Load Test'})
+        return Post.objects.create(author=author, category=category, title='Like load test', content='Load test post')
+
+    def _get_users(self, count):
+        User = get_user_model()
+        usernames = [f"loadtest_like_{i}" for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        User.objects.bulk_create([User(username=name, password='!') for name in usernames if name not in existing])
+        return list(User.objects.filter(username__in=usernames).values_list('id', flat=True))
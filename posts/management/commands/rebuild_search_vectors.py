@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from njjc.metrics import command_metrics
+from posts.models import Post
+from posts.search import build_search_vector
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the keyword search tsvector (title/content n-grams) for posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild every post, not only the ones missing a search vector.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    @command_metrics
+    def handle(self, *args, **options):
+        posts = Post.objects.all() if options['all'] else Post.objects.filter(search_vector__isnull=True)
+        count = posts.count()
+        self.stdout.write(f"Found {count} posts to update.")
+
+        if count == 0:
+            self.stdout.write(self.style.SUCCESS("No posts needed updating."))
+            return
+
+        processed = 0
+        for post in posts.only('id', 'title', 'content').iterator(chunk_size=options['batch_size']):
+            Post.objects.filter(pk=post.pk).update(search_vector=build_search_vector(post.title, post.content))
+            processed += 1
+            if processed % options['batch_size'] == 0:
+                self.stdout.write(f"Processed {processed}/{count} posts...")
+
+        self.stdout.write(self.style.SUCCESS(f"Successfully rebuilt search vectors for {processed} posts."))
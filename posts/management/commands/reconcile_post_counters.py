@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from njjc.metrics import command_metrics
+from posts.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute Post.like_count / Post.comment_count from the like table and comments, fixing drifted rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('post_ids', nargs='*', type=int, help='Only reconcile these posts (default: all).')
+
+    @command_metrics
+    def handle(self, *args, **options):
+        fixed = reconcile(options['post_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(
+            f"Fixed like_count on {fixed['like_count']} posts, comment_count on {fixed['comment_count']} posts."
+        ))
@@ -1,10 +1,12 @@
 from django.core.management.base import BaseCommand
+from njjc.metrics import command_metrics
 from posts.recommendations import train_matrix_factorization
 import time
 
 class Command(BaseCommand):
     help = 'Runs Matrix Factorization training for the Recommendation System.'
 
+    @command_metrics
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting Recommendation System Training...'))
         start_time = time.time()
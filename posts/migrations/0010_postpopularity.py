@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 03:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostPopularity',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='posts.post')),
+                ('score', models.FloatField(default=0.0)),
+                ('views', models.IntegerField(default=0)),
+                ('likes', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('dwell_seconds', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='posts.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', '-score'], name='popularity_category_score')],
+            },
+        ),
+    ]
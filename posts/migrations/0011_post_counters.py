@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-19 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_postpopularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunSQL(
+            sql=[
+                "UPDATE posts_post p SET like_count = c.n FROM "
+                "(SELECT post_id, COUNT(*) AS n FROM posts_post_like_users GROUP BY post_id) c WHERE c.post_id = p.id",
+                "UPDATE posts_post p SET comment_count = c.n FROM "
+                "(SELECT post_id, COUNT(*) AS n FROM posts_comment GROUP BY post_id) c WHERE c.post_id = p.id",
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
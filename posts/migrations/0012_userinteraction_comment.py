@@ -0,0 +1,68 @@
+# Generated by Django 6.0 on 2026-10-19 04:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userinteraction',
+            name='comment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='posts.comment'),
+        ),
+        # Link existing COMMENT interactions to comments one-to-one: the n-th interaction of a (user, post)
+        # gets the n-th comment, both in created_at order. Unmatched interactions stay NULL, so no comment
+        # cascades away more than its own interaction.
+        migrations.RunSQL(
+            sql="""
+                UPDATE posts_userinteraction i SET comment_id = pairs.comment_id
+                FROM (
+                    SELECT ui.id AS interaction_id, c.id AS comment_id
+                    FROM (
+                        SELECT id, user_id, post_id,
+                               ROW_NUMBER() OVER (PARTITION BY user_id, post_id ORDER BY created_at, id) AS n
+                        FROM posts_userinteraction
+                        WHERE interaction_type = 'COMMENT' AND comment_id IS NULL
+                    ) ui
+                    JOIN (
+                        SELECT id, author_id, post_id,
+                               ROW_NUMBER() OVER (PARTITION BY author_id, post_id ORDER BY created_at, id) AS n
+                        FROM posts_comment c
+                        WHERE NOT EXISTS (SELECT 1 FROM posts_userinteraction linked WHERE linked.comment_id = c.id)
+                    ) c ON c.author_id = ui.user_id AND c.post_id = ui.post_id AND c.n = ui.n
+                ) pairs
+                WHERE i.id = pairs.interaction_id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        # Keep one LIKE interaction per existing like and drop the ones left behind by unlikes
+        migrations.RunSQL(
+            sql=[
+                """
+                DELETE FROM posts_userinteraction i
+                WHERE i.interaction_type = 'LIKE' AND NOT EXISTS (
+                    SELECT 1 FROM posts_post_like_users l WHERE l.user_id = i.user_id AND l.post_id = i.post_id
+                )
+                """,
+                """
+                DELETE FROM posts_userinteraction i
+                USING posts_userinteraction newer
+                WHERE i.interaction_type = 'LIKE' AND newer.interaction_type = 'LIKE'
+                  AND i.user_id = newer.user_id AND i.post_id = newer.post_id AND i.id < newer.id
+                """,
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='userinteraction',
+            constraint=models.UniqueConstraint(condition=models.Q(('interaction_type', 'LIKE')), fields=('user', 'post'), name='unique_like_interaction'),
+        ),
+    ]
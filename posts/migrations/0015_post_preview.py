@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-19 04:13
+
+import re
+
+from django.db import migrations, models
+
+# Same rules as posts.search.make_preview / first_image_url, frozen for this migration
+MARKDOWN_IMAGE_RE = re.compile(r'!\[.*?\]\(.*?\)')
+MARKDOWN_IMAGE_URL_RE = re.compile(r'!\[.*?\]\((.*?)\)')
+
+
+def fill_list_fields(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    batch = []
+    for post in Post.objects.only('id', 'content').iterator(chunk_size=1000):
+        content = post.content or ''
+        post.preview = MARKDOWN_IMAGE_RE.sub('', content).strip()[:200]
+        match = MARKDOWN_IMAGE_URL_RE.search(content)
+        post.thumbnail_url = match.group(1).strip() if match else ''
+        batch.append(post)
+        if len(batch) == 1000:
+            Post.objects.bulk_update(batch, ['preview', 'thumbnail_url'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['preview', 'thumbnail_url'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='preview',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_url',
+            field=models.CharField(blank=True, default='', max_length=1000),
+        ),
+        migrations.RunPython(fill_list_fields, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from pgvector.django import VectorField
 
 class Category(models.Model):
@@ -17,16 +19,27 @@ class Post(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
     content = models.TextField()
+    # Precomputed from content on save (see signals.fill_post_list_fields) so lists never ship the body
+    preview = models.CharField(max_length=200, blank=True, default='')
+    thumbnail_url = models.CharField(max_length=1000, blank=True, default='')
     like_users = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='like_posts')
     is_nsfw = models.BooleanField(default=False)
     is_profane = models.BooleanField(default=False)
     embedding = VectorField(dimensions=768, null=True, blank=True) # Content-Based (SBERT)
     cf_latent_vector = VectorField(dimensions=64, null=True, blank=True) # Collaborative Filtering (MF)
+    search_vector = SearchVectorField(null=True, blank=True) # Keyword search (title/content n-grams)
+    like_count = models.IntegerField(default=0) # Denormalized, see posts/counters.py
+    comment_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True) # Bumped by save(); part of the post's ETag
 
     class Meta:
         db_table = 'posts_post'
         # managed = False (Post 테이블도 이미 있으면 추가해도 좋습니다)
+        indexes = [
+            GinIndex(fields=['search_vector'], name='post_search_vector_gin'),
+            GinIndex(fields=['title'], name='post_title_trgm_gin', opclasses=['gin_trgm_ops']),
+        ]
 
 # Comment 등 다른 모델도 그대로 유지
 class Comment(models.Model):
@@ -38,6 +51,11 @@ class Comment(models.Model):
 
     class Meta:
         db_table = 'posts_comment'
+        indexes = [
+            # Top-level comments of a post (parent IS NULL) in order, and replies of a thread in order
+            models.Index(fields=['post', 'parent', 'created_at'], name='comment_post_parent_created'),
+            models.Index(fields=['parent', 'created_at'], name='comment_parent_created'),
+        ]
 
 class UserInteraction(models.Model):
     INTERACTION_CHOICES = [
@@ -49,6 +67,8 @@ class UserInteraction(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    # COMMENT interactions are deleted together with their comment
+    comment = models.ForeignKey('Comment', null=True, blank=True, on_delete=models.CASCADE)
     interaction_type = models.CharField(max_length=20, choices=INTERACTION_CHOICES)
     duration = models.IntegerField(default=0)  # Seconds spent on the post
     score = models.FloatField(default=0.0)     # Calculated relevance score
@@ -59,6 +79,33 @@ class UserInteraction(models.Model):
         indexes = [
             models.Index(fields=['user', 'created_at']),
         ]
+        constraints = [
+            # One LIKE interaction per like row, so unliking deletes it by key
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                condition=models.Q(interaction_type='LIKE'),
+                name='unique_like_interaction',
+            ),
+        ]
+
+class PostPopularity(models.Model):
+    """
+    Time-decayed engagement rollup per post, updated incrementally from UserInteraction events.
+    `score` is decayed up to `updated_at`; see posts/popularity.py.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='popularity')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE) # Denormalized for per-category top-N
+    score = models.FloatField(default=0.0)
+    views = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    dwell_seconds = models.IntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', '-score'], name='popularity_category_score'),
+        ]
 
 class Report(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
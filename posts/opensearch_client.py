@@ -2,9 +2,26 @@ import logging
 from opensearchpy import OpenSearch, RequestsHttpConnection
 from django.conf import settings
 import os
+from njjc.aio import run_blocking
+from njjc.http import get_async_client
+from njjc import metrics
+from njjc.timing import span
+from .models import Post
+from .search import make_preview
+from .embeddings import (
+    BEDROCK_EMBEDDING_DIMENSION, get_search_embedding, search_embedding_backend, search_embedding_dimension,
+)
+from .stand_ins import InMemoryOpenSearch, hash_embedding
 
 logger = logging.getLogger(__name__)
 
+OPENSEARCH_REQUESTS = metrics.counter('opensearch_requests_total', 'OpenSearch calls by operation and result.')
+OPENSEARCH_SECONDS = metrics.histogram('opensearch_request_seconds', 'OpenSearch call latency by operation.')
+
+# Fields returned by searches. Full 'content' is never shipped back, only the preview.
+POST_SOURCE_FIELDS = ['id', 'title', 'preview', 'author', 'category']
+PREVIEW_LENGTH = 200
+
 class OpenSearchClient:
     _instance = None
 
@@ -20,6 +37,18 @@ class OpenSearchClient:
         OPENSEARCH_USER = os.environ.get('OPENSEARCH_USER', '')
         OPENSEARCH_PASSWORD = os.environ.get('OPENSEARCH_PASSWORD', '')
 
+        # OPENSEARCH_BACKEND='memory': in-process kNN (posts/stand_ins.py), filled from Postgres on
+        # first search with OPENSEARCH_MEMORY_LOAD_POSTS (each process has its own copy)
+        if getattr(settings, 'OPENSEARCH_BACKEND', 'opensearch') == 'memory':
+            self.base_url, self.auth = None, None
+            loader = load_posts if getattr(settings, 'OPENSEARCH_MEMORY_LOAD_POSTS', False) else None
+            self.client = InMemoryOpenSearch(loader=loader)
+            return
+
+        # Async searches (ASGI views) go over httpx; opensearch-py's async transport needs aiohttp
+        self.base_url = f"https://{OPENSEARCH_HOST}:{OPENSEARCH_PORT}"
+        self.auth = (OPENSEARCH_USER, OPENSEARCH_PASSWORD)
+
         try:
             auth = (OPENSEARCH_USER, OPENSEARCH_PASSWORD)
             self.client = OpenSearch(
@@ -46,68 +75,203 @@ class OpenSearchClient:
         
         if not self.client.indices.exists(index=index_name):
             # Define k-NN index mapping matching Lambda
+            # The vector dimension follows SEARCH_EMBEDDING_BACKEND (Titan 1024 / local model 768).
+            # Lucene engine: filters inside the knn clause are applied during the graph search,
+            # so a filtered query still returns exactly k hits.
             body = {
                 "settings": {
                     "index": {
-                        "knn": True,
-                         "knn.algo_param.ef_search": 100
+                        "knn": True
                     }
                 },
                 "mappings": {
                     "properties": {
                         "embedding": {
                             "type": "knn_vector",
-                            "dimension": 1024, 
+                            "dimension": search_embedding_dimension(),
                             "method": {
                                 "name": "hnsw",
-                                "engine": "nmslib",
+                                "engine": "lucene",
                                 "space_type": "cosinesimil"
                             }
                         },
                         "title": {"type": "text"},
                         "content": {"type": "text"},
+                        "preview": {"type": "text", "index": False},
                         "id": {"type": "keyword"},
+                        "author": {"type": "keyword"},
+                        "category": {"type": "keyword"},
+                        "is_nsfw": {"type": "boolean"},
+                        "is_profane": {"type": "boolean"},
+                        "created_at": {"type": "date"},
                     }
                 }
             }
             self.client.indices.create(index=index_name, body=body)
             logger.info(f"Created OpenSearch index: {index_name}")
 
+    def delete_index(self, index_name='posts'):
+        if not self.client:
+            return
+        self.client.indices.delete(index=index_name, ignore=[404])
+        logger.info(f"Deleted OpenSearch index: {index_name}")
+
     def index_document(self, index_name, doc_id, body):
         if not self.client:
             return
         try:
-            self.client.index(index=index_name, id=doc_id, body=body, refresh=True)
+            with span('opensearch'), OPENSEARCH_SECONDS.time(op='index'):
+                self.client.index(index=index_name, id=doc_id, body=body, refresh=True)
+            OPENSEARCH_REQUESTS.inc(op='index', result='ok')
             logger.info(f"Indexed document {doc_id} to {index_name}")
         except Exception as e:
+            OPENSEARCH_REQUESTS.inc(op='index', result='error')
             logger.error(f"Error indexing to OpenSearch: {e}")
 
-    def search(self, index_name, query_vector, k=5):
+    def search(self, index_name, query_vector, k=5, filters=None, exclude_ids=None, source=None, offset=0):
+        """
+        k-NN search with filters applied inside the knn clause.
+        Returns hits [offset, offset + k) of the ranking.
+
+        filters: {field: value}. A list/tuple/set value becomes a terms filter,
+                 a dict value becomes a range filter (e.g. {'created_at': {'gte': ...}}).
+        exclude_ids: document ids that must never be returned.
+        source: _source fields to return (defaults to POST_SOURCE_FIELDS), False for ids only.
+        """
         if not self.client:
             return []
-        
-        query = {
-            "size": k,
-            "query": {
-                "knn": {
-                    "embedding": {
-                        "vector": query_vector,
-                        "k": k
-                    }
-                }
-            }
-        }
+
+        query = build_knn_query(query_vector, k, filters, exclude_ids, source, offset)
         
         try:
-            response = self.client.search(index=index_name, body=query)
+            with span('opensearch'), OPENSEARCH_SECONDS.time(op='search'):
+                response = self.client.search(index=index_name, body=query)
             hits = response['hits']['hits']
+            OPENSEARCH_REQUESTS.inc(op='search', result='ok')
             return hits
         except Exception as e:
+            OPENSEARCH_REQUESTS.inc(op='search', result='error')
             logger.error(f"OpenSearch search failed: {e}")
             return []
 
-    def search_posts(self, query_vector, size=10):
+    def search_posts(self, query_vector, size=10, filters=None, exclude_ids=None, source=None, offset=0):
         """
         Convenience method to search the 'posts' index.
         """
-        return self.search('posts', query_vector, k=size)
+        return self.search(
+            'posts', query_vector, k=size, filters=filters, exclude_ids=exclude_ids, source=source, offset=offset
+        )
+
+    async def asearch(self, index_name, query_vector, k=5, filters=None, exclude_ids=None, source=None, offset=0):
+        """search() for async views: same query and hits, awaited over the event loop's connection pool."""
+        if not self.client:
+            return []
+        if getattr(self.client, 'in_memory', False):
+            return await run_blocking(self.search, index_name, query_vector, k, filters, exclude_ids, source, offset)
+
+        query = build_knn_query(query_vector, k, filters, exclude_ids, source, offset)
+        http = get_async_client(
+            'opensearch', base_url=self.base_url, auth=self.auth, verify=False, timeout=30.0
+        )
+        try:
+            with span('opensearch'), OPENSEARCH_SECONDS.time(op='search'):
+                response = await http.post(f"/{index_name}/_search", json=query)
+            response.raise_for_status()
+            hits = response.json()['hits']['hits']
+            OPENSEARCH_REQUESTS.inc(op='search', result='ok')
+            return hits
+        except Exception as e:
+            OPENSEARCH_REQUESTS.inc(op='search', result='error')
+            logger.error(f"OpenSearch search failed: {e}")
+            return []
+
+    async def asearch_posts(self, query_vector, size=10, filters=None, exclude_ids=None, source=None, offset=0):
+        return await self.asearch(
+            'posts', query_vector, k=size, filters=filters, exclude_ids=exclude_ids, source=source, offset=offset
+        )
+
+
+def build_knn_query(query_vector, k, filters=None, exclude_ids=None, source=None, offset=0):
+    """Search body for hits [offset, offset + k) of a filtered k-NN query."""
+    # The knn clause must collect every neighbour up to the end of the requested page.
+    knn = {
+        "vector": query_vector,
+        "k": offset + k
+    }
+    knn_filter = build_filter(filters, exclude_ids)
+    if knn_filter:
+        knn["filter"] = knn_filter
+
+    return {
+        "from": offset,
+        "size": k,
+        "_source": POST_SOURCE_FIELDS if source is None else source,
+        "query": {
+            "knn": {
+                "embedding": knn
+            }
+        }
+    }
+
+
+def build_filter(filters=None, exclude_ids=None):
+    """Build the bool filter used inside a knn clause, or None if there is nothing to filter."""
+    clauses = []
+    for field, value in (filters or {}).items():
+        if isinstance(value, dict):
+            clauses.append({"range": {field: value}})
+        elif isinstance(value, (list, tuple, set)):
+            clauses.append({"terms": {field: list(value)}})
+        else:
+            clauses.append({"term": {field: value}})
+
+    must_not = []
+    if exclude_ids:
+        must_not.append({"ids": {"values": [str(i) for i in exclude_ids]}})
+
+    if not clauses and not must_not:
+        return None
+
+    bool_query = {}
+    if clauses:
+        bool_query["filter"] = clauses
+    if must_not:
+        bool_query["must_not"] = must_not
+    return {"bool": bool_query}
+
+
+def build_post_document(post, embedding):
+    """Document stored in the 'posts' index for a Post."""
+    return {
+        'id': str(post.id),
+        'title': post.title,
+        'content': post.content,
+        'preview': make_preview(post.content, PREVIEW_LENGTH),
+        'author': post.author.username if post.author else 'unknown',
+        'category': post.category_id,
+        'is_nsfw': post.is_nsfw,
+        'is_profane': post.is_profane,
+        'created_at': post.created_at.isoformat() if post.created_at else None,
+        'embedding': embedding
+    }
+
+
+def load_posts(client, index_name='posts', batch_size=1000):
+    """Index every post into an in-memory client, as index_all_to_opensearch does for a cluster."""
+    client.indices.create(index=index_name, body={
+        'mappings': {'properties': {'embedding': {'dimension': search_embedding_dimension()}}}
+    })
+    # The index stands for one built ahead of time, so the fake Bedrock's injected latency is skipped
+    # (hash_embedding is what it would return)
+    fake_bedrock = search_embedding_backend() == 'bedrock' and getattr(settings, 'BEDROCK_BACKEND', 'aws') == 'fake'
+    count = 0
+    for post in Post.objects.select_related('author').iterator(chunk_size=batch_size):
+        text = f"{post.title} {post.content}"[:15000]
+        if fake_bedrock:
+            embedding = hash_embedding(text, BEDROCK_EMBEDDING_DIMENSION).tolist()
+        else:
+            embedding = get_search_embedding(text, local_vector=post.embedding)
+        if embedding:
+            client.put(index_name, str(post.id), build_post_document(post, embedding))
+            count += 1
+    logger.info(f"Loaded {count} posts into the in-memory search index")
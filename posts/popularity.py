@@ -0,0 +1,229 @@
+import atexit
+import math
+import threading
+import time
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from njjc.metrics import CACHE_REQUESTS
+
+from .counters import WriteBehindBuffer
+from .models import PostPopularity
+
+logger = logging.getLogger(__name__)
+
+# Engagement rollup
+# - Every interaction adds its weight to the post's score, after decaying the stored score
+#   from updated_at to now (exponential decay with a half-life).
+# - Interactions are merged per post in a per-process write-behind buffer (the same one as the like
+#   counter) and upserted in one statement every POPULARITY_FLUSH_SECONDS, so a viral post's views and
+#   likes don't serialize on its row lock.
+# - compact() periodically decays every row to the same instant, prunes dead rows and
+#   rebuilds the per-category top-N lists that cold start reads.
+
+TRENDING_CACHE_KEY = 'posts:popularity:trending'
+
+_trending = {'data': None, 'expires_at': 0.0}
+_trending_lock = threading.Lock()
+
+
+def half_life_seconds():
+    return getattr(settings, 'POPULARITY_HALF_LIFE_HOURS', 24) * 3600.0
+
+
+def decay(score, updated_at, now=None):
+    """Decay a stored score from updated_at to now."""
+    now = now or timezone.now()
+    elapsed = max((now - updated_at).total_seconds(), 0.0)
+    return score * math.pow(0.5, elapsed / half_life_seconds())
+
+
+class PopularityBuffer(WriteBehindBuffer):
+    """
+    Pending rollup per post: {'score', 'at', 'views', 'likes', 'comments', 'dwell'}, with the
+    score decayed to `at` (the newest interaction), which is how the upsert merges rows too.
+    """
+
+    def merge(self, current, value):
+        if current is None:
+            return dict(value)
+        newer, older = (value, current) if value['at'] >= current['at'] else (current, value)
+        factor = math.pow(0.5, (newer['at'] - older['at']).total_seconds() / half_life_seconds())
+        merged = {field: current[field] + value[field] for field in ('views', 'likes', 'comments', 'dwell')}
+        merged['score'] = newer['score'] + older['score'] * factor
+        merged['at'] = newer['at']
+        return merged
+
+    def write(self, items):
+        table = PostPopularity._meta.db_table
+        values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(items))
+        params = []
+        for post_id, value in items:
+            params += [post_id, value['score'], value['views'], value['likes'], value['comments'], value['dwell'], value['at']]
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {table} (post_id, category_id, score, views, likes, comments, dwell_seconds, updated_at)
+                SELECT p.id, p.category_id, v.score, v.views, v.likes, v.comments, v.dwell, v.at
+                FROM (VALUES {values}) AS v(post_id, score, views, likes, comments, dwell, at)
+                JOIN posts_post p ON p.id = v.post_id
+                ORDER BY p.id
+                ON CONFLICT (post_id) DO UPDATE SET
+                    score = {table}.score * power(0.5, GREATEST(EXTRACT(EPOCH FROM (EXCLUDED.updated_at - {table}.updated_at)), 0) / %s)
+                            + EXCLUDED.score * power(0.5, GREATEST(EXTRACT(EPOCH FROM ({table}.updated_at - EXCLUDED.updated_at)), 0) / %s),
+                    views = {table}.views + EXCLUDED.views,
+                    likes = {table}.likes + EXCLUDED.likes,
+                    comments = {table}.comments + EXCLUDED.comments,
+                    dwell_seconds = {table}.dwell_seconds + EXCLUDED.dwell_seconds,
+                    updated_at = GREATEST({table}.updated_at, EXCLUDED.updated_at),
+                    category_id = EXCLUDED.category_id
+            """, params + [half_life_seconds(), half_life_seconds()])
+            return cursor.rowcount
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_popularity_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = PopularityBuffer(
+                    interval=getattr(settings, 'POPULARITY_FLUSH_SECONDS', 1.0),
+                    max_pending=getattr(settings, 'POPULARITY_MAX_PENDING', 1000),
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def record_interaction(interaction):
+    """Buffer one UserInteraction for the post's rollup; it is added once the surrounding transaction commits."""
+    if interaction.interaction_type not in ('VIEW', 'LIKE', 'COMMENT'):
+        return
+    value = {
+        'score': max(interaction.score, 0.0),
+        'at': interaction.created_at or timezone.now(),
+        'views': int(interaction.interaction_type == 'VIEW'),
+        'likes': int(interaction.interaction_type == 'LIKE'),
+        'comments': int(interaction.interaction_type == 'COMMENT'),
+        'dwell': interaction.duration if interaction.interaction_type == 'VIEW' else 0,
+    }
+    buffer = get_popularity_buffer()
+    post_id = interaction.post_id
+    transaction.on_commit(lambda: buffer.add(post_id, value))
+
+
+def compact(now=None):
+    """
+    Decay every row to `now`, drop rows whose score has decayed below POPULARITY_MIN_SCORE
+    and rebuild the per-category trending lists. Returns (rows kept, rows pruned).
+    """
+    now = now or timezone.now()
+    table = PostPopularity._meta.db_table
+    get_popularity_buffer().flush()
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {table}
+            SET score = score * power(0.5, GREATEST(EXTRACT(EPOCH FROM (%(now)s - updated_at)), 0) / %(half_life)s),
+                updated_at = %(now)s
+            WHERE updated_at < %(now)s
+        """, {'now': now, 'half_life': half_life_seconds()})
+        kept = cursor.rowcount
+
+    pruned, _ = PostPopularity.objects.filter(score__lt=getattr(settings, 'POPULARITY_MIN_SCORE', 0.01)).delete()
+    rebuild_trending()
+    return kept - pruned, pruned
+
+
+def rebuild(now=None):
+    """Recompute every rollup from the UserInteraction history (backfill / repair). Returns the row count."""
+    now = now or timezone.now()
+    table = PostPopularity._meta.db_table
+    # Written first so they are replaced by the recomputed rows instead of added on top of them
+    get_popularity_buffer().flush()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"""
+            INSERT INTO {table} (post_id, category_id, score, views, likes, comments, dwell_seconds, updated_at)
+            SELECT p.id, p.category_id,
+                   SUM(GREATEST(i.score, 0) * power(0.5, GREATEST(EXTRACT(EPOCH FROM (%(now)s - i.created_at)), 0) / %(half_life)s)),
+                   COUNT(*) FILTER (WHERE i.interaction_type = 'VIEW'),
+                   COUNT(*) FILTER (WHERE i.interaction_type = 'LIKE'),
+                   COUNT(*) FILTER (WHERE i.interaction_type = 'COMMENT'),
+                   COALESCE(SUM(i.duration) FILTER (WHERE i.interaction_type = 'VIEW'), 0),
+                   %(now)s
+            FROM posts_userinteraction i
+            JOIN posts_post p ON p.id = i.post_id
+            WHERE i.interaction_type IN ('VIEW', 'LIKE', 'COMMENT')
+            GROUP BY p.id, p.category_id
+        """, {'now': now, 'half_life': half_life_seconds()})
+        count = cursor.rowcount
+    rebuild_trending()
+    return count
+
+
+def scores_as_of(when):
+    """{post_id: score} as the rollup stood at `when`, from the interactions before it (offline evaluation)."""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT post_id,
+                   SUM(GREATEST(score, 0) * power(0.5, EXTRACT(EPOCH FROM (%(when)s - created_at)) / %(half_life)s))
+            FROM posts_userinteraction
+            WHERE created_at < %(when)s AND interaction_type IN ('VIEW', 'LIKE', 'COMMENT')
+            GROUP BY post_id
+        """, {'when': when, 'half_life': half_life_seconds()})
+        return dict(cursor.fetchall())
+
+
+def rebuild_trending():
+    """Store the top POPULARITY_TRENDING_SIZE posts per category in the shared cache."""
+    size = getattr(settings, 'POPULARITY_TRENDING_SIZE', 100)
+    rows = PostPopularity.objects.annotate(
+        rank=Window(RowNumber(), partition_by=F('category_id'), order_by=F('score').desc())
+    ).filter(rank__lte=size).order_by('category_id', 'rank').values_list('category_id', 'post_id', 'score')
+
+    trending = {}
+    for category_id, post_id, score in rows:
+        trending.setdefault(category_id, []).append((post_id, score))
+
+    cache.set(TRENDING_CACHE_KEY, trending, timeout=getattr(settings, 'POPULARITY_TRENDING_CACHE_SECONDS', 300))
+    with _trending_lock:
+        _trending['data'] = trending
+        _trending['expires_at'] = time.monotonic() + getattr(settings, 'POPULARITY_LOCAL_CACHE_SECONDS', 60)
+    return trending
+
+
+def get_trending():
+    """
+    {category_id: [(post_id, score), ...]} from process memory, refreshed from the shared cache.
+    Rebuilt from the table (one indexed window query) when the shared cache is empty.
+    """
+    if _trending['data'] is not None and time.monotonic() < _trending['expires_at']:
+        CACHE_REQUESTS.inc(cache='trending', result='local')
+        return _trending['data']
+    trending = cache.get(TRENDING_CACHE_KEY)
+    if trending is None:
+        CACHE_REQUESTS.inc(cache='trending', result='miss')
+        return rebuild_trending()
+    CACHE_REQUESTS.inc(cache='trending', result='shared')
+    with _trending_lock:
+        _trending['data'] = trending
+        _trending['expires_at'] = time.monotonic() + getattr(settings, 'POPULARITY_LOCAL_CACHE_SECONDS', 60)
+    return trending
+
+
+def get_trending_post_ids(category_ids, limit):
+    """Most popular post ids across the given categories, best first."""
+    trending = get_trending()
+    merged = []
+    for category_id in category_ids:
+        merged.extend(trending.get(category_id, ()))
+    merged.sort(key=lambda item: item[1], reverse=True)
+    return [post_id for post_id, score in merged[:limit]]
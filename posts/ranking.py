@@ -0,0 +1,142 @@
+import numpy as np
+from datetime import datetime, timezone
+from django.conf import settings
+
+# Scoring: cf * w_cf + content * w_content + engagement * w_engagement,
+# then posts younger than fresh_hours get (score + fresh_bonus) * fresh_multiplier.
+# engagement is the decayed popularity score (posts/popularity.py), log-scaled to [0, 1] per batch.
+DEFAULT_WEIGHTS = {
+    'cf': 0.4,
+    'content': 0.4,
+    'engagement': 0.1,
+    'fresh_hours': 24,
+    'fresh_bonus': 0.2,
+    'fresh_multiplier': 1.2,
+}
+
+# Users without a CF vector have no cf_score, so content and popularity carry the weight
+COLD_START_WEIGHTS = {
+    'cf': 0.0,
+    'content': 0.7,
+    'engagement': 0.3,
+}
+
+
+def get_ranking_weights(has_cf_vector=True):
+    """Ranking weights, overridable with settings.RECSYS_RANKING_WEIGHTS / RECSYS_COLD_START_WEIGHTS."""
+    weights = {**DEFAULT_WEIGHTS, **getattr(settings, 'RECSYS_RANKING_WEIGHTS', {})}
+    if not has_cf_vector:
+        weights.update(COLD_START_WEIGHTS)
+        weights.update(getattr(settings, 'RECSYS_COLD_START_WEIGHTS', {}))
+    return weights
+
+
+def gather_features(candidates, now=None):
+    """
+    Collect candidate features into arrays, in candidates order.
+    candidates: {post_id: {'post', 'cf_score', 'content_score', optional 'engagement'}}
+    """
+    now = now or datetime.now(timezone.utc)
+    n = len(candidates)
+    values = candidates.values()
+    created = np.fromiter((d['post'].created_at.timestamp() for d in values), dtype=np.float64, count=n)
+    engagement = np.log1p(np.fromiter((max(d.get('engagement', 0.0), 0.0) for d in values), dtype=np.float64, count=n))
+    if n and engagement.max() > 0:
+        engagement /= engagement.max()
+    return {
+        'cf': np.fromiter((d['cf_score'] for d in values), dtype=np.float64, count=n),
+        'content': np.fromiter((d['content_score'] for d in values), dtype=np.float64, count=n),
+        'engagement': engagement,
+        'age_hours': (now.timestamp() - created) / 3600.0,
+    }
+
+
+def score_features(features, weights):
+    """Score every candidate in one vectorized expression."""
+    scores = (
+        weights['cf'] * features['cf']
+        + weights['content'] * features['content']
+        + weights['engagement'] * features['engagement']
+    )
+    fresh = features['age_hours'] < weights['fresh_hours']
+    return np.where(fresh, (scores + weights['fresh_bonus']) * weights['fresh_multiplier'], scores)
+
+
+def top_k_indices(scores, k):
+    """Indices of the k best scores, best first. argpartition keeps this O(n + k log k)."""
+    n = len(scores)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+def score_candidates(candidates, weights, now=None):
+    """(posts, scores) in candidates order."""
+    posts = [d['post'] for d in candidates.values()]
+    if not posts:
+        return posts, np.empty(0)
+    return posts, score_features(gather_features(candidates, now), weights)
+
+
+def rank_candidates(candidates, weights, k=100, now=None):
+    """Posts of the top-k candidates, best first."""
+    posts, scores = score_candidates(candidates, weights, now)
+    return [posts[i] for i in top_k_indices(scores, k)]
+
+
+def get_diversity():
+    """MMR trade-off: 0 = pure relevance, 1 = pure novelty. settings.RECSYS_DIVERSITY."""
+    return getattr(settings, 'RECSYS_DIVERSITY', 0.3)
+
+
+def embedding_matrix(posts):
+    """(n, d) matrix of post embeddings; posts without one get a zero row (similar to nothing)."""
+    dim = next((len(p.embedding) for p in posts if p.embedding is not None), 1)
+    matrix = np.zeros((len(posts), dim), dtype=np.float32)
+    for i, post in enumerate(posts):
+        if post.embedding is not None:
+            matrix[i] = post.embedding
+    return matrix
+
+
+def mmr_indices(relevance, embeddings, k, diversity):
+    """
+    Maximal marginal relevance: greedily pick argmax((1 - λ)·relevance - λ·max_sim_to_selected).
+
+    The cosine similarity matrix is computed once; each step only updates the running
+    max-similarity vector, so selection is O(k·n) array work with no per-pair Python code.
+    Relevance is min-max scaled to [0, 1] so λ means the same thing whatever the score range.
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    spread = relevance.max() - relevance.min()
+    scaled = (relevance - relevance.min()) / spread if spread > 0 else np.ones(n)
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = embeddings / norms
+    penalty = diversity * (unit @ unit.T)
+
+    gain = (1.0 - diversity) * scaled
+    max_penalty = np.zeros(n)
+    current = np.empty(n)
+    selected = np.empty(k, dtype=np.int64)
+    for i in range(k):
+        np.subtract(gain, max_penalty, out=current)
+        j = current.argmax()
+        selected[i] = j
+        gain[j] = -np.inf
+        np.maximum(max_penalty, penalty[j], out=max_penalty)
+    return selected
+
+
+def diversify(posts, scores, k=100, diversity=None):
+    """Re-rank scored posts with MMR over their embeddings; plain top-k when diversity is 0."""
+    diversity = get_diversity() if diversity is None else diversity
+    if diversity <= 0:
+        return [posts[i] for i in top_k_indices(scores, k)]
+    return [posts[i] for i in mmr_indices(np.asarray(scores, dtype=np.float64), embedding_matrix(posts), k, diversity)]
@@ -4,6 +4,7 @@ from sklearn.decomposition import TruncatedSVD
 from django.conf import settings
 from .models import UserInteraction, Post
 from django.contrib.auth import get_user_model
+from njjc.db_routers import replica_reads
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,8 +24,10 @@ def train_matrix_factorization(n_components=64):
     logger.info("Starting Matrix Factorization Training...")
     
     # 1. Load Data
-    interactions = UserInteraction.objects.all().values('user_id', 'post_id', 'score')
-    df = pd.DataFrame(list(interactions))
+    # The full scan runs on a replica when one is configured; the vectors are written to the primary
+    with replica_reads():
+        interactions = list(UserInteraction.objects.all().values('user_id', 'post_id', 'score'))
+    df = pd.DataFrame(interactions)
     
     if df.empty:
         logger.warning("No interactions found. Skipping training.")
@@ -0,0 +1,133 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db.models import Exists, F, OuterRef, Q, Value
+
+from .models import Post
+
+# 한국어는 띄어쓰기 단위(어절)에 조사가 붙어 있어서 단어 단위 full-text 검색이 잘 맞지 않습니다.
+# 그래서 각 어절을 글자 bigram 으로 쪼개서 'simple' 사전의 tsvector 에 넣습니다.
+# ex) "고양이가" -> "고양 양이 이가"
+NGRAM_SIZE = 2
+SEARCH_CONFIG = 'simple'
+MAX_INDEXED_CONTENT_LENGTH = 10000
+# pg_trgm 은 3글자 미만 패턴에서 trigram 을 뽑지 못해서 ILIKE 가 인덱스 전체/테이블 스캔이 됩니다.
+MIN_TRIGRAM_QUERY_LENGTH = 3
+
+_MARKDOWN_IMAGE_RE = re.compile(r'!\[.*?\]\(.*?\)')
+_MARKDOWN_IMAGE_URL_RE = re.compile(r'!\[.*?\]\((.*?)\)')
+_WORD_RE = re.compile(r'\w+')
+
+
+def ngram_tokens(text, n=NGRAM_SIZE):
+    """
+    Split text into character n-grams per word.
+    Words shorter than n are kept as a single token.
+    """
+    tokens = []
+    for word in _WORD_RE.findall((text or '').lower()):
+        if len(word) <= n:
+            tokens.append(word)
+            continue
+        tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+def make_preview(content, length=200):
+    """Plain-text preview of a post body (markdown images removed)."""
+    return _MARKDOWN_IMAGE_RE.sub('', content or '').strip()[:length]
+
+
+def first_image_url(content):
+    """URL of the first markdown image in a post body, or ''."""
+    match = _MARKDOWN_IMAGE_URL_RE.search(content or '')
+    return match.group(1).strip() if match else ''
+
+
+def build_search_document(text, max_length=None):
+    """Turn raw post text into the space separated n-gram document stored in the tsvector."""
+    text = _MARKDOWN_IMAGE_RE.sub('', text or '')
+    if max_length:
+        text = text[:max_length]
+    return ' '.join(ngram_tokens(text))
+
+
+def build_search_vector(title, content):
+    """
+    Expression for Post.search_vector.
+    Title n-grams get weight A so that title matches rank above body matches.
+    """
+    return (
+        SearchVector(Value(build_search_document(title)), config=SEARCH_CONFIG, weight='A')
+        + SearchVector(Value(build_search_document(content, MAX_INDEXED_CONTENT_LENGTH)), config=SEARCH_CONFIG, weight='B')
+    )
+
+
+def build_search_query(query):
+    """AND of every query n-gram, or None if the query has no searchable characters."""
+    tokens = sorted(set(ngram_tokens(query)))
+    if not tokens:
+        return None
+    return SearchQuery(' & '.join(tokens), config=SEARCH_CONFIG, search_type='raw')
+
+
+def keyword_search(queryset, query):
+    """
+    Filter and rank posts for a keyword query.
+
+    - search_vector @@ n-gram query  (GIN index, covers title + content, works for 1~2 글자 검색어)
+    - title ILIKE '%q%'               (GIN gin_trgm_ops index, only for queries of 3+ characters;
+                                        shorter ones are covered by the title bigrams in search_vector)
+    Ranked by title trigram similarity plus the tsvector rank.
+    """
+    search_query = build_search_query(query)
+    if search_query is None:
+        return queryset.none()
+
+    condition = Q(search_vector=search_query)
+    if len(query.strip()) >= MIN_TRIGRAM_QUERY_LENGTH:
+        condition |= Q(title__icontains=query)
+    return queryset.filter(condition).annotate(
+        rank=TrigramWordSimilarity(query, 'title') + SearchRank(F('search_vector'), search_query)
+    ).order_by('-rank', '-created_at')
+
+
+def annotate_list_fields(queryset, user):
+    """
+    Annotate what PostListSerializer would otherwise look up per post:
+    is_liked (for the requesting user). Like/comment counts are columns on Post.
+    """
+    liked = Post.like_users.through.objects.filter(post_id=OuterRef('pk'), user_id=user.id)
+    return queryset.annotate(is_liked=Exists(liked))
+
+
+# List serializers never read the body, the vectors or the tsvector (several KB per row between them),
+# nor the author's recommendation vectors that select_related('author') would pull in.
+LIST_DEFERRED_FIELDS = (
+    'content', 'embedding', 'cf_latent_vector', 'search_vector',
+    'author__preference_vector', 'author__cf_latent_vector',
+)
+
+
+def defer_list_fields(queryset):
+    """Skip LIST_DEFERRED_FIELDS on a select_related('author') queryset serialized as a list."""
+    return queryset.defer(*LIST_DEFERRED_FIELDS)
+
+
+def hydrate_hits(hits, user):
+    """
+    Load the posts behind OpenSearch hits with one posts query,
+    in hit order. Each post gets the hit score as `score`; posts deleted since indexing are dropped.
+    """
+    scores = {int(hit['_id']): hit['_score'] for hit in hits}
+    queryset = annotate_list_fields(defer_list_fields(Post.objects.select_related('author', 'category')), user)
+    posts = queryset.in_bulk(list(scores))
+
+    results = []
+    for post_id, score in scores.items():
+        post = posts.get(post_id)
+        if post is None:
+            continue
+        post.score = score
+        results.append(post)
+    return results
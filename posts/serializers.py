@@ -14,15 +14,25 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ['id', 'content', 'author_username', 'author_profile_image', 'created_at']
+        fields = ['id', 'content', 'author_username', 'author_profile_image', 'created_at', 'parent']
+
+
+class CommentThreadSerializer(CommentSerializer):
+    reply_count = serializers.IntegerField(read_only=True)
+    replies = CommentSerializer(source='reply_previews', many=True, read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['reply_count', 'replies']
 
 
 class PostListSerializer(serializers.ModelSerializer):
+    """
+    Lean feed representation: precomputed preview and thumbnail instead of the body and comments.
+    The full post is PostDetailSerializer.
+    """
     author_username = serializers.CharField(source='author.username', read_only=True)
     author_profile_image = serializers.ImageField(source='author.profile_img', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
-    like_count = serializers.IntegerField(source='like_users.count', read_only=True)
-    comments = CommentSerializer(source='comment_set', many=True, read_only=True)
     is_liked = serializers.SerializerMethodField()
 
     class Meta:
@@ -30,7 +40,8 @@ class PostListSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'title',
-            'content',
+            'preview',
+            'thumbnail_url',
             'author_username',
             'author_profile_image',
             'category',
@@ -39,14 +50,31 @@ class PostListSerializer(serializers.ModelSerializer):
             'is_profane',
             'created_at',
             'like_count',
-            'comments',
+            'comment_count',
             'is_liked',
         ]
 
     def get_is_liked(self, obj):
+        is_liked = getattr(obj, 'is_liked', None)
+        if is_liked is not None:
+            return is_liked
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             # Note: This might hit DB per post. For strict optimization, use Exists subquery in View.
             # But for now, we rely on basic implementation.
             return obj.like_users.filter(id=request.user.id).exists()
         return False
+
+
+class PostDetailSerializer(PostListSerializer):
+    comments = CommentSerializer(source='comment_set', many=True, read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ['content', 'comments']
+
+
+class SemanticSearchResultSerializer(PostListSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ['score']
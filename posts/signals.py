@@ -1,38 +1,43 @@
 import re
 import os
-import requests
+import time
 from io import BytesIO
 from PIL import Image
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import pre_save, post_save, m2m_changed
 from django.dispatch import receiver
 from django.conf import settings
-from .models import Post, Comment, UserInteraction
+from .models import Post, Category, Comment, UserInteraction
 from .utils import async_calculate_user_vector
-from sentence_transformers import SentenceTransformer
 from transformers import BlipProcessor, BlipForConditionalGeneration
-from .opensearch_client import OpenSearchClient
-from .bedrock_client import BedrockClient
+from .opensearch_client import OpenSearchClient, build_post_document, PREVIEW_LENGTH
+from .embeddings import get_embed_model, get_search_embedding, search_embedding_backend
+from .search import build_search_vector, first_image_url, make_preview
+from .popularity import record_interaction
+from .counters import add_to_counter
+from .categories import bump_category_version
+from njjc.http import get_session
+from njjc import metrics
+from njjc.timing import span
+from django_q.signals import pre_enqueue, pre_execute, post_execute, post_execute_in_worker
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+POST_EMBEDDING_SECONDS = metrics.histogram(
+    'post_embedding_seconds', 'Time to embed one saved post, by stage (caption, pgvector, search, index).'
+)
+INTERACTIONS = metrics.counter('interactions_total', 'User interactions recorded, by type.')
+TASKS_ENQUEUED = metrics.counter('django_q_tasks_enqueued_total', 'django-q tasks enqueued, by function.')
+TASK_SECONDS = metrics.histogram('django_q_task_seconds', 'django-q task execution time, by function.')
+TASK_LATENCY_SECONDS = metrics.histogram(
+    'django_q_task_latency_seconds', 'django-q enqueue-to-finish time (queue wait + execution), by function and success.'
+)
+
 # Models will be lazy-loaded to prevent blocking startup
-_embed_model = None
 _caption_processor = None
 _caption_model = None
 
-def get_embed_model():
-    global _embed_model
-    if _embed_model is None:
-        try:
-            logger.info("Loading SentenceTransformer model...")
-            from sentence_transformers import SentenceTransformer
-            _embed_model = SentenceTransformer('jhgan/ko-sroberta-multitask')
-        except Exception as e:
-            logger.error(f"Failed to load SentenceTransformer model: {e}")
-    return _embed_model
-
 def get_caption_models():
     global _caption_processor, _caption_model
     if _caption_model is None or _caption_processor is None:
@@ -52,18 +57,36 @@ def generate_image_caption(image_url):
     
     try:
         # Download image from URL
-        response = requests.get(image_url, timeout=10)
+        response = get_session().get(image_url)
         response.raise_for_status()
         raw_image = Image.open(BytesIO(response.content)).convert('RGB')
         
-        inputs = caption_processor(raw_image, return_tensors="pt")
-        out = caption_model.generate(**inputs)
-        caption = caption_processor.decode(out[0], skip_special_tokens=True)
+        with span('inference'):
+            inputs = caption_processor(raw_image, return_tensors="pt")
+            out = caption_model.generate(**inputs)
+            caption = caption_processor.decode(out[0], skip_special_tokens=True)
         return caption
     except Exception as e:
         logger.error(f"Error generating caption for {image_url}: {e}")
         return ""
 
+@receiver(pre_save, sender=Post)
+def fill_post_list_fields(sender, instance, **kwargs):
+    """
+    Precompute what post lists show instead of the body: plain-text preview and first image.
+    """
+    instance.preview = make_preview(instance.content, PREVIEW_LENGTH)
+    instance.thumbnail_url = first_image_url(instance.content)
+
+@receiver(post_save, sender=Post)
+def update_post_search_vector(sender, instance, **kwargs):
+    """
+    Keep the keyword search tsvector in sync with title/content.
+    """
+    Post.objects.filter(pk=instance.pk).update(
+        search_vector=build_search_vector(instance.title, instance.content)
+    )
+
 @receiver(post_save, sender=Post)
 def handle_post_embedding(sender, instance, created, **kwargs):
     """
@@ -89,7 +112,8 @@ def handle_post_embedding(sender, instance, created, **kwargs):
         # S3: https://{AWS_S3_CUSTOM_DOMAIN}/uuid.png
         if hasattr(settings, 'AWS_S3_CUSTOM_DOMAIN') and settings.AWS_S3_CUSTOM_DOMAIN:
             s3_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{filename}"
-            caption = generate_image_caption(s3_url)
+            with POST_EMBEDDING_SECONDS.time(stage='caption'):
+                caption = generate_image_caption(s3_url)
             if caption:
                 captions.append(caption)
 
@@ -105,55 +129,88 @@ def handle_post_embedding(sender, instance, created, **kwargs):
 
     try:
         # 4. Generate embedding for pgvector (SentenceTransformer)
-        vector = embed_model.encode(combined_text).tolist()
+        with POST_EMBEDDING_SECONDS.time(stage='pgvector'):
+            vector = embed_model.encode(combined_text).tolist()
 
         # 5. Update without triggering signals again
         Post.objects.filter(pk=instance.pk).update(embedding=vector)
         logger.info(f"Generated pgvector embedding for Post {instance.pk}")
 
-        # 6. Index to OpenSearch (using Bedrock)
-        bedrock_client = BedrockClient()
-        os_embedding = bedrock_client.get_embedding(combined_text)
+        # 6. Index to OpenSearch (Bedrock, or the vector above in single-embedding mode)
+        with POST_EMBEDDING_SECONDS.time(stage='search'):
+            os_embedding = get_search_embedding(combined_text, local_vector=vector)
         if os_embedding:
             os_client = OpenSearchClient()
-            doc = {
-                'id': str(instance.id),
-                'title': instance.title,
-                'content': instance.content,
-                'author': instance.author.username if instance.author else 'unknown',
-                'embedding': os_embedding
-            }
-            os_client.index_document('posts', str(instance.id), doc)
+            doc = build_post_document(instance, os_embedding)
+            with POST_EMBEDDING_SECONDS.time(stage='index'):
+                os_client.index_document('posts', str(instance.id), doc)
             logger.info(f"Indexed Post {instance.pk} to OpenSearch")
         else:
-            logger.error(f"Failed to generate Bedrock embedding for Post {instance.pk}")
+            logger.error(f"Failed to generate {search_embedding_backend()} search embedding for Post {instance.pk}")
 
     except Exception as e:
         logger.error(f"Error handling embedding for Post {instance.pk}: {e}")
 
 @receiver(m2m_changed, sender=Post.like_users.through)
-def handle_like_interaction(sender, instance, action, pk_set, **kwargs):
+def handle_like_interaction(sender, instance, action, reverse, pk_set, **kwargs):
     """
     Record an interaction when a user likes/unlikes a post.
+    (user, post) is unique for LIKE interactions, so unlikes delete them by key.
     """
+    # Forward: instance is the post and pk_set are users; reverse (user.like_posts): the other way round
+    if reverse:
+        likes = UserInteraction.objects.filter(interaction_type='LIKE', user_id=instance.pk)
+        pairs = [(instance.pk, post_id) for post_id in pk_set or ()]
+    else:
+        likes = UserInteraction.objects.filter(interaction_type='LIKE', post_id=instance.pk)
+        pairs = [(user_id, instance.pk) for user_id in pk_set or ()]
+
     if action == "post_add":
-        for user_id in pk_set:
+        for user_id, post_id in pairs:
             UserInteraction.objects.create(
                 user_id=user_id,
-                post=instance,
+                post_id=post_id,
                 interaction_type='LIKE',
                 score=5.0
             )
-            async_calculate_user_vector(user_id)
     elif action == "post_remove":
         # Remove interaction if user unlikes
-        for user_id in pk_set:
-            UserInteraction.objects.filter(
-                user_id=user_id,
-                post=instance,
-                interaction_type='LIKE'
-            ).delete()
-            async_calculate_user_vector(user_id)
+        likes.filter(user_id__in={u for u, p in pairs}, post_id__in={p for u, p in pairs}).delete()
+    elif action == "pre_clear":
+        # clear() sends no pk_set
+        pairs = list(likes.values_list('user_id', 'post_id'))
+        likes.delete()
+    else:
+        return
+
+    for user_id in {u for u, p in pairs}:
+        async_calculate_user_vector(user_id)
+
+@receiver(m2m_changed, sender=Post.like_users.through)
+def update_like_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep Post.like_count in sync with F() updates.
+    `add()` reports only the rows it inserted, but `remove()` reports every requested id, liked or not,
+    so removals are counted on pre_remove against the rows that actually exist.
+    """
+    if action == "post_add":
+        if reverse:
+            # user.like_posts.add(...): instance is the user, pk_set are posts
+            add_to_counter('like_count', pk_set, 1)
+        else:
+            add_to_counter('like_count', [instance.pk], len(pk_set))
+    elif action == "pre_remove":
+        if reverse:
+            liked = sender.objects.filter(user_id=instance.pk, post_id__in=pk_set).values_list('post_id', flat=True)
+            add_to_counter('like_count', list(liked), -1)
+        else:
+            removed = sender.objects.filter(post_id=instance.pk, user_id__in=pk_set).count()
+            if removed:
+                add_to_counter('like_count', [instance.pk], -removed)
+    elif action == "pre_clear" and reverse:
+        add_to_counter('like_count', list(instance.like_posts.values_list('pk', flat=True)), -1)
+    elif action == "post_clear" and not reverse:
+        Post.objects.filter(pk=instance.pk).update(like_count=0)
 
 @receiver(post_save, sender=Comment)
 def handle_comment_interaction(sender, instance, created, **kwargs):
@@ -164,12 +221,36 @@ def handle_comment_interaction(sender, instance, created, **kwargs):
         UserInteraction.objects.create(
             user=instance.author,
             post=instance.post,
+            comment=instance,
             interaction_type='COMMENT',
             score=3.0
         )
         async_calculate_user_vector(instance.author_id)
 
+@receiver(post_save, sender=UserInteraction)
+def update_post_popularity(sender, instance, created, **kwargs):
+    """
+    Fold new interactions into the post's popularity rollup.
+    """
+    if created:
+        INTERACTIONS.inc(type=instance.interaction_type)
+        try:
+            record_interaction(instance)
+        except Exception as e:
+            logger.error(f"Error updating popularity for Post {instance.post_id}: {e}")
+
 from django.db.models.signals import post_delete 
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        add_to_counter('comment_count', [instance.post_id], 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    add_to_counter('comment_count', [instance.post_id], -1)
+
+
 @receiver(post_delete, sender=Post)
 def delete_post_from_opensearch(sender, instance, **kwargs):
     try:
@@ -184,43 +265,58 @@ def delete_post_from_opensearch(sender, instance, **kwargs):
 @receiver(post_delete, sender=Comment)
 def handle_comment_deletion(sender, instance, **kwargs):
     """
-    Remove interaction when a comment is deleted.
-    Tries to find the interaction created around the same time.
+    The comment's interaction is removed by the UserInteraction.comment cascade;
+    only the author's preference vector needs refreshing.
     """
-    try:
-        # Define a time window to match the interaction (e.g., +/- 2 seconds)
-        from datetime import timedelta
-        # Ensure instance.created_at is not null
-        if not instance.created_at:
-            return
-
-        time_threshold = timedelta(seconds=5) 
-        min_time = instance.created_at - time_threshold
-        max_time = instance.created_at + time_threshold
-
-        # Find matching interaction
-        # We order by created_at to find the closest one
-        interactions = UserInteraction.objects.filter(
-            user=instance.author,
-            post=instance.post,
-            interaction_type='COMMENT',
-            created_at__range=(min_time, max_time)
+    async_calculate_user_vector(instance.author_id, debounce=True)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_list(sender, **kwargs):
+    bump_category_version()
+
+
+# Task queue metrics (django-q)
+# Execution time is measured in the worker process, enqueue-to-finish latency in the cluster's monitor.
+
+_task_started = {}
+
+
+def _task_func_name(func):
+    if isinstance(func, str):
+        return func
+    return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+
+
+@receiver(pre_enqueue)
+def count_enqueued_task(sender, task, **kwargs):
+    TASKS_ENQUEUED.inc(func=_task_func_name(task.get('func')))
+
+
+@receiver(pre_execute)
+def start_task_timer(sender, func, task, **kwargs):
+    _task_started[task.get('id')] = time.perf_counter()
+
+
+@receiver(post_execute_in_worker)
+def observe_task_time(sender, func, task, **kwargs):
+    started = _task_started.pop(task.get('id'), None)
+    if started is not None:
+        TASK_SECONDS.observe(time.perf_counter() - started, func=_task_func_name(func))
+
+
+@receiver(post_execute)
+def observe_task_latency(sender, task, **kwargs):
+    if task.get('started') and task.get('stopped'):
+        TASK_LATENCY_SECONDS.observe(
+            (task['stopped'] - task['started']).total_seconds(),
+            func=_task_func_name(task.get('func')), success=bool(task.get('success')),
         )
-        
-        # If multiple found, pick the one closest in time
-        closest_interaction = None
-        min_diff = None
-
-        for interaction in interactions:
-            diff = abs((interaction.created_at - instance.created_at).total_seconds())
-            if min_diff is None or diff < min_diff:
-                min_diff = diff
-                closest_interaction = interaction
-
-        if closest_interaction:
-            closest_interaction.delete()
-            async_calculate_user_vector(instance.author.id)
-            logger.info(f"Deleted interaction for Comment {instance.id}")
-            
-    except Exception as e:
-        logger.error(f"Error handling comment deletion for Comment {instance.id}: {e}")
+
+
+@metrics.register_collector
+def task_queue_depth():
+    """Tasks waiting in the ORM broker queue."""
+    from django_q.models import OrmQ
+    return [('django_q_queue_depth', 'gauge', 'Tasks waiting in the django-q ORM broker.', [({}, OrmQ.objects.count())])]
@@ -0,0 +1,253 @@
+import hashlib
+import io
+import json
+import operator
+import random
+import threading
+import time
+
+import numpy as np
+from botocore.exceptions import ClientError
+from django.conf import settings
+
+from .search import ngram_tokens
+
+# Local stand-ins for Bedrock and OpenSearch, selected by settings (BEDROCK_BACKEND='fake',
+# OPENSEARCH_BACKEND='memory'), for benchmarks, load tests and tests without AWS or a cluster.
+# They replace the SDK client under BedrockClient / OpenSearchClient, so the wrappers' own code
+# (retries and backoff, query building, metrics, spans) runs unchanged.
+# - FakeBedrockRuntime: deterministic embeddings, the same text always gets the same vector and
+#   texts sharing words get similar ones. Latency and ThrottlingException rates are injectable.
+# - InMemoryOpenSearch: exact kNN (cosine) over the documents indexed in this process, with the
+#   term/terms/range/ids filters that build_knn_query emits.
+
+HASH_BUCKETS_PER_TOKEN = 4
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+
+
+def hash_embedding(text, dimensions):
+    """
+    Unit vector for `text`: every character bigram adds ±1 to a few hash-chosen dimensions
+    (feature hashing), so the vector is deterministic and overlapping texts point the same way.
+    """
+    vector = np.zeros(dimensions, dtype=np.float64)
+    seeds = np.fromiter((_hash(token) for token in ngram_tokens(text)), dtype=np.uint64)
+    for i in range(HASH_BUCKETS_PER_TOKEN):
+        # 16 bits of the hash per bucket: 15 pick the dimension, 1 the sign
+        buckets = (seeds >> np.uint64(i * 16)) & np.uint64(0xFFFF)
+        signs = np.where(buckets & np.uint64(0x8000), 1.0, -1.0)
+        np.add.at(vector, (buckets & np.uint64(0x7FFF)) % np.uint64(dimensions), signs)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        # No word characters: a pseudo-random vector seeded by the whole text
+        vector = np.random.default_rng(_hash(text or '')).standard_normal(dimensions)
+        norm = np.linalg.norm(vector)
+    return vector / norm
+
+
+class _Injector:
+    """Latency (mean ± 50%) and failure rate, from settings unless given."""
+
+    def __init__(self, latency_ms, failure_rate=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        if self.latency_ms > 0:
+            with self._lock:
+                jitter = self.random.uniform(0.5, 1.5)
+            time.sleep(self.latency_ms * jitter / 1000)
+
+    def fails(self):
+        if self.failure_rate <= 0:
+            return False
+        with self._lock:
+            return self.random.random() < self.failure_rate
+
+
+class FakeBedrockRuntime:
+    """The bedrock-runtime client's invoke_model() for Titan Text Embeddings v2."""
+
+    def __init__(self, latency_ms=None, throttle_rate=None, seed=0):
+        self.injector = _Injector(
+            getattr(settings, 'FAKE_BEDROCK_LATENCY_MS', 0) if latency_ms is None else latency_ms,
+            getattr(settings, 'FAKE_BEDROCK_THROTTLE_RATE', 0) if throttle_rate is None else throttle_rate,
+            seed,
+        )
+        self.calls = 0
+
+    def invoke_model(self, body, modelId, accept='application/json', contentType='application/json'):
+        self.calls += 1
+        self.injector.delay()
+        if self.injector.fails():
+            raise ClientError(
+                {'Error': {'Code': 'ThrottlingException', 'Message': 'Too many requests, please wait before trying again.'}},
+                'InvokeModel',
+            )
+        request = json.loads(body)
+        text = request['inputText']
+        embedding = hash_embedding(text, request.get('dimensions', 1024))
+        payload = {'embedding': embedding.tolist(), 'inputTextTokenCount': len(text.split())}
+        return {'body': io.BytesIO(json.dumps(payload).encode()), 'contentType': 'application/json'}
+
+
+class _Index:
+    def __init__(self, dimension=None):
+        self.dimension = dimension
+        self.documents = {}  # id -> _source
+        self.vectors = {}    # id -> unit vector
+        self._matrix = None  # (ids, matrix), rebuilt after writes
+
+    def matrix(self):
+        if self._matrix is None:
+            ids = list(self.vectors)
+            matrix = np.array([self.vectors[i] for i in ids], dtype=np.float32).reshape(len(ids), -1)
+            self._matrix = (ids, matrix)
+        return self._matrix
+
+
+class _Indices:
+    def __init__(self, store):
+        self.store = store
+
+    def exists(self, index):
+        return index in self.store.indexes
+
+    def create(self, index, body=None):
+        mapping = ((body or {}).get('mappings') or {}).get('properties', {}).get('embedding', {})
+        with self.store.lock:
+            self.store.indexes.setdefault(index, _Index(mapping.get('dimension')))
+        return {'acknowledged': True, 'index': index}
+
+    def delete(self, index, ignore=None):
+        with self.store.lock:
+            self.store.indexes.pop(index, None)
+        return {'acknowledged': True}
+
+
+class InMemoryOpenSearch:
+    """
+    The part of the opensearch-py client that OpenSearchClient and the signals use.
+    loader(client), if given, runs once before the first search so that every process
+    (e.g. each server worker) can fill its own copy.
+    """
+    in_memory = True
+
+    def __init__(self, latency_ms=None, loader=None):
+        self.injector = _Injector(getattr(settings, 'FAKE_OPENSEARCH_LATENCY_MS', 0) if latency_ms is None else latency_ms)
+        self.indexes = {}
+        self.lock = threading.Lock()
+        self.indices = _Indices(self)
+        self._loader = loader
+        self._load_lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._loader is None:
+            return
+        with self._load_lock:
+            loader, self._loader = self._loader, None
+            if loader is not None:
+                loader(self)
+
+    def index(self, index, id, body, refresh=False):
+        self.injector.delay()
+        return self.put(index, id, body)
+
+    def put(self, index, id, body):
+        """index() without the injected latency (bulk loading)."""
+        with self.lock:
+            target = self.indexes.setdefault(index, _Index())
+            source = dict(body)
+            vector = np.asarray(source.pop('embedding'), dtype=np.float32)
+            if target.dimension and len(vector) != target.dimension:
+                raise ValueError(f"Vector dimension mismatch: expected {target.dimension}, got {len(vector)}")
+            norm = np.linalg.norm(vector)
+            target.vectors[str(id)] = vector / norm if norm else vector
+            target.documents[str(id)] = source
+            target._matrix = None
+        return {'_id': str(id), 'result': 'created'}
+
+    def delete(self, index, id, ignore=None):
+        with self.lock:
+            target = self.indexes.get(index)
+            if target is None or str(id) not in target.documents:
+                return {'result': 'not_found'}
+            del target.documents[str(id)], target.vectors[str(id)]
+            target._matrix = None
+        return {'result': 'deleted'}
+
+    def search(self, index, body):
+        self._ensure_loaded()
+        self.injector.delay()
+        with self.lock:
+            target = self.indexes.get(index)
+            ids, matrix = target.matrix() if target else ([], None)
+            documents = target.documents if target else {}
+        knn = body['query']['knn']['embedding']
+        offset, size = body.get('from', 0), body.get('size', 10)
+        hits = []
+        if ids:
+            query = np.asarray(knn['vector'], dtype=np.float32)
+            query /= np.linalg.norm(query) or 1.0
+            # Lucene cosinesimil scores are (1 + cosine) / 2
+            scores = (1.0 + matrix @ query) / 2.0
+            wanted = min(knn['k'], offset + size)
+            # Documents deleted since the matrix was built are skipped
+            accept = lambda i: ids[i] in documents and _matches(ids[i], documents[ids[i]], knn.get('filter'))
+            for i in self._ranked(scores, wanted, accept):
+                hits.append(self._hit(index, ids[i], float(scores[i]), documents[ids[i]], body.get('_source')))
+        hits = hits[offset:offset + size]
+        return {'hits': {'total': {'value': len(hits), 'relation': 'eq'}, 'hits': hits}}
+
+    @staticmethod
+    def _ranked(scores, wanted, accept):
+        """Indices of the best `wanted` accepted scores, best first; sorts only a shortlist unless filters reject most of it."""
+        shortlist = min(len(scores), max(wanted * 4, 64))
+        order = np.argpartition(-scores, shortlist - 1)[:shortlist] if shortlist < len(scores) else np.arange(len(scores))
+        order = order[np.argsort(-scores[order], kind='stable')]
+        found = [i for i in order if accept(i)][:wanted]
+        if len(found) < wanted and shortlist < len(scores):
+            order = np.argsort(-scores, kind='stable')
+            found = [i for i in order if accept(i)][:wanted]
+        return found
+
+    @staticmethod
+    def _hit(index, doc_id, score, document, source):
+        hit = {'_index': index, '_id': doc_id, '_score': score}
+        if source is not False:
+            hit['_source'] = document if source is None else {k: v for k, v in document.items() if k in source}
+        return hit
+
+
+def _matches(doc_id, document, query):
+    """Evaluate the bool/term/terms/range/ids subset of the query DSL used by build_filter."""
+    if not query:
+        return True
+    if 'bool' in query:
+        clauses = query['bool']
+        return (
+            all(_matches(doc_id, document, clause) for clause in clauses.get('filter', []))
+            and all(_matches(doc_id, document, clause) for clause in clauses.get('must', []))
+            and not any(_matches(doc_id, document, clause) for clause in clauses.get('must_not', []))
+        )
+    if 'term' in query:
+        (field, value), = query['term'].items()
+        return document.get(field) == value
+    if 'terms' in query:
+        (field, values), = query['terms'].items()
+        return document.get(field) in values
+    if 'ids' in query:
+        return doc_id in query['ids']['values']
+    if 'range' in query:
+        (field, bounds), = query['range'].items()
+        value = document.get(field)
+        if value is None:
+            return False
+        checks = {'gt': operator.gt, 'gte': operator.ge, 'lt': operator.lt, 'lte': operator.le}
+        return all(checks[op](value, bound) for op, bound in bounds.items())
+    raise ValueError(f"Unsupported query clause: {query}")
@@ -1,6 +1,39 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.contrib.auth import get_user_model
-from .models import Post, Category, UserInteraction
+from .models import Post, Category, Comment, UserInteraction, Report, PostPopularity
+from .views import RecommendedPostListView
+from .serializers import PostListSerializer
+from .ranking import get_ranking_weights, mmr_indices, rank_candidates
+from .search import hydrate_hits, keyword_search, ngram_tokens
+from .bedrock_client import BedrockClient
+from .opensearch_client import OpenSearchClient, build_filter, load_posts
+from .stand_ins import FakeBedrockRuntime
+from .vector_index import LocalVectorIndex
+from .embeddings import get_search_embedding, search_embedding_dimension
+from . import likes, popularity
+from .counters import reconcile
+from .evaluation import build_holdout, evaluate, ndcg_at_k, recall_at_k
+from njjc.aio import run_blocking, run_orm
+from njjc.db_routers import PrimaryPinningMiddleware, ReplicaRouter, replica_reads
+from njjc import metrics
+from njjc.http import build_session
+from njjc.timing import span
+from njjc.postgres.base import CheckoutStats
+from requests import Response
+from requests.adapters import HTTPAdapter
 
 User = get_user_model()
 
@@ -36,3 +69,978 @@ class SignalTests(TestCase):
             post=self.post, 
             interaction_type='LIKE'
         ).count(), 0)
+
+    def test_comment_interaction_is_deleted_with_its_comment(self):
+        first = Comment.objects.create(post=self.post, author=self.user, content='first')
+        second = Comment.objects.create(post=self.post, author=self.user, content='second')
+        self.assertEqual(UserInteraction.objects.get(comment=first).interaction_type, 'COMMENT')
+
+        first.delete()
+        self.assertEqual(list(UserInteraction.objects.filter(interaction_type='COMMENT').values_list('comment', flat=True)), [second.id])
+
+    def test_legacy_comment_interactions_are_linked_one_to_one(self):
+        from datetime import timedelta
+        from importlib import import_module
+        from django.db import connection
+        from django.utils import timezone
+        # Backfill in 0012: three unlinked COMMENT interactions, all closest in time to the first of two comments
+        start = timezone.now() - timedelta(days=1)
+        comments = [Comment.objects.create(post=self.post, author=self.user, content=str(i)) for i in range(2)]
+        Comment.objects.filter(pk=comments[1].pk).update(created_at=start + timedelta(minutes=10))
+        Comment.objects.filter(pk=comments[0].pk).update(created_at=start)
+        UserInteraction.objects.filter(interaction_type='COMMENT').delete()
+        interactions = [
+            UserInteraction.objects.create(user=self.user, post=self.post, interaction_type='COMMENT', score=3.0)
+            for _ in range(3)
+        ]
+        for i, interaction in enumerate(interactions):
+            UserInteraction.objects.filter(pk=interaction.pk).update(created_at=start + timedelta(seconds=i))
+
+        backfill = import_module('posts.migrations.0012_userinteraction_comment').Migration.operations[1]
+        with connection.cursor() as cursor:
+            cursor.execute(backfill.sql)
+        linked = UserInteraction.objects.filter(interaction_type='COMMENT').order_by('created_at').values_list('comment', flat=True)
+        self.assertEqual(list(linked), [comments[0].id, comments[1].id, None])
+
+    def test_clear_and_relike(self):
+        self.user.like_posts.add(self.post)
+        self.post.like_users.clear()
+        self.assertFalse(UserInteraction.objects.filter(interaction_type='LIKE').exists())
+        self.post.like_users.add(self.user)
+        self.assertEqual(UserInteraction.objects.filter(interaction_type='LIKE').count(), 1)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='counter', password='password')
+        self.other = User.objects.create_user(username='counter2', password='password')
+        self.category = Category.objects.create(id='counter_cat', name='Counter Category')
+        self.post = Post.objects.create(author=self.user, category=self.category, title='t', content='c')
+
+    def _counts(self):
+        self.post.refresh_from_db(fields=['like_count', 'comment_count'])
+        return self.post.like_count, self.post.comment_count
+
+    def test_like_and_comment_signals_update_counters(self):
+        self.post.like_users.add(self.user, self.other)
+        self.other.like_posts.remove(self.post)
+        comment = Comment.objects.create(post=self.post, author=self.user, content='hi')
+        Comment.objects.create(post=self.post, author=self.other, content='hello')
+        self.assertEqual(self._counts(), (1, 2))
+
+        comment.delete()
+        self.post.like_users.clear()
+        self.assertEqual(self._counts(), (0, 1))
+
+    def test_removing_a_like_that_does_not_exist_keeps_the_count(self):
+        self.post.like_users.add(self.user)
+        self.post.like_users.remove(self.user, self.other)
+        self.assertEqual(self._counts(), (0, 0))
+
+        self.post.like_users.add(self.user, self.other)
+        self.post.like_users.remove(self.other)
+        self.post.like_users.remove(self.other)
+        self.assertEqual(self._counts(), (1, 0))
+        other_post = Post.objects.create(author=self.user, category=self.category, title='t2', content='c')
+        self.user.like_posts.remove(self.post, other_post)
+        self.assertEqual(self._counts(), (0, 0))
+        self.assertEqual(reconcile(), {'like_count': 0, 'comment_count': 0})
+
+    def test_reconcile_fixes_drift(self):
+        self.post.like_users.add(self.user)
+        Post.objects.filter(pk=self.post.pk).update(like_count=7, comment_count=3)
+        self.assertEqual(reconcile(), {'like_count': 1, 'comment_count': 1})
+        self.assertEqual(self._counts(), (1, 0))
+        self.assertEqual(reconcile(), {'like_count': 0, 'comment_count': 0})
+
+
+class LikeToggleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='liker', password='password')
+        self.category = Category.objects.create(id='like_cat', name='Like Category')
+        self.post = Post.objects.create(author=self.user, category=self.category, title='t', content='c')
+        self.buffer = likes.LikeCounterBuffer(interval=60)
+        patcher = mock.patch.object(likes, '_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_toggle_buffers_counter_until_flush(self):
+        # The counter delta is buffered on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(likes.toggle_like(self.user.id, self.post.id), (True, 1))
+        self.assertEqual(self.buffer.pending(self.post.id), 1)
+        self.assertTrue(self.post.like_users.filter(pk=self.user.pk).exists())
+        self.assertTrue(UserInteraction.objects.filter(user=self.user, post=self.post, interaction_type='LIKE').exists())
+        self.post.refresh_from_db(fields=['like_count'])
+        self.assertEqual(self.post.like_count, 0)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.post.refresh_from_db(fields=['like_count'])
+        self.assertEqual(self.post.like_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(likes.toggle_like(self.user.id, self.post.id), (False, 0))
+        self.buffer.flush()
+        self.post.refresh_from_db(fields=['like_count'])
+        self.assertEqual(self.post.like_count, 0)
+        self.assertFalse(UserInteraction.objects.filter(user=self.user, post=self.post, interaction_type='LIKE').exists())
+
+    def test_count_includes_toggle_inside_enclosing_transaction(self):
+        # The buffer add waits for the outer commit, but the returned count already has the toggle
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.assertEqual(likes.toggle_like(self.user.id, self.post.id), (True, 1))
+                self.assertEqual(self.buffer.pending(self.post.id), 0)
+        self.assertEqual(self.buffer.pending(self.post.id), 1)
+
+    def test_user_vector_debounce_is_trailing_edge(self):
+        from django.core.cache import cache
+        from posts import utils
+        self.addCleanup(cache.clear)
+        with mock.patch.object(utils, 'cache_is_shared', return_value=True), \
+                mock.patch.object(utils, 'schedule') as schedule:
+            # A burst of changes schedules one delayed recompute
+            utils.async_calculate_user_vector(self.user.id, debounce=True)
+            utils.async_calculate_user_vector(self.user.id, debounce=True)
+            self.assertEqual(schedule.call_count, 1)
+
+            # A change while the task runs schedules another run after it
+            dirty_again = lambda user_id: utils.async_calculate_user_vector(user_id, debounce=True)
+            with mock.patch.object(utils, 'calculate_user_vector', side_effect=dirty_again):
+                utils.debounced_calculate_user_vector(self.user.id)
+            self.assertEqual(schedule.call_count, 2)
+
+            # A quiet run releases the user, so the next change schedules again
+            with mock.patch.object(utils, 'calculate_user_vector') as calculate:
+                utils.debounced_calculate_user_vector(self.user.id)
+            calculate.assert_called_once_with(self.user.id)
+            self.assertEqual(schedule.call_count, 2)
+            utils.async_calculate_user_vector(self.user.id, debounce=True)
+            self.assertEqual(schedule.call_count, 3)
+
+    def test_user_vector_debounce_needs_shared_cache(self):
+        from posts import utils
+        with mock.patch.object(utils, 'async_task') as async_task, mock.patch.object(utils, 'schedule') as schedule:
+            utils.async_calculate_user_vector(self.user.id, debounce=True)
+            utils.async_calculate_user_vector(self.user.id, debounce=True)
+        self.assertEqual(async_task.call_count, 2)
+        schedule.assert_not_called()
+
+    def test_deltas_are_merged_per_post(self):
+        other = Post.objects.create(author=self.user, category=self.category, title='t2', content='c')
+        for post_id, delta in [(self.post.id, 1), (self.post.id, 1), (other.id, 1), (other.id, -1)]:
+            self.buffer.add(post_id, delta)
+        self.assertEqual(self.buffer.pending(self.post.id), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 1)
+        self.post.refresh_from_db(fields=['like_count'])
+        self.assertEqual(self.post.like_count, 2)
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create_user(username='commenter', password='password')
+        self.category = Category.objects.create(id='comment_cat', name='Comment Category')
+        self.post = Post.objects.create(author=self.user, category=self.category, title='t', content='c')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.threads = [Comment.objects.create(post=self.post, author=self.user, content=f'top {i}') for i in range(3)]
+        for i in range(5):
+            Comment.objects.create(post=self.post, author=self.user, content=f'reply {i}', parent=self.threads[0])
+
+    def test_threads_page_with_reply_previews_in_fixed_queries(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/posts/{self.post.id}/comments/', {'page_size': 2, 'replies': 2})
+        data = response.json()
+        self.assertEqual(data['count'], 8)
+        self.assertEqual([c['content'] for c in data['comments']], ['top 0', 'top 1'])
+        self.assertEqual(data['comments'][0]['reply_count'], 5)
+        self.assertEqual([r['content'] for r in data['comments'][0]['replies']], ['reply 0', 'reply 1'])
+        self.assertEqual(data['comments'][1]['replies'], [])
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual([c['content'] for c in data['comments']], ['top 2'])
+        self.assertIsNone(data['next'])
+
+    def test_reply_to_reply_joins_the_thread(self):
+        reply = self.threads[0].comment_set.first()
+        response = self.client.post(f'/posts/{self.post.id}/comments/', {'content': 'nested', 'parent': reply.id})
+        self.assertEqual(response.json()['parent'], self.threads[0].id)
+
+        data = self.client.get(f'/posts/comments/{self.threads[0].id}/replies/', {'page_size': 10}).json()
+        self.assertEqual(len(data['results']), 6)
+
+    def test_non_integer_parent_is_rejected(self):
+        response = self.client.post(f'/posts/{self.post.id}/comments/', {'content': 'x', 'parent': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CategoryListCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        Category.objects.create(id='b_cat', name='B')
+        Category.objects.create(id='a_cat', name='A')
+
+    def test_cached_list_etag_and_invalidation(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/posts/categories/')
+        self.assertEqual([c['name'] for c in response.json()], ['A', 'B'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/posts/categories/').json(), response.json())
+            not_modified = self.client.get('/posts/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        Category.objects.create(id='c_cat', name='C')
+        response = self.client.get('/posts/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CATEGORY_VERSION_SECONDS=1)
+    def test_list_converges_without_a_bump(self):
+        from posts.categories import bump_category_version
+        bump_category_version()
+        self.assertEqual(len(self.client.get('/posts/categories/').json()), 2)
+        # Written without a bump visible here (e.g. another process with its own per-process cache)
+        Category.objects.bulk_create([Category(id='c_cat', name='C')])
+        self.assertEqual(len(self.client.get('/posts/categories/').json()), 2)
+        time.sleep(1.1)
+        self.assertEqual(len(self.client.get('/posts/categories/').json()), 3)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create_user(username='revisitor', password='password')
+        self.category = Category.objects.create(id='etag_cat', name='ETag Category')
+        self.post = Post.objects.create(author=self.user, category=self.category, title='t', content='c')
+        Post.objects.filter(pk=self.post.pk).update(embedding=[1.0] + [0.0] * 767)
+        Comment.objects.create(post=self.post, author=self.user, content='hi')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_post_detail_not_modified(self):
+        url = f'/posts/detail/{self.post.id}/'
+        response = self.client.get(url)
+        self.assertEqual((response.json()['content'], len(response.json()['comments'])), ('c', 1))
+        etag = response['ETag']
+        with self.assertNumQueries(2):  # post + comments digest
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.post.like_users.add(self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_liked'])
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_detail_etag_covers_comments(self):
+        url = f'/posts/detail/{self.post.id}/'
+        etag = self.client.get(url)['ETag']
+        # One comment replaced by another: same comment_count, different comments
+        Comment.objects.filter(post=self.post).delete()
+        Comment.objects.create(post=self.post, author=self.user, content='new')
+        Post.objects.filter(pk=self.post.pk).update(comment_count=1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['content'] for c in response.json()['comments']], ['new'])
+
+        # Commenter renamed
+        etag = response['ETag']
+        User.objects.filter(pk=self.user.pk).update(username='renamed')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments'][0]['author_username'], 'renamed')
+
+    def test_feed_page_not_modified_until_a_post_changes(self):
+        response = self.client.get('/posts/')
+        self.assertEqual(response.json()['results'][0]['comment_count'], 1)
+        etag = response['ETag']
+        with self.assertNumQueries(2):  # count + page
+            self.assertEqual(self.client.get('/posts/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.post.title = 'edited'
+        self.post.save()
+        self.assertEqual(self.client.get('/posts/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_feed_page_etag_covers_author_and_category(self):
+        etag = self.client.get('/posts/')['ETag']
+        Category.objects.filter(pk=self.category.pk).update(name='Renamed Category')
+        response = self.client.get('/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['category_name'], 'Renamed Category')
+
+        etag = response['ETag']
+        User.objects.filter(pk=self.user.pk).update(profile_img='profile_images/new.png')
+        with self.assertNumQueries(2):  # still count + page: author and category come with the page
+            self.assertEqual(self.client.get('/posts/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class LeanListTests(TestCase):
+    def test_preview_and_thumbnail_are_stored_on_save(self):
+        user = User.objects.create_user(username='lean', password='password')
+        category = Category.objects.create(id='lean_cat', name='Lean Category')
+        post = Post.objects.create(
+            author=user, category=category, title='t',
+            content='![cat](/media/cat.png)\n  우리집 고양이 ' + 'x' * 300 + ' ![dog](/media/dog.png)',
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_url, '/media/cat.png')
+        self.assertTrue(post.preview.startswith('우리집 고양이'))
+        self.assertEqual(len(post.preview), 200)
+
+        data = PostListSerializer(Post.objects.annotate(is_liked=Value(False)).get(pk=post.pk)).data
+        self.assertNotIn('content', data)
+        self.assertNotIn('comments', data)
+        self.assertEqual(data['thumbnail_url'], '/media/cat.png')
+
+    def test_list_queries_skip_heavy_columns(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIClient
+        user = User.objects.create_user(username='lean_reader', password='password')
+        category = Category.objects.create(id='lean_cat', name='Lean Category')
+        post = Post.objects.create(author=user, category=category, title='t', content='c')
+        Post.objects.filter(pk=post.pk).update(embedding=[1.0] + [0.0] * 767)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/posts/')
+        self.assertEqual([p['id'] for p in response.json()['results']], [post.id])
+        select = next(q['sql'] for q in queries.captured_queries if 'FROM "posts_post"' in q['sql'] and 'COUNT' not in q['sql'])
+        columns = select.split(' FROM ')[0]
+        for column in ('"posts_post"."content"', '"posts_post"."embedding"', 'search_vector', 'preference_vector', 'cf_latent_vector'):
+            self.assertNotIn(column, columns)
+
+    def test_orjson_renderer_matches_stock_output(self):
+        import json
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from njjc.renderers import ORJSONRenderer
+        data = {'title': '고양이', 'score': Decimal('1.5'), 'items': [1, None, True], 'nested': {'a': 0.25}}
+        expected = JSONRenderer().render(data)
+        # The stock renderer must not be the one producing the output
+        with mock.patch.object(JSONRenderer, 'render', side_effect=AssertionError('stock renderer used')):
+            rendered = ORJSONRenderer().render(data)
+        self.assertEqual(rendered, expected)
+        self.assertEqual(json.loads(rendered), json.loads(expected))
+        self.assertIn('고양이'.encode(), rendered)
+
+
+class KeywordSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='searcher', password='password')
+        self.category = Category.objects.create(id='search_cat', name='Search Category')
+        self.cat_post = Post.objects.create(
+            author=self.user,
+            category=self.category,
+            title='우리집 고양이가 귀여워요',
+            content='오늘 찍은 사진입니다 ![](/media/cat.png)'
+        )
+        self.body_post = Post.objects.create(
+            author=self.user,
+            category=self.category,
+            title='일상',
+            content='산책하다가 길고양이를 만났어요'
+        )
+
+    def test_ngram_tokens(self):
+        self.assertEqual(ngram_tokens('고양이가 a'), ['고양', '양이', '이가', 'a'])
+
+    def test_title_match_ranks_above_content_match(self):
+        results = list(keyword_search(Post.objects.all(), '고양이').values_list('id', flat=True))
+        self.assertEqual(results, [self.cat_post.id, self.body_post.id])
+
+    def test_short_korean_query(self):
+        queryset = keyword_search(Post.objects.all(), '산책')
+        self.assertEqual(list(queryset.values_list('id', flat=True)), [self.body_post.id])
+        # No trigram ILIKE branch for queries pg_trgm can't index
+        self.assertNotIn('LIKE', str(queryset.query))
+        self.assertIn('LIKE', str(keyword_search(Post.objects.all(), '고양이').query))
+
+    def test_image_markup_is_not_indexed(self):
+        self.assertFalse(keyword_search(Post.objects.all(), 'media').exists())
+
+
+class OpenSearchFilterTests(SimpleTestCase):
+    def test_no_filter(self):
+        self.assertIsNone(build_filter())
+
+    def test_filters_and_exclusions(self):
+        self.assertEqual(
+            build_filter(
+                {'is_nsfw': False, 'category': ['a', 'b'], 'created_at': {'gte': '2025-01-01'}},
+                exclude_ids={7},
+            ),
+            {'bool': {
+                'filter': [
+                    {'term': {'is_nsfw': False}},
+                    {'terms': {'category': ['a', 'b']}},
+                    {'range': {'created_at': {'gte': '2025-01-01'}}},
+                ],
+                'must_not': [{'ids': {'values': ['7']}}],
+            }}
+        )
+
+
+class HydrateHitsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='hydrator', password='password')
+        self.category = Category.objects.create(id='hydrate_cat', name='Hydrate Category')
+        self.posts = [
+            Post.objects.create(author=self.user, category=self.category, title=f'Post {i}', content='body')
+            for i in range(3)
+        ]
+        self.posts[2].like_users.add(self.user)
+
+    def test_keeps_hit_order_and_drops_missing_posts(self):
+        hits = [
+            {'_id': str(self.posts[2].id), '_score': 0.9},
+            {'_id': '999999', '_score': 0.8},
+            {'_id': str(self.posts[0].id), '_score': 0.7},
+        ]
+        with self.assertNumQueries(1):
+            posts = hydrate_hits(hits, self.user)
+
+        self.assertEqual([p.id for p in posts], [self.posts[2].id, self.posts[0].id])
+        self.assertEqual([p.score for p in posts], [0.9, 0.7])
+        self.assertEqual([(p.like_count, p.is_liked) for p in posts], [(1, True), (0, False)])
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        from rest_framework_simplejwt.tokens import RefreshToken
+        self.user = User.objects.create_user(username='async_user', password='password')
+        self.category = Category.objects.create(id='async_cat', name='Async Category')
+        self.posts = [
+            Post.objects.create(author=self.user, category=self.category, title=f'Post {i}', content='body')
+            for i in range(2)
+        ]
+        self.auth = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    async def test_semantic_search(self):
+        hits = [{'_id': str(self.posts[1].id), '_score': 0.9}, {'_id': str(self.posts[0].id), '_score': 0.5}]
+        with mock.patch('posts.views.get_search_embedding', return_value=[0.1, 0.2]), \
+                mock.patch.object(OpenSearchClient, 'asearch_posts', mock.AsyncMock(return_value=hits)) as search:
+            response = await self.async_client.get(
+                '/posts/search/semantic/', {'q': '검색', 'page_size': 1}, headers={'Authorization': self.auth}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([r['id'] for r in data['results']], [self.posts[1].id])
+        self.assertIn('page=2', data['next'])
+        self.assertEqual(search.call_args.kwargs['size'], 2)
+
+    async def test_requires_valid_token(self):
+        response = await self.async_client.get('/posts/search/semantic/', {'q': 'x'})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            '/posts/search/semantic/', {'q': 'x'}, headers={'Authorization': 'Bearer broken'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_similar_posts_missing_post(self):
+        response = await self.async_client.get('/posts/999999/similar/', headers={'Authorization': self.auth})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_blocking_calls_overlap(self):
+        started = time.perf_counter()
+        await asyncio.gather(*(run_blocking(time.sleep, 0.2) for _ in range(8)))
+        self.assertLess(time.perf_counter() - started, 0.2 * 8 / 2)
+
+    async def test_run_orm_releases_connection_outside_transactions(self):
+        idle, in_transaction = mock.Mock(in_atomic_block=False), mock.Mock(in_atomic_block=True)
+        with mock.patch('njjc.aio.connections.all', return_value=[idle, in_transaction]):
+            self.assertEqual(await run_orm(lambda: 'done'), 'done')
+        idle.close_if_unusable_or_obsolete.assert_called_once_with()
+        in_transaction.close_if_unusable_or_obsolete.assert_not_called()
+
+
+class StandInTests(TestCase):
+    def setUp(self):
+        for client_class in (BedrockClient, OpenSearchClient):
+            self.addCleanup(setattr, client_class, '_instance', client_class._instance)
+            client_class._instance = None
+
+    @override_settings(BEDROCK_BACKEND='fake')
+    def test_fake_bedrock_is_deterministic_and_similarity_preserving(self):
+        client = BedrockClient()
+        cat = client.get_embedding('고양이 사진 모음')
+        self.assertEqual(len(cat), 1024)
+        self.assertEqual(cat, client.get_embedding('고양이 사진 모음'))
+        similar = np.dot(cat, client.get_embedding('귀여운 고양이 사진'))
+        unrelated = np.dot(cat, client.get_embedding('주말 등산 코스 추천'))
+        self.assertGreater(similar, unrelated)
+
+    @override_settings(BEDROCK_BACKEND='fake')
+    def test_fake_bedrock_throttling_and_latency(self):
+        client = BedrockClient()
+        with mock.patch.object(BedrockClient, 'retry_base_delay', 0):
+            client.client = FakeBedrockRuntime(throttle_rate=1.0)
+            self.assertIsNone(client.get_embedding('항상 제한'))
+            self.assertEqual(client.client.calls, BedrockClient.max_retries)
+
+            client.client = FakeBedrockRuntime(throttle_rate=0.5, seed=3)
+            results = [client.get_embedding(f'재시도 {i}') for i in range(10)]
+            self.assertTrue(all(results))
+            self.assertGreater(client.client.calls, 10)
+        self.assertRegex(metrics.render(), r'bedrock_requests_total\{result="throttled"\} \d+')
+
+        client.client = FakeBedrockRuntime(latency_ms=30)
+        started = time.perf_counter()
+        client.get_embedding('느린 응답')
+        self.assertGreaterEqual(time.perf_counter() - started, 0.015)
+
+    @override_settings(OPENSEARCH_BACKEND='memory', SEARCH_EMBEDDING_BACKEND='bedrock')
+    def test_in_memory_knn_filters_and_pages(self):
+        client = OpenSearchClient()
+        client.create_index_if_not_exists('posts')
+        for doc_id, vector, category in [(1, [1, 0], 'a'), (2, [0.9, 0.1], 'b'), (3, [0, 1], 'a'), (4, [0.8, 0.2], 'a')]:
+            client.client.put('posts', str(doc_id), {'id': str(doc_id), 'category': category, 'embedding': vector + [0] * 1022})
+        query = [1, 0] + [0] * 1022
+
+        hits = client.search_posts(query, size=3, source=False)
+        self.assertEqual([h['_id'] for h in hits], ['1', '2', '4'])
+        self.assertNotIn('_source', hits[0])
+        self.assertAlmostEqual(hits[0]['_score'], 1.0)
+        hits = client.search_posts(query, size=2, filters={'category': 'a'}, exclude_ids={1})
+        self.assertEqual([h['_id'] for h in hits], ['4', '3'])
+        self.assertEqual(hits[0]['_source'], {'id': '4', 'category': 'a'})
+        self.assertEqual([h['_id'] for h in client.search_posts(query, size=2, offset=2)], ['4', '3'])
+        self.assertEqual([h['_id'] for h in asyncio.run(client.asearch_posts(query, size=1))], ['1'])
+
+    @override_settings(BEDROCK_BACKEND='fake', OPENSEARCH_BACKEND='memory', SEARCH_EMBEDDING_BACKEND='bedrock')
+    def test_semantic_search_view_end_to_end(self):
+        from rest_framework_simplejwt.tokens import RefreshToken
+        user = User.objects.create_user(username='stand_in_user', password='password')
+        category = Category.objects.create(id='stand_in_cat', name='Stand-in Category')
+        cat = Post.objects.create(author=user, category=category, title='고양이 사진', content='창가에서 자는 고양이')
+        Post.objects.create(author=user, category=category, title='등산 코스', content='주말에 가기 좋은 산')
+        load_posts(OpenSearchClient().client)
+
+        response = self.client.get(
+            '/posts/search/semantic/', {'q': '고양이'},
+            headers={'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['id'], cat.id)
+
+
+class HttpSessionTests(SimpleTestCase):
+    def test_pooled_session_defaults(self):
+        session = build_session()
+        adapter = session.get_adapter('https://example.com')
+        self.assertEqual(adapter._pool_maxsize, 20)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertNotIn('POST', adapter.max_retries.allowed_methods)
+
+        def send(request, **kwargs):
+            response = Response()
+            response.status_code, response.request, response.url = 200, request, request.url
+            return response
+
+        with mock.patch.object(HTTPAdapter, 'send', side_effect=send) as send:
+            session.get('https://example.com/a.png')
+            session.get('https://example.com/b.png', timeout=1)
+        self.assertEqual(send.call_args_list[0].kwargs['timeout'], (3.05, 10.0))
+        self.assertEqual(send.call_args_list[1].kwargs['timeout'], 1)
+
+
+class DatabaseConnectionTests(TestCase):
+    def test_db_health_reports_connection_stats(self):
+        response = self.client.get('/health/db/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['status'], 'OK')
+        self.assertTrue(data['health_checks'])
+        # Web processes check connections out of the driver pool by default
+        self.assertEqual(data['pool']['max_size'], settings.DB_POOL_MAX_SIZE)
+        self.assertEqual(data['conn_max_age'], 0)
+        self.assertGreaterEqual(data['checkouts'], 1)
+
+    def test_checkout_stats(self):
+        stats = CheckoutStats()
+        stats.record(2.0)
+        stats.record(4.0)
+        self.assertEqual(
+            stats.snapshot(),
+            {'checkouts': 2, 'checkout_errors': 0, 'checkout_avg_ms': 3.0, 'checkout_max_ms': 4.0},
+        )
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        patcher = mock.patch('njjc.db_routers.replica_aliases', return_value=['replica_1'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_use_replica_only_inside_replica_reads(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica_1')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_request_that_writes_reads_primary_and_pins_user(self):
+        from django.core.cache import cache
+        from django.test import RequestFactory
+        from rest_framework_simplejwt.tokens import RefreshToken
+        self.addCleanup(cache.clear)
+        user = User.objects.create_user(username='pinned', password='password')
+        token = RefreshToken.for_user(user).access_token
+        request = RequestFactory().post('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        seen = []
+
+        def write_view(request):
+            with replica_reads():
+                seen.append(self.router.db_for_read(Post))
+                self.router.db_for_write(UserInteraction)
+                seen.append(self.router.db_for_read(Post))
+
+        def read_view(request):
+            with replica_reads():
+                seen.append(self.router.db_for_read(Post))
+
+        # The test cache is LocMem, which is shared here because everything runs in one process
+        with mock.patch('njjc.db_routers.cache_is_shared', return_value=True):
+            PrimaryPinningMiddleware(write_view)(request)
+            # The user's next request is pinned to the primary; other users still read the replica
+            PrimaryPinningMiddleware(read_view)(request)
+            PrimaryPinningMiddleware(read_view)(RequestFactory().get('/'))
+        self.assertEqual(seen, ['replica_1', 'default', 'default', 'replica_1'])
+
+    def test_pinning_requires_shared_cache(self):
+        from django.core.exceptions import ImproperlyConfigured
+        with self.assertRaises(ImproperlyConfigured):
+            PrimaryPinningMiddleware(lambda request: None)
+        with mock.patch('njjc.db_routers.replica_aliases', return_value=[]):
+            PrimaryPinningMiddleware(lambda request: None)
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create_user(username='timed', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_sampled_request_reports_spans(self):
+        with self.assertLogs('njjc.timing', 'INFO') as logs:
+            response = self.client.get('/posts/')
+        metrics = {m.split(';')[0] for m in response['Server-Timing'].split(', ')}
+        self.assertTrue({'total', 'db', 'serialize', 'render'} <= metrics)
+        self.assertIn('"db_count":', logs.output[0])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_request_has_no_header(self):
+        response = self.client.get('/posts/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_span_outside_a_request_is_a_noop(self):
+        with span('bedrock'):
+            pass
+
+
+class MetricsTests(TestCase):
+    def test_counters_and_histograms_render(self):
+        requests = metrics.counter('test_requests_total', 'Test counter.')
+        latency = metrics.histogram('test_latency_seconds', 'Test histogram.', buckets=(0.1, 1.0))
+        requests.inc(result='ok')
+        requests.inc(2, result='ok')
+        latency.observe(0.5, op='search')
+
+        text = metrics.render()
+        self.assertIn('test_requests_total{result="ok"} 3', text)
+        self.assertIn('test_latency_seconds_bucket{op="search",le="0.1"} 0', text)
+        self.assertIn('test_latency_seconds_bucket{op="search",le="1.0"} 1', text)
+        self.assertIn('test_latency_seconds_count{op="search"} 1', text)
+        self.assertIn('django_q_queue_depth 0', text)
+
+    def test_aggregates_processes_and_archives_exited_ones(self):
+        requests = metrics.counter('test_files_total', 'Test counter.')
+        requests.inc(result='ok')
+        with tempfile.TemporaryDirectory() as tmp_dir, override_settings(METRICS_DIR=tmp_dir):
+            other = {'counters': [['test_files_total', [['result', 'ok']], 4]], 'histograms': []}
+            with open(f'{tmp_dir}/1.json', 'w') as f:  # pid 1 is alive
+                json.dump(other, f)
+            with open(f'{tmp_dir}/999999999.json', 'w') as f:  # exited process
+                json.dump(other, f)
+
+            self.assertIn('test_files_total{result="ok"} 9', metrics.render())
+            self.assertFalse(os.path.exists(f'{tmp_dir}/999999999.json'))
+            self.assertIn('test_files_total{result="ok"} 9', metrics.render())
+
+    def test_recommended_feed_records_stages(self):
+        from rest_framework.test import APIClient
+        user = User.objects.create_user(username='metered', password='password')
+        client = APIClient()
+        client.force_authenticate(user)
+        client.get('/posts/recommended/')
+        self.assertIn('recsys_stage_seconds_count{stage="candidates"}', metrics.render())
+
+
+class SyntheticDataTests(TestCase):
+    def test_generates_consistent_correlated_data(self):
+        from posts.categories import get_category_list
+        self.assertEqual(get_category_list()['data'], [])
+        call_command(
+            'generate_synthetic_data', users=30, posts=200, interactions=2000, categories=3, batch_size=500,
+            stdout=StringIO(),
+        )
+        # The bulk-created categories invalidate the cached category list
+        self.assertEqual(len(get_category_list()['data']), 3)
+        users = User.objects.filter(username__startswith='synth_')
+        self.assertEqual(users.count(), 30)
+        self.assertEqual(Post.objects.filter(embedding__isnull=False, search_vector__isnull=False).count(), 200)
+        self.assertEqual(UserInteraction.objects.filter(interaction_type='VIEW').count(), 2000)
+        # Every like has its LIKE interaction, and the denormalized counts match
+        likes = Post.like_users.through.objects.count()
+        self.assertGreater(likes, 0)
+        self.assertEqual(UserInteraction.objects.filter(interaction_type='LIKE').count(), likes)
+        self.assertEqual(reconcile(), {'like_count': 0, 'comment_count': 0})
+        # Users mostly view posts in their interest categories
+        views = UserInteraction.objects.filter(interaction_type='VIEW')
+        in_interest = views.filter(post__category__interested_users=F('user')).count()
+        self.assertGreater(in_interest / 2000, 0.6)
+        self.assertTrue(keyword_search(Post.objects.all(), Post.objects.first().title.split()[0]).exists())
+
+
+class RecommendationEvaluationTests(TestCase):
+    def test_ranking_metrics(self):
+        self.assertEqual(recall_at_k([1, 2, 3, 4], {2, 4, 9, 10}, 2), 0.25)
+        self.assertAlmostEqual(ndcg_at_k([1, 2], {1, 2}, 2), 1.0)
+        self.assertAlmostEqual(ndcg_at_k([3, 1], {1}, 2), 1 / np.log2(3))
+
+    def test_evaluates_feed_as_of_cutoff(self):
+        call_command(
+            'generate_synthetic_data', users=40, posts=300, interactions=6000, categories=3, days=30,
+            stdout=StringIO(),
+        )
+        holdout = build_holdout(holdout_days=7, max_users=20)
+        self.assertTrue(holdout.users)
+        for user in holdout.users:
+            # Relevant posts existed before the cutoff and were not seen before it
+            self.assertFalse(UserInteraction.objects.filter(
+                user=user, post_id__in=holdout.relevant[user.id], created_at__lt=holdout.cutoff
+            ).exists())
+
+        small = evaluate(holdout, {'content_pool_size': 10, 'feed_size': 20}, ks=(20,))
+        large = evaluate(holdout, {'content_pool_size': 100, 'feed_size': 100}, ks=(20,))
+        self.assertEqual(small['users'], len(holdout.users))
+        self.assertGreater(large['pool_recall'], small['pool_recall'])
+        self.assertGreater(large['recall'][20], 0)
+        self.assertIn('p95', large['latency_ms']['candidates'])
+
+
+class LocalVectorIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='indexer', password='password')
+        self.category = Category.objects.create(id='index_cat', name='Index Category')
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def _post(self, axis):
+        post = Post.objects.create(author=self.user, category=self.category, title='t', content='c')
+        vector = [0.0] * 768
+        vector[axis] = 1.0
+        Post.objects.filter(pk=post.pk).update(embedding=vector)
+        return post, vector
+
+    def test_build_search_and_refresh(self):
+        a, query = self._post(0)
+        b, _ = self._post(1)
+        self.assertEqual(LocalVectorIndex.build(self.tmp_dir.name), 2)
+
+        index = LocalVectorIndex(self.tmp_dir.name).load()
+        self.assertEqual(index.search(query, k=2)[0], (a.id, 1.0))
+        self.assertEqual([post_id for post_id, score in index.search(query, k=2, exclude_ids={a.id})], [b.id])
+
+        # Posts newer than the snapshot come from the delta
+        c, _ = self._post(0)
+        index.refresh(force=True)
+        self.assertEqual(sorted(post_id for post_id, score in index.search(query, k=2)), [a.id, c.id])
+
+
+class SearchEmbeddingBackendTests(SimpleTestCase):
+    @override_settings(SEARCH_EMBEDDING_BACKEND='local')
+    def test_local_mode_reuses_pgvector_embedding(self):
+        self.assertEqual(search_embedding_dimension(), 768)
+        self.assertEqual(get_search_embedding('ignored', local_vector=[0.5, 0.25]), [0.5, 0.25])
+
+    @override_settings(SEARCH_EMBEDDING_BACKEND='bedrock')
+    def test_bedrock_mode_dimension(self):
+        self.assertEqual(search_embedding_dimension(), 1024)
+
+
+class CandidateGenerationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recipient', password='password')
+        self.user.cf_latent_vector = [1.0] + [0.0] * 63
+        self.user.preference_vector = [1.0] + [0.0] * 767
+        self.user.save()
+        self.category = Category.objects.create(id='rec_cat', name='Rec Category')
+        self.visible, self.reported, self.viewed, self.nsfw = [self._post() for _ in range(4)]
+        Post.objects.filter(pk=self.nsfw.pk).update(is_nsfw=True)
+        Report.objects.create(user=self.user, post=self.reported, content='spam')
+        UserInteraction.objects.create(user=self.user, post=self.viewed, interaction_type='VIEW', score=1.0)
+
+    def _post(self):
+        post = Post.objects.create(author=self.user, category=self.category, title='t', content='c')
+        Post.objects.filter(pk=post.pk).update(
+            cf_latent_vector=[1.0] + [0.0] * 63,
+            embedding=[1.0] + [0.0] * 767,
+        )
+        return post
+
+    def test_exclusions_and_safety_filter_run_in_one_query(self):
+        with self.assertNumQueries(1):
+            candidates = RecommendedPostListView()._generate_candidates(self.user)
+
+        self.assertEqual(set(candidates), {self.visible.id})
+        self.assertAlmostEqual(candidates[self.visible.id]['cf_score'], 1.0)
+        self.assertAlmostEqual(candidates[self.visible.id]['content_score'], 1.0)
+
+    def test_local_index_content_source_fills_its_quota(self):
+        # The only eligible post is the farthest one, so the first over-fetch (k=2) finds none
+        Post.objects.filter(pk=self.visible.pk).update(embedding=[0.6, 0.8] + [0.0] * 766)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        LocalVectorIndex.build(tmp_dir.name)
+        index = LocalVectorIndex(tmp_dir.name).load()
+        view = RecommendedPostListView()
+        view.content_pool_size = 1
+        view._get_local_index = lambda: index
+        self.user.cf_latent_vector = None
+
+        with mock.patch.object(index, 'search', wraps=index.search) as search:
+            candidates = view._generate_candidates(self.user)
+
+        self.assertEqual(set(candidates), {self.visible.id})
+        self.assertAlmostEqual(candidates[self.visible.id]['content_score'], 0.6, places=5)
+        self.assertEqual([c.kwargs['k'] for c in search.call_args_list], [2, 4])
+
+    def test_verified_user_sees_nsfw_candidates(self):
+        self.user.is_pass_verified = True
+        candidates = RecommendedPostListView()._generate_candidates(self.user)
+        self.assertEqual(set(candidates), {self.visible.id, self.nsfw.id})
+
+    def test_cold_start_uses_interested_categories(self):
+        self.user.cf_latent_vector = None
+        self.user.preference_vector = None
+        self.user.save()
+        self.user.interested_categories.add(self.category)
+        UserInteraction.objects.filter(user=self.user).delete()
+
+        candidates = RecommendedPostListView()._generate_candidates(self.user)
+        self.assertEqual(set(candidates), {self.visible.id, self.viewed.id})
+        self.assertEqual(candidates[self.visible.id]['content_score'], 0.5)
+
+
+class PopularityTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.delete(popularity.TRENDING_CACHE_KEY)
+        popularity._trending['data'] = None
+        self.user = User.objects.create_user(username='reader', password='password')
+        self.category = Category.objects.create(id='pop_cat', name='Popular Category')
+        self.post = Post.objects.create(author=self.user, category=self.category, title='t', content='c')
+        self.buffer = popularity.PopularityBuffer(interval=60)
+        patcher = mock.patch.object(popularity, '_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _record(self, *events):
+        with self.captureOnCommitCallbacks(execute=True):
+            for event in events:
+                popularity.record_interaction(event)
+
+    def _event(self, interaction_type, score, created_at, duration=0):
+        return UserInteraction(post_id=self.post.id, interaction_type=interaction_type,
+                               score=score, duration=duration, created_at=created_at)
+
+    def test_interactions_are_rolled_up_with_decay(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        t0 = timezone.now() - timedelta(days=2)
+        # Buffered and merged in memory (out of order), then one upsert
+        self._record(
+            self._event('LIKE', 5.0, t0 + timedelta(hours=24)),
+            self._event('VIEW', 2.0, t0, duration=30),
+            self._event('NOT_INTERESTED', -5.0, t0 + timedelta(hours=24)),
+        )
+        self.assertFalse(PostPopularity.objects.exists())
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 1)
+
+        row = PostPopularity.objects.get(post=self.post)
+        self.assertAlmostEqual(row.score, 2.0 * 0.5 + 5.0)
+        self.assertEqual((row.views, row.likes, row.comments, row.dwell_seconds), (1, 1, 0, 30))
+        self.assertEqual(row.updated_at, t0 + timedelta(hours=24))
+
+        # The next flush merges into the stored row
+        self._record(self._event('VIEW', 1.0, t0 + timedelta(hours=48), duration=10))
+        self.buffer.flush()
+        row.refresh_from_db()
+        self.assertAlmostEqual(row.score, (2.0 * 0.5 + 5.0) * 0.5 + 1.0)
+        self.assertEqual((row.views, row.dwell_seconds), (2, 40))
+
+    def test_signal_compact_and_trending(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserInteraction.objects.create(user=self.user, post=self.post, interaction_type='LIKE', score=5.0)
+        stale = Post.objects.create(author=self.user, category=self.category, title='old', content='c')
+        PostPopularity.objects.create(post=stale, category=self.category, score=0.001, updated_at=self.post.created_at)
+
+        kept, pruned = popularity.compact()
+        self.assertEqual((kept, pruned), (1, 1))
+        self.assertEqual(popularity.get_trending_post_ids([self.category.id], 10), [self.post.id])
+
+    def test_cold_start_candidates_include_trending_posts(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        self.user.interested_categories.add(self.category)
+        newer = Post.objects.create(author=self.user, category=self.category, title='new', content='c')
+        self._record(self._event('LIKE', 5.0, timezone.now() - timedelta(hours=1)))
+        self.buffer.flush()
+        popularity.rebuild_trending()
+
+        view = RecommendedPostListView()
+        view.cold_start_pool_size = 1
+        candidates = view._generate_candidates(self.user)
+        self.assertEqual(set(candidates), {self.post.id, newer.id})
+        self.assertGreater(candidates[self.post.id]['engagement'], 0)
+        self.assertNotIn('engagement', candidates[newer.id])
+
+
+class RankingTests(SimpleTestCase):
+    def test_scores_match_weights_and_freshness_boost(self):
+        from datetime import datetime, timedelta, timezone
+        from types import SimpleNamespace
+        now = datetime.now(timezone.utc)
+        fresh = SimpleNamespace(created_at=now - timedelta(hours=1))
+        old = SimpleNamespace(created_at=now - timedelta(days=3))
+        stronger_old = SimpleNamespace(created_at=now - timedelta(days=3))
+        candidates = {
+            1: {'post': old, 'cf_score': 0.5, 'content_score': 0.5},          # 0.4
+            2: {'post': fresh, 'cf_score': 0.0, 'content_score': 0.1},        # (0.04 + 0.2) * 1.2 = 0.288
+            3: {'post': stronger_old, 'cf_score': 1.0, 'content_score': 1.0}, # 0.8
+        }
+        weights = get_ranking_weights()
+        self.assertEqual(rank_candidates(candidates, weights, k=3, now=now), [stronger_old, old, fresh])
+        self.assertEqual(rank_candidates(candidates, weights, k=1, now=now), [stronger_old])
+
+
+class MMRTests(SimpleTestCase):
+    def test_near_duplicate_is_pushed_down(self):
+        import numpy as np
+        relevance = np.array([1.0, 0.95, 0.5])
+        embeddings = np.array([[1.0, 0.0], [1.0, 0.01], [0.0, 1.0]])
+        self.assertEqual(list(mmr_indices(relevance, embeddings, 3, diversity=0.5)), [0, 2, 1])
+        self.assertEqual(list(mmr_indices(relevance, embeddings, 3, diversity=0.0)), [0, 1, 2])
@@ -39,4 +39,6 @@ urlpatterns = [
     path('delete/<int:post_id>/', views.PostDeleteView.as_view()),
     # delete comment
     path('comments/<int:comment_id>/', views.CommentDeleteView.as_view()),
+    # replies of a comment thread
+    path('comments/<int:comment_id>/replies/', views.CommentReplyListView.as_view(), name='comment_replies'),
 ]
\ No newline at end of file
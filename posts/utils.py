@@ -1,7 +1,13 @@
 import numpy as np
 from .models import UserInteraction
-from django_q.tasks import async_task
+from datetime import timedelta
+from django_q.models import Schedule
+from django_q.tasks import async_task, schedule
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from njjc.cache import cache_is_shared
 
 def calculate_user_vector(user_id, limit=50):
     """
@@ -16,42 +22,81 @@ def calculate_user_vector(user_id, limit=50):
 
     # Get recent interactions with scores
     interactions = UserInteraction.objects.filter(user=user).select_related('post').order_by('-created_at')[:limit]
-    
-    if not interactions:
+    user_vector = weighted_preference_vector((i.post.embedding, i.score) for i in interactions)
+    if user_vector is None:
         return None
 
+    # Save to User model
+    user.preference_vector = user_vector.tolist()
+    user.save(update_fields=['preference_vector'])
+    
+    return user.preference_vector
+
+def weighted_preference_vector(pairs):
+    """
+    Score-weighted average of post embeddings: pairs are (embedding, score).
+    Posts without an embedding are skipped; None if nothing is left or the weights cancel out.
+    """
     weighted_vectors = []
     total_weight = 0.0
 
-    for interaction in interactions:
-        post = interaction.post
-        if post.embedding is None:
+    for embedding, weight in pairs:
+        if embedding is None:
             continue
-            
-        weight = interaction.score
         # Ensure embedding is a numpy array
-        embedding = np.array(post.embedding)
-        
-        weighted_vectors.append(embedding * weight)
+        weighted_vectors.append(np.array(embedding) * weight)
         total_weight += weight
 
     if total_weight == 0:
         return None
 
     # Calculate weighted average
-    user_vector = np.sum(weighted_vectors, axis=0) / total_weight
-    
-    # Save to User model
-    user.preference_vector = user_vector.tolist()
-    user.save(update_fields=['preference_vector'])
-    
-    return user.preference_vector
+    return np.sum(weighted_vectors, axis=0) / total_weight
+
+_DIRTY_KEY = 'user_vector:dirty:{}'
+_SCHEDULED_KEY = 'user_vector:scheduled:{}'
 
-def async_calculate_user_vector(user_id):
+def async_calculate_user_vector(user_id, debounce=False):
     """
     Queue a background task to recalculate the user's preference vector.
+
+    With debounce (trailing edge), a burst of likes/unlikes leads to one recompute that runs
+    USER_VECTOR_DEBOUNCE_SECONDS after the first of them (plus up to the django-q scheduler's 30s tick)
+    and sees all of them: the user is marked dirty, and a delayed task is scheduled unless one is already
+    pending. Needs a shared cache for the flags; with a per-process cache every call queues a task.
     """
-    async_task(calculate_user_vector, user_id)
+    if not debounce or not cache_is_shared():
+        async_task(calculate_user_vector, user_id)
+        return
+    cache.set(_DIRTY_KEY.format(user_id), 1, timeout=_debounce_lease())
+    if cache.add(_SCHEDULED_KEY.format(user_id), 1, timeout=_debounce_lease()):
+        _schedule_user_vector(user_id)
+
+def _debounce_lease():
+    # Long enough to cover the delay and a late scheduler; expires if a task is lost
+    return getattr(settings, 'USER_VECTOR_DEBOUNCE_SECONDS', 10) + 300
+
+def _schedule_user_vector(user_id):
+    delay = getattr(settings, 'USER_VECTOR_DEBOUNCE_SECONDS', 10)
+    schedule(
+        'posts.utils.debounced_calculate_user_vector', user_id,
+        schedule_type=Schedule.ONCE, next_run=timezone.now() + timedelta(seconds=delay),
+    )
+
+def debounced_calculate_user_vector(user_id):
+    """Task behind debounce: recompute, then run again if the user went dirty in the meantime."""
+    cache.delete(_DIRTY_KEY.format(user_id))
+    try:
+        calculate_user_vector(user_id)
+    finally:
+        if cache.get(_DIRTY_KEY.format(user_id)):
+            cache.set(_SCHEDULED_KEY.format(user_id), 1, timeout=_debounce_lease())
+            _schedule_user_vector(user_id)
+        else:
+            cache.delete(_SCHEDULED_KEY.format(user_id))
+            # A change that landed between the check and the delete saw a pending task and scheduled nothing
+            if cache.get(_DIRTY_KEY.format(user_id)) and cache.add(_SCHEDULED_KEY.format(user_id), 1, timeout=_debounce_lease()):
+                _schedule_user_vector(user_id)
 
 def get_user_vector(user):
     """
@@ -0,0 +1,279 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per matmul. Bounds the float32 temporary when the snapshot is stored as float16.
+CHUNK_ROWS = 16384
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class LocalVectorIndex:
+    """
+    In-process cosine top-k search over a snapshot of Post vectors.
+
+    The snapshot is two .npy files (ids + unit-normalized vectors) opened with mmap,
+    so every web/worker process on a host shares one page-cached copy.
+    Posts created after the snapshot are kept in a small in-memory delta that is
+    reloaded from the database at most every `refresh_interval` seconds.
+    Deleted posts are not tracked; callers hydrate ids from the database and drop missing ones.
+    The snapshot and the delta are each published as one (ids, vectors) tuple, so a search running
+    alongside refresh() reads a matching pair without taking the lock.
+    """
+
+    def __init__(self, path, field='embedding', refresh_interval=60):
+        self.path = str(path)
+        self.field = field
+        self.refresh_interval = refresh_interval
+        self._snapshot = (np.empty(0, dtype=np.int64), None)
+        self.max_id = 0
+        self._delta = (np.empty(0, dtype=np.int64), None)
+        self._refreshed_at = 0.0
+        self._meta_mtime = None
+        self._lock = threading.Lock()
+
+    # ---- Snapshot files ----
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{self.field}.{name}")
+
+    @classmethod
+    def write(cls, path, field, ids, vectors, dtype='float32'):
+        """Write a snapshot from in-memory arrays. Returns the number of rows written."""
+        os.makedirs(path, exist_ok=True)
+        index = cls(path, field)
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids)
+        vectors = _normalize(vectors)[order].astype(dtype)
+        index._replace_files(ids[order], vectors, dtype)
+        return len(ids)
+
+    @classmethod
+    def build(cls, path, field='embedding', dtype='float32', batch_size=5000):
+        """Export Post.<field> into a snapshot, streaming rows in id order. Returns the row count."""
+        from .models import Post
+
+        os.makedirs(path, exist_ok=True)
+        index = cls(path, field)
+        queryset = Post.objects.filter(**{f"{field}__isnull": False})
+        max_id = queryset.order_by('-id').values_list('id', flat=True).first() or 0
+        queryset = queryset.filter(id__lte=max_id)
+        count = queryset.count()
+        if count == 0:
+            return 0
+        dim = Post._meta.get_field(field).dimensions
+
+        tmp_ids = index._file('ids.npy.tmp')
+        tmp_vectors = index._file('vectors.npy.tmp')
+        ids = np.lib.format.open_memmap(tmp_ids, mode='w+', dtype=np.int64, shape=(count,))
+        vectors = np.lib.format.open_memmap(tmp_vectors, mode='w+', dtype=dtype, shape=(count, dim))
+
+        # Rows can be deleted between count() and the scan, so track how many actually arrived
+        written = 0
+        rows = queryset.order_by('id').values_list('id', field).iterator(chunk_size=batch_size)
+        batch_ids, batch_vectors = [], []
+        for post_id, vector in rows:
+            if written + len(batch_ids) >= count:
+                break
+            batch_ids.append(post_id)
+            batch_vectors.append(vector)
+            if len(batch_ids) == batch_size:
+                written = index._write_batch(ids, vectors, written, batch_ids, batch_vectors)
+                batch_ids, batch_vectors = [], []
+        if batch_ids:
+            written = index._write_batch(ids, vectors, written, batch_ids, batch_vectors)
+
+        ids.flush()
+        vectors.flush()
+        del ids, vectors
+        if written < count:
+            index._replace_files(np.load(tmp_ids)[:written], np.load(tmp_vectors)[:written], dtype)
+            os.remove(tmp_ids)
+            os.remove(tmp_vectors)
+            return written
+
+        os.replace(tmp_ids, index._file('ids.npy'))
+        os.replace(tmp_vectors, index._file('vectors.npy'))
+        index._write_meta(dtype, dim, written, max_id)
+        return written
+
+    @staticmethod
+    def _write_batch(ids, vectors, offset, batch_ids, batch_vectors):
+        end = offset + len(batch_ids)
+        ids[offset:end] = batch_ids
+        vectors[offset:end] = _normalize(batch_vectors)
+        return end
+
+    def _replace_files(self, ids, vectors, dtype):
+        # Write to temp files and rename, so processes holding the old mmap keep a consistent copy
+        np.save(self._file('ids.tmp.npy'), ids)
+        np.save(self._file('vectors.tmp.npy'), vectors)
+        os.replace(self._file('ids.tmp.npy'), self._file('ids.npy'))
+        os.replace(self._file('vectors.tmp.npy'), self._file('vectors.npy'))
+        dim = vectors.shape[1] if vectors.ndim == 2 else 0
+        self._write_meta(dtype, dim, len(ids), int(ids[-1]) if len(ids) else 0)
+
+    def _write_meta(self, dtype, dim, count, max_id):
+        with open(self._file('meta.json'), 'w') as f:
+            json.dump({
+                'field': self.field,
+                'dtype': str(dtype),
+                'dim': dim,
+                'count': count,
+                'max_id': max_id,
+                'built_at': time.time(),
+            }, f)
+
+    def exists(self):
+        return os.path.exists(self._file('meta.json'))
+
+    def load(self):
+        """Open the snapshot read-only via mmap."""
+        with open(self._file('meta.json')) as f:
+            meta = json.load(f)
+        self._snapshot = (
+            np.load(self._file('ids.npy'), mmap_mode='r'),
+            np.load(self._file('vectors.npy'), mmap_mode='r'),
+        )
+        self.max_id = meta['max_id']
+        self._meta_mtime = os.path.getmtime(self._file('meta.json'))
+        self._delta = (np.empty(0, dtype=np.int64), None)
+        self._refreshed_at = 0.0
+        return self
+
+    @property
+    def ids(self):
+        return self._snapshot[0]
+
+    @property
+    def vectors(self):
+        return self._snapshot[1]
+
+    def __len__(self):
+        return len(self._snapshot[0]) + len(self._delta[0])
+
+    # ---- Incremental refresh ----
+
+    def refresh(self, force=False):
+        """
+        Reload posts newer than the snapshot into the in-memory delta.
+        Also switches to a newer snapshot if one was built since load().
+        """
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        from .models import Post
+
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return
+            if os.path.getmtime(self._file('meta.json')) != self._meta_mtime:
+                self.load()
+            rows = list(
+                Post.objects.filter(id__gt=self.max_id, **{f"{self.field}__isnull": False})
+                .order_by('id').values_list('id', self.field)
+            )
+            if rows:
+                self._delta = (np.array([r[0] for r in rows], dtype=np.int64), _normalize([r[1] for r in rows]))
+            self._refreshed_at = time.monotonic()
+
+    # ---- Search ----
+
+    def search(self, query_vector, k=10, exclude_ids=None):
+        """Top-k (post_id, cosine similarity) pairs for one query, best first."""
+        ids, scores = self.search_batch([query_vector], k=k, exclude_ids=exclude_ids)
+        return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+
+    def search_batch(self, query_vectors, k=10, exclude_ids=None):
+        """
+        Top-k for a batch of queries with one matmul per chunk.
+        Returns (ids, scores) arrays of shape (n_queries, k); missing slots are -1 / -inf.
+        """
+        queries = _normalize(np.atleast_2d(query_vectors))
+        excluded = np.fromiter(exclude_ids, dtype=np.int64) if exclude_ids else None
+
+        best_ids = np.full((len(queries), 0), -1, dtype=np.int64)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+
+        # One read of each published pair; refresh() may swap them while this search runs
+        (ids, vectors), (delta_ids, delta_vectors) = self._snapshot, self._delta
+        blocks = []
+        if vectors is not None:
+            blocks.extend(
+                (ids[start:start + CHUNK_ROWS], vectors[start:start + CHUNK_ROWS])
+                for start in range(0, len(ids), CHUNK_ROWS)
+            )
+        if delta_vectors is not None:
+            blocks.append((delta_ids, delta_vectors))
+
+        for block_ids, block_vectors in blocks:
+            scores = np.asarray(block_vectors, dtype=np.float32) @ queries.T
+            scores = scores.T
+            if excluded is not None:
+                scores[:, np.isin(block_ids, excluded)] = -np.inf
+            best_ids, best_scores = self._merge_top_k(
+                best_ids, best_scores, np.broadcast_to(block_ids, scores.shape), scores, k
+            )
+
+        if best_ids.shape[1] < k:
+            pad = k - best_ids.shape[1]
+            best_ids = np.pad(best_ids, ((0, 0), (0, pad)), constant_values=-1)
+            best_scores = np.pad(best_scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+        best_ids[~np.isfinite(best_scores)] = -1
+        return best_ids, best_scores
+
+    @staticmethod
+    def _merge_top_k(best_ids, best_scores, ids, scores, k):
+        all_ids = np.concatenate([best_ids, ids], axis=1)
+        all_scores = np.concatenate([best_scores, scores], axis=1)
+        if all_scores.shape[1] > k:
+            top = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+            all_ids = np.take_along_axis(all_ids, top, axis=1)
+            all_scores = np.take_along_axis(all_scores, top, axis=1)
+        order = np.argsort(-all_scores, axis=1, kind='stable')
+        return np.take_along_axis(all_ids, order, axis=1), np.take_along_axis(all_scores, order, axis=1)
+
+
+_local_index = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_index(field='embedding'):
+    """
+    The process-wide index for Post.embedding, or None if disabled or no snapshot was built.
+    The delta of newer posts is refreshed lazily on access.
+    """
+    global _local_index
+    if not getattr(settings, 'LOCAL_VECTOR_INDEX_ENABLED', False):
+        return None
+
+    if _local_index is None:
+        with _local_index_lock:
+            if _local_index is None:
+                index = LocalVectorIndex(
+                    settings.LOCAL_VECTOR_INDEX_DIR,
+                    field,
+                    refresh_interval=getattr(settings, 'LOCAL_VECTOR_INDEX_REFRESH_SECONDS', 60),
+                )
+                if not index.exists():
+                    logger.warning(f"Local vector index enabled but no snapshot found in {index.path}")
+                    return None
+                _local_index = index.load()
+                logger.info(f"Loaded local vector index ({len(_local_index)} vectors)")
+
+    try:
+        _local_index.refresh()
+    except Exception as e:
+        logger.error(f"Local vector index refresh failed: {e}")
+    return _local_index
@@ -2,7 +2,9 @@ from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from .models import Post, Category, Comment, UserInteraction, Report
-from .serializers import CategorySerializer, PostListSerializer, CommentSerializer
+from .serializers import (
+    CategorySerializer, PostListSerializer, PostDetailSerializer, CommentSerializer, CommentThreadSerializer, SemanticSearchResultSerializer
+)
 
 from django.contrib.auth import get_user_model # 유저 모델 가져오기
 from django.views.decorators.csrf import csrf_exempt # CSRF 면제 데코레이터
@@ -11,26 +13,59 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.generics import ListAPIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 import os
 import uuid
 from django.conf import settings
 from rest_framework import generics, views, status
-from rest_framework.parsers import MultiPartParser, FormParser
+import asyncio
 import boto3
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import NoCredentialsError
-import traceback
 from PIL import Image
 from io import BytesIO
 import random
-from django.db.models import Exists, OuterRef
+from collections import Counter
+from django.db.models import Exists, F, OuterRef, Prefetch, Value, prefetch_related_objects
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from pgvector.django import CosineDistance
 from .utils import calculate_user_vector, get_user_vector
 from .opensearch_client import OpenSearchClient
-from .bedrock_client import BedrockClient
+from .embeddings import get_search_embedding
+from .search import keyword_search, hydrate_hits, make_preview, annotate_list_fields, defer_list_fields
+from .vector_index import get_local_index
+from .ranking import diversify, get_ranking_weights, score_candidates
+from .popularity import decay, get_trending_post_ids
+from .likes import toggle_like
+from .comments import attach_reply_previews, replies_of, thread_root_id, top_level_comments
+from .categories import get_category_list
+from .conditional import ConditionalPageMixin, conditional_response, post_detail_etag, send_post_page
+from njjc.aio import AsyncAPIView, json_response, run_blocking, run_orm
+from njjc.db_routers import ReplicaReadMixin, replica_reads
+from njjc import metrics
+from njjc.timing import span
+import logging
 
+logger = logging.getLogger(__name__)
+
+RECSYS_CANDIDATES = metrics.counter('recsys_candidates_total', 'Recommendation candidates retrieved, by source.')
+RECSYS_STAGE_SECONDS = metrics.histogram('recsys_stage_seconds', 'Recommended feed latency by stage.')
+
+
+def get_reported_post_ids(user):
+    """Posts the user has reported. These are never shown to them again."""
+    return set(Report.objects.filter(user=user).values_list('post_id', flat=True))
+
+
+def get_search_filters(user):
+    """OpenSearch filters matching the NSFW/profane gating used by the feeds."""
+    if user.is_authenticated and user.is_pass_verified:
+        return {}
+    return {'is_nsfw': False, 'is_profane': False}
 
 
 class PostInteractionView(views.APIView):
@@ -100,6 +135,17 @@ class CategoryListView(generics.ListAPIView):
     queryset = Category.objects.all().order_by('name')
     serializer_class = CategorySerializer
     pagination_class = None
+    # Public list: skip JWT authentication so a cached response needs no user lookup
+    authentication_classes = []
+
+    def list(self, request, *args, **kwargs):
+        # Cached and versioned (see posts/categories.py); unchanged lists are answered with 304
+        categories = get_category_list()
+        response = get_conditional_response(request, etag=categories['etag'])
+        if response is None:
+            response = Response(categories['data'])
+        response['ETag'] = categories['etag']
+        return response
 
 
 class PostPagination(PageNumberPagination):
@@ -108,15 +154,14 @@ class PostPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class PostListView(ListAPIView):
+class PostListView(ReplicaReadMixin, ConditionalPageMixin, ListAPIView):
     serializer_class = PostListSerializer
     pagination_class = PostPagination
 
     def get_queryset(self):
         user = self.request.user
-        qs = Post.objects.filter(embedding__isnull=False).select_related('author', 'category').prefetch_related(
-            'like_users', 'comment_set', 'comment_set__author'
-        )
+        qs = Post.objects.filter(embedding__isnull=False).select_related('author', 'category')
+        qs = annotate_list_fields(defer_list_fields(qs), user)
         
         # If user is not verified, hide NSFW and profane content
         if not (user.is_authenticated and user.is_pass_verified):
@@ -128,338 +173,470 @@ class PostListView(ListAPIView):
 class RecommendedPostListView(views.APIView):
     permission_classes = [IsAuthenticated]
 
+    # Candidate pool sizes per retrieval source
+    cf_pool_size = 50
+    content_pool_size = 50
+    cold_start_pool_size = 30
+    # Posts kept after ranking
+    feed_size = 100
+    # MMR trade-off (None = settings.RECSYS_DIVERSITY)
+    diversity = None
+    # Run the pipeline as of a past time (evaluate_recommendations); None = now
+    as_of = None
+
     def get(self, request):
         user = request.user
         
-        # 1. Exclusion (Hard vs Soft)
-        # Reported posts are HARD excluded (never show).
-        reported_ids = self._get_reported_ids(user)
+        # 1. Candidate Generation (Retrieval)
+        # One SQL statement: every source with its exclusions and safety filters applied before LIMIT.
+        # Retrieval reads (incl. the vector kNN) go to a replica; a user who just wrote stays on the primary.
+        with replica_reads(), RECSYS_STAGE_SECONDS.time(stage='candidates'):
+            candidates = self._generate_candidates(user)
         
-        # Viewed posts are NOT excluded from candidates, but used for ranking penalties.
-        # We specifically track "Recently Viewed" (< 1 hour) for heavy penalty.
-        short_term_viewed_ids = self._get_short_term_viewed_ids(user)
+        # 2. Scoring
+        with RECSYS_STAGE_SECONDS.time(stage='score'):
+            posts, scores = self._score(user, candidates)
         
-        # Hard Exclusion for Candidate Generation
-        exclusion_ids = reported_ids | short_term_viewed_ids
-        
-        # 2. Candidate Generation (Retrieval)
-        # We pass exclusion_ids which only contains reported posts now.
-        candidates = self._generate_candidates(user, exclusion_ids)
-        
-        # 3. Scoring & Ranking
-        ranked_posts = self._score_and_rank(user, candidates)
-        
-        # 4. Post-processing (Diversity & Limit)
-        final_posts = ranked_posts[:100]
+        # 3. Post-processing (Diversity & Limit)
+        # MMR re-ranking keeps near-duplicate posts from filling consecutive feed slots
+        with RECSYS_STAGE_SECONDS.time(stage='diversify'):
+            final_posts = diversify(posts, scores, k=self.feed_size, diversity=self.diversity)
 
-        # 5. Pagination
+        # 4. Pagination
         paginator = PostPagination()
         page = paginator.paginate_queryset(final_posts, request)
-        serializer = PostListSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
-
-    def _get_reported_ids(self, user):
-        """Hard Exclusion: Never show reported posts again."""
-        return set(Report.objects.filter(user=user).values_list('post_id', flat=True))
-
-    def _get_short_term_viewed_ids(self, user):
-        """Identify posts viewed within the last 1 hour."""
-        from django.utils import timezone
+        # Before the ETag: it covers the author's name/avatar and the category name
+        prefetch_related_objects(
+            page,
+            Prefetch('author', queryset=get_user_model().objects.defer('preference_vector', 'cf_latent_vector')),
+            'category',
+        )
+        return send_post_page(request, paginator, page, self._serialize)
+
+    def _serialize(self, page):
+        with RECSYS_STAGE_SECONDS.time(stage='serialize'):
+            return PostListSerializer(page, many=True).data
+
+    def _get_eligible_posts(self, user):
+        """
+        Posts that may be recommended to the user, as SQL filters:
+        - Reported posts are HARD excluded (never show).
+        - Posts viewed within the last 1 hour are excluded.
+        - NSFW/Profane posts are excluded for unverified users.
+        """
         from datetime import timedelta
-        threshold = timezone.now() - timedelta(hours=1)
-        
-        return set(UserInteraction.objects.filter(
-            user=user, 
+        threshold = self._now() - timedelta(hours=1)
+
+        reported = Report.objects.filter(user=user, post=OuterRef('pk'))
+        recently_viewed = UserInteraction.objects.filter(
+            user=user,
+            post=OuterRef('pk'),
             created_at__gte=threshold,
             interaction_type='VIEW'
-        ).values_list('post_id', flat=True))
+        )
+        if self.as_of is not None:
+            recently_viewed = recently_viewed.filter(created_at__lt=self.as_of)
+        # The embedding stays: MMR re-ranks the candidates over it
+        posts = Post.objects.filter(~Exists(reported), ~Exists(recently_viewed)).defer(
+            'content', 'cf_latent_vector', 'search_vector'
+        ).annotate(
+            popularity_score=F('popularity__score'),
+            popularity_updated_at=F('popularity__updated_at'),
+        )
+        if not user.is_pass_verified:
+            posts = posts.filter(is_nsfw=False, is_profane=False)
+        if self.as_of is not None:
+            posts = posts.filter(created_at__lt=self.as_of)
+        return posts
 
-    def _generate_candidates(self, user, exclusion_ids):
+    def _now(self):
+        return self.as_of or timezone.now()
+
+    def _get_local_index(self):
+        return get_local_index()
+
+    def _generate_candidates(self, user):
         candidates = {} # Map post_id -> score_data
-        
+        eligible = self._get_eligible_posts(user)
+        sources = []
+        local_hits = {}
+
         # Source A: Collaborative Filtering
         if user.cf_latent_vector is not None:
-            cf_posts = Post.objects.filter(cf_latent_vector__isnull=False) \
-                .exclude(id__in=exclusion_ids) \
-                .annotate(distance=CosineDistance('cf_latent_vector', user.cf_latent_vector)) \
-                .order_by('distance')[:50]
-                
-            for p in cf_posts:
-                sim = max(0, 1.0 - p.distance)
-                candidates[p.id] = {'post': p, 'cf_score': sim, 'content_score': 0}
+            sources.append(
+                eligible.filter(cf_latent_vector__isnull=False)
+                .annotate(distance=CosineDistance('cf_latent_vector', user.cf_latent_vector), source=Value('cf'))
+                .order_by('distance')[:self.cf_pool_size]
+            )
 
         # Source B: Content-Based Filtering
         user_content_vector = get_user_vector(user)
-        if user_content_vector is not None:
-            content_posts = Post.objects.filter(embedding__isnull=False) \
-                .exclude(id__in=exclusion_ids) \
-                .annotate(distance=CosineDistance('embedding', user_content_vector)) \
-                .order_by('distance')[:50]
-            
-            for p in content_posts:
-                sim = max(0, 1.0 - p.distance)
-                if p.id in candidates:
-                    candidates[p.id]['content_score'] = sim
-                else:
-                    candidates[p.id] = {'post': p, 'cf_score': 0, 'content_score': sim}
+        local_index = self._get_local_index()
+        if user_content_vector is not None and local_index is not None:
+            # In-process index: over-fetch ids, the SQL filters below drop ineligible ones
+            # (topped up after the UNION by _more_local_content if they drop too many)
+            local_hits = dict(local_index.search(user_content_vector, k=self.content_pool_size * 2))
+            sources.append(
+                eligible.filter(id__in=list(local_hits))
+                .annotate(distance=Value(0.0), source=Value('content_index'))
+            )
+        elif user_content_vector is not None:
+            sources.append(
+                eligible.filter(embedding__isnull=False)
+                .annotate(distance=CosineDistance('embedding', user_content_vector), source=Value('content'))
+                .order_by('distance')[:self.content_pool_size]
+            )
         else:
-            # Cold Start: Categories
-            interested_categories = user.interested_categories.all()
-            if interested_categories.exists():
-                cat_posts = Post.objects.filter(category__in=interested_categories) \
-                .exclude(id__in=exclusion_ids) \
-                .order_by('-created_at')[:30]
-                for p in cat_posts:
-                    if p.id not in candidates:
-                        candidates[p.id] = {'post': p, 'cf_score': 0, 'content_score': 0.5}
-        
-        # Final Filtering: NSFW/Profane removal for unverified users
-        if not user.is_pass_verified:
-            filtered_candidates = {}
-            for pid, data in candidates.items():
-                p = data['post']
-                if not (p.is_nsfw or p.is_profane):
-                    filtered_candidates[pid] = data
-            return filtered_candidates
+            # Cold Start: trending posts (precomputed per category) plus the newest ones
+            category_ids = list(user.interested_categories.values_list('pk', flat=True))
+            trending_ids = get_trending_post_ids(category_ids, self.cold_start_pool_size)
+            if trending_ids:
+                sources.append(
+                    eligible.filter(id__in=trending_ids)
+                    .annotate(distance=Value(0.5), source=Value('trending'))
+                )
+            sources.append(
+                eligible.filter(category__in=category_ids)
+                .annotate(distance=Value(0.5), source=Value('category'))
+                .order_by('-created_at')[:self.cold_start_pool_size]
+            )
+
+        if not sources:
+            return candidates
+
+        # UNION ALL of every source, fetched in one round trip
+        rows = sources[0].union(*sources[1:], all=True) if len(sources) > 1 else sources[0]
+        rows = list(rows)
+
+        if local_hits:
+            content_rows = [p for p in rows if p.source == 'content_index']
+            content_rows += self._more_local_content(
+                eligible, local_index, user_content_vector, local_hits, len(content_rows)
+            )
+            content_rows = sorted(content_rows, key=lambda p: local_hits[p.id], reverse=True)[:self.content_pool_size]
+            rows = [p for p in rows if p.source != 'content_index'] + content_rows
+            for p in content_rows:
+                p.distance = 1.0 - local_hits[p.id]
+
+        for source, count in Counter(p.source for p in rows).items():
+            RECSYS_CANDIDATES.inc(count, source=source)
+
+        now = self._now()
+        for p in rows:
+            if p.source == 'cf':
+                candidates[p.id] = {'post': p, 'cf_score': max(0, 1.0 - p.distance), 'content_score': 0}
+
+        for p in rows:
+            if p.source == 'cf':
+                continue
+            sim = max(0, 1.0 - p.distance)
+            if p.id in candidates:
+                candidates[p.id]['content_score'] = sim
+            else:
+                candidates[p.id] = {'post': p, 'cf_score': 0, 'content_score': sim}
+
+        for data in candidates.values():
+            p = data['post']
+            if p.popularity_score is not None:
+                data['engagement'] = decay(p.popularity_score, p.popularity_updated_at, now)
 
         return candidates
 
-    def _score_and_rank(self, user, candidates):
-        from datetime import datetime, timezone, timedelta
-        now = datetime.now(timezone.utc)
-        
-        # Adaptive Weights
-        w_cf = 0.4
-        w_content = 0.4
-        w_fresh = 0.2
-        
-        if user.cf_latent_vector is None:
-            w_cf, w_content, w_fresh = 0.0, 0.7, 0.3
-            
-        ranked_list = []
-        for pid, data in candidates.items():
-            post = data['post']
-            
-            # Base Score
-            final_score = (w_cf * data['cf_score']) + \
-                          (w_content * data['content_score'])
-
-            # Freshness Boost (24-hour rule)
-            # If created within 24 hours, give a multiplier boost
-            time_diff = now - post.created_at
-            if time_diff < timedelta(hours=24):
-                # Boost!
-                final_score += 0.2 # Additive boost or multiplier
-                final_score *= 1.2 # Multiplier boost
-            
-            # Interaction Penalty REMOVED (Hard Exclusion applied in get method)
+    def _more_local_content(self, eligible, local_index, query_vector, local_hits, found):
+        """
+        Local-index content rows beyond the first over-fetch, for users who have reported or recently
+        viewed most of their nearest posts: k doubles until content_pool_size eligible posts are found
+        or the whole index has been searched. local_hits is updated in place with the new scores.
+        """
+        rows = []
+        k = self.content_pool_size * 2
+        while found + len(rows) < self.content_pool_size and k < len(local_index):
+            k *= 2
+            hits = dict(local_index.search(query_vector, k=k))
+            new_ids = [post_id for post_id in hits if post_id not in local_hits]
+            local_hits.update(hits)
+            rows.extend(
+                eligible.filter(id__in=new_ids)
+                .annotate(distance=Value(0.0), source=Value('content_index'))
+            )
+        return rows
 
-            ranked_list.append((final_score, post))
-            
-        ranked_list.sort(key=lambda x: x[0], reverse=True)
-        return [p for s, p in ranked_list]
+    def _score(self, user, candidates):
+        # Adaptive Weights (see posts/ranking.py), scored as arrays
+        weights = get_ranking_weights(has_cf_vector=user.cf_latent_vector is not None)
+        return score_candidates(candidates, weights, now=self._now())
 
 
-class SimilarPostListView(ListAPIView):
-    serializer_class = PostListSerializer
-    pagination_class = PostPagination
-    permission_classes = [IsAuthenticated]
+class SimilarPostListView(AsyncAPIView):
+    # Async: the Bedrock embedding and the OpenSearch query are awaited, not held on a worker thread
+    login_required = True
 
-    def get(self, request, post_id):
+    async def get(self, request, post_id):
         try:
             # 1. Get the target post
-            post = get_object_or_404(Post, pk=post_id)
+            try:
+                post = await run_orm(Post.objects.get, pk=post_id)
+            except Post.DoesNotExist:
+                return json_response({'detail': 'No Post matches the given query.'}, status=404)
+
+            # Fast path: in-process vector index over the pgvector embeddings (no Bedrock/OpenSearch call)
+            results = await run_orm(self._search_local_index, request.user, post)
+            if results:
+                return json_response({'results': results})
             
             # 2. Generate embedding for the target post
             # We can use the combined title + content as our query
             combined_text = f"{post.title} {post.content}"[:10000]
             
-            bedrock_client = BedrockClient()
-            query_vector = bedrock_client.get_embedding(combined_text)
+            # In single-embedding mode the stored pgvector embedding is reused as is
+            query_vector = await run_blocking(get_search_embedding, combined_text, local_vector=post.embedding)
             
             if not query_vector:
-                return Response({'results': []})
+                return json_response({'results': []})
             
             # 3. Search OpenSearch
-            os_client = OpenSearchClient()
-            # We want similar posts, excluding the current one
-            hits = os_client.search_posts(query_vector, size=6)
+            # The source post, reported posts and NSFW gating are filtered inside the kNN query,
+            # so OpenSearch returns exactly 5 displayable posts.
+            reported_ids = await run_orm(get_reported_post_ids, request.user)
+            hits = await OpenSearchClient().asearch_posts(
+                query_vector,
+                size=5,
+                filters=get_search_filters(request.user),
+                exclude_ids=reported_ids | {post.id},
+            )
             
-            # 4. Format Results (limiting to those that are not the current post)
+            # 4. Format Results
             results = []
             for hit in hits:
                 source = hit['_source']
-                # Skip the current post itself
-                if str(source.get('id')) == str(post.id):
-                    continue
-                
                 results.append({
                     'id': source.get('id'),
                     'title': source.get('title'),
-                    'preview': source.get('content', '')[:150],
+                    'preview': source.get('preview', '')[:150],
                     'author_username': source.get('author', 'unknown'),
                     'score': hit['_score']
                 })
             
-            # Limit to top 5 similar
-            return Response({'results': results[:5]})
+            return json_response({'results': results})
             
         except Exception as e:
             logger.error(f"Error in SimilarPostListView: {e}")
-            return Response({'error': str(e)}, status=500)
+            return json_response({'error': str(e)}, status=500)
+
+    def _search_local_index(self, user, post, size=5):
+        index = get_local_index()
+        if index is None or post.embedding is None:
+            return None
+        with replica_reads():
+            return self._local_index_results(index, user, post, size)
+
+    def _local_index_results(self, index, user, post, size):
+        # Over-fetch a little: NSFW gating and deleted posts are only known to Postgres
+        hits = index.search(post.embedding, k=size * 4, exclude_ids=get_reported_post_ids(user) | {post.id})
+        posts = Post.objects.select_related('author')
+        if not user.is_pass_verified:
+            posts = posts.exclude(is_nsfw=True).exclude(is_profane=True)
+        posts = posts.in_bulk([post_id for post_id, score in hits])
 
+        results = []
+        for post_id, score in hits:
+            similar = posts.get(post_id)
+            if similar is None:
+                continue
+            results.append({
+                'id': str(similar.id),
+                'title': similar.title,
+                'preview': make_preview(similar.content, 150),
+                'author_username': similar.author.username,
+                'score': score
+            })
+            if len(results) == size:
+                break
+        return results
 
-class MyPostListView(ListAPIView):
+
+class MyPostListView(ConditionalPageMixin, ListAPIView):
     serializer_class = PostListSerializer
     pagination_class = PostPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Post.objects.filter(author=self.request.user).select_related('author', 'category').prefetch_related(
-        'like_users', 'comment_set', 'comment_set__author'
-    ).order_by('-created_at')
+        qs = Post.objects.filter(author=self.request.user).select_related('author', 'category')
+        return annotate_list_fields(defer_list_fields(qs), self.request.user).order_by('-created_at')
 
 
-class MyLikedPostListView(ListAPIView):
+class MyLikedPostListView(ConditionalPageMixin, ListAPIView):
     serializer_class = PostListSerializer
     pagination_class = PostPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Post.objects.filter(like_users=self.request.user).select_related('author', 'category').prefetch_related(
-        'like_users', 'comment_set', 'comment_set__author'
-    ).order_by('-created_at')
+        qs = Post.objects.filter(like_users=self.request.user).select_related('author', 'category')
+        return defer_list_fields(qs).annotate(is_liked=Value(True)).order_by('-created_at')
 
 
-class ImageUploadView(views.APIView):
-    parser_classes = (MultiPartParser, FormParser)
+_s3_client = None
 
-    def post(self, request, *args, **kwargs):
-        # Handle multiple files
-        files = request.FILES.getlist('image')
-        if not files:
-            return Response({"error": "No image provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            s3 = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
+def get_s3_client():
+    """boto3 clients are thread-safe, so one per process is shared by every upload."""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_S3_REGION_NAME,
+            config=BotoConfig(max_pool_connections=getattr(settings, 'ASYNC_BLOCKING_WORKERS', 32))
+        )
+    return _s3_client
+
+
+def process_and_upload(s3, file_obj):
+    """Convert one uploaded image to PNG and put it on S3. Returns {'id', 'url'} or None. Blocking."""
+    try:
+        # Force .png extension
+        ext = '.png'
+        file_id = str(uuid.uuid4())
+        filename = f"{file_id}{ext}"
+
+        # Seek to start if reusing file
+        if hasattr(file_obj, 'seek'):
+            file_obj.seek(0)
+        
+        # 1. Open image using Pillow
+        image = Image.open(file_obj)
+        
+        # 2. Convert to RGBA (if not already)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        
+        # 3. Save as PNG to memory buffer
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        buffer.seek(0)
+        
+        # 4. Upload buffer to S3
+        with span('s3'):
+            s3.upload_fileobj(
+                buffer,
+                settings.AWS_STORAGE_BUCKET_NAME,
+                filename,
+                ExtraArgs={
+                    "ContentType": "image/png"
+                }
             )
-        except Exception as e:
-            print(f"Boto3 Client Init Error: {e}")
-            return Response({"error": "AWS Credentials Error (See console)"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        results = []
+        # Construct URL
+        file_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{filename}"
+        
+        return {
+            "id": file_id,
+            "url": file_url
+        }
+    except Exception as e:
+        logger.exception(f"Error processing file {file_obj.name}: {e}")
+        return None
 
-        import concurrent.futures
 
-        def process_and_upload(file_obj):
-            try:
-                # Force .png extension
-                ext = '.png'
-                file_id = str(uuid.uuid4())
-                filename = f"{file_id}{ext}"
-
-                # Seek to start if reusing file
-                if hasattr(file_obj, 'seek'):
-                    file_obj.seek(0)
-                
-                # 1. Open image using Pillow
-                image = Image.open(file_obj)
-                
-                # 2. Convert to RGBA (if not already)
-                if image.mode not in ('RGB', 'RGBA'):
-                    image = image.convert('RGBA')
-                
-                # 3. Save as PNG to memory buffer
-                buffer = BytesIO()
-                image.save(buffer, format="PNG")
-                buffer.seek(0)
-                
-                # 4. Upload buffer to S3
-                s3.upload_fileobj(
-                    buffer,
-                    settings.AWS_STORAGE_BUCKET_NAME,
-                    filename,
-                    ExtraArgs={
-                        "ContentType": "image/png"
-                    }
-                )
+class ImageUploadView(AsyncAPIView):
 
-                # Construct URL
-                file_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{filename}"
-                
-                return {
-                    "id": file_id,
-                    "url": file_url
-                }
-            except Exception as e:
-                print(f"Error processing file {file_obj.name}: {e}")
-                traceback.print_exc()
-                return None
+    async def post(self, request, *args, **kwargs):
+        # Handle multiple files
+        files = request.FILES.getlist('image')
+        if not files:
+            return json_response({"error": "No image provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Use ThreadPoolExecutor to upload files in parallel
-        results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # Map files to the helper function
-            future_results = list(executor.map(process_and_upload, files))
+        try:
+            s3 = get_s3_client()
+        except Exception as e:
+            logger.error(f"Boto3 Client Init Error: {e}")
+            return json_response({"error": "AWS Credentials Error (See console)"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # Convert + upload the files in parallel on the shared blocking executor
+        future_results = await asyncio.gather(*(run_blocking(process_and_upload, s3, f) for f in files))
         
         # Filter out None results (failed uploads)
         results = [r for r in future_results if r is not None]
 
         if not results:
-             return Response({"error": "Upload failed"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+             return json_response({"error": "Upload failed"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # Backward compatibility: if single file uploaded, return single object
         
         # If multiple, return list
-        return Response(results, status=status.HTTP_201_CREATED)
+        return json_response(results, status=status.HTTP_201_CREATED)
 
 
 class LikeToggleView(views.APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, post_id):
-        post = get_object_or_404(Post, pk=post_id)
-        user = request.user
+        get_object_or_404(Post.objects.only('id'), pk=post_id)
 
-        if post.like_users.filter(id=user.id).exists():
-            post.like_users.remove(user)
-            is_liked = False
-        else:
-            post.like_users.add(user)
-            is_liked = True
-        
+        # Single-statement toggle; like_count is flushed in batches (see posts/likes.py)
+        is_liked, like_count = toggle_like(request.user.id, post_id)
         return Response({
             'is_liked': is_liked,
-            'like_count': post.like_users.count()
+            'like_count': like_count
         })
 
 
+class CommentCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('created_at', 'id')
+
+
 class PostCommentView(views.APIView):
     permission_classes = [IsAuthenticated]
+    # Replies shown under each top-level comment (?replies=N); the rest via CommentReplyListView
+    reply_preview_size = 3
+    max_reply_preview_size = 10
 
     def get(self, request, post_id):
-        post = get_object_or_404(Post, pk=post_id)
-        comments = Comment.objects.filter(post_id=post_id).select_related('author').order_by('created_at')
-        serializer = CommentSerializer(comments, many=True)
+        # 3 queries whatever the thread sizes: post, top-level page (+ reply counts), reply previews
+        post = get_object_or_404(Post.objects.only('id', 'comment_count'), pk=post_id)
+        paginator = CommentCursorPagination()
+        page = paginator.paginate_queryset(top_level_comments(post_id), request, view=self)
+        attach_reply_previews(page, self._get_reply_preview_size(request))
+        with span('serialize'):
+            comments = CommentThreadSerializer(page, many=True).data
         return Response({
-            'count': comments.count(),
-            'comments': serializer.data
+            'count': post.comment_count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'comments': comments
         })
+
+    def _get_reply_preview_size(self, request):
+        try:
+            size = int(request.query_params.get('replies', self.reply_preview_size))
+        except ValueError:
+            size = self.reply_preview_size
+        return max(0, min(size, self.max_reply_preview_size))
     
     def post(self, request, post_id):
         post = get_object_or_404(Post, pk=post_id)
         content = request.data.get('content')
         if not content:
             return Response({'error': '내용을 입력해주세요.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        parent_id = None
+        if request.data.get('parent'):
+            try:
+                parent_pk = int(request.data['parent'])
+            except (TypeError, ValueError):
+                return Response({'error': '잘못된 부모 댓글입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            parent = get_object_or_404(Comment.objects.only('id', 'parent_id'), pk=parent_pk, post_id=post_id)
+            parent_id = thread_root_id(parent)
         
         comment = Comment.objects.create(
             post=post,
             author=request.user,
-            content=content
+            content=content,
+            parent_id=parent_id
         )
         
         # Return serialized newly created comment
@@ -468,6 +645,15 @@ class PostCommentView(views.APIView):
 
 
 
+class CommentReplyListView(ListAPIView):
+    serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return replies_of(self.kwargs['comment_id'])
+
+
 class CommentDeleteView(views.APIView):
     permission_classes = [IsAuthenticated]
 
@@ -479,15 +665,15 @@ class CommentDeleteView(views.APIView):
         return Response({'message': '댓글이 삭제되었습니다.'}, status=status.HTTP_204_NO_CONTENT)
 
 
-class PostSearchView(views.APIView):
+class PostSearchView(ReplicaReadMixin, views.APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
         query = request.query_params.get('q', '')
         if not query:
             return Response({'error': '검색어(q)가 필요합니다.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # 제목에 키워드가 포함된 글 찾기
-        posts = Post.objects.filter(title__icontains=query).values('id', 'title', 'author__username')[:5]
+        # 제목/본문 n-gram 인덱스로 검색 후 관련도 순 정렬
+        posts = keyword_search(Post.objects.all(), query).values('id', 'title', 'author__username')[:5]
         
         return Response({
             'count': len(posts),
@@ -498,7 +684,8 @@ class PostDetailView(views.APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, post_id):
         # 게시글 상세 조회 (없으면 404)
-        post = get_object_or_404(Post, pk=post_id)
+        queryset = annotate_list_fields(Post.objects.select_related('author', 'category'), request.user)
+        post = get_object_or_404(queryset, pk=post_id)
         
         # NSFW Protection
         if (post.is_nsfw or post.is_profane) and not request.user.is_pass_verified:
@@ -506,9 +693,15 @@ class PostDetailView(views.APIView):
                 {"error": "이 게시물은 성인 인증(PASS)이 필요합니다."}, 
                 status=status.HTTP_403_FORBIDDEN
             )
-            
-        serializer = PostListSerializer(post, context={'request': request})
-        return Response(serializer.data)
+
+        # Unchanged post and comments: 304 without loading comments or serializing
+        def build():
+            prefetch_related_objects([post], 'comment_set', 'comment_set__author')
+            with span('serialize'):
+                data = PostDetailSerializer(post, context={'request': request}).data
+            return Response(data)
+
+        return conditional_response(request, post_detail_etag(post), build)
 
 
 class PostCreateView(views.APIView):
@@ -556,47 +749,81 @@ class PostDeleteView(views.APIView):
         return Response({'message': '게시글이 삭제되었습니다.'}, status=status.HTTP_204_NO_CONTENT)
 
 
-class SemanticPostSearchView(views.APIView):
-    permission_classes = [IsAuthenticated]
+class SemanticPostSearchView(AsyncAPIView):
+    # Async: the query embedding (Bedrock) and the kNN search are awaited; only hydration uses a thread
+    login_required = True
+    page_size = 10
+    max_page_size = 50
+    # kNN has to collect every neighbour up to the end of the page, so deep pages are capped
+    max_depth = 1000
 
-    def get(self, request):
-        query = request.query_params.get('q', '')
-        print(f"DEBUG: SemanticPostSearchView - query: '{query}'")
+    def _get_page_size(self, request):
+        try:
+            page_size = int(request.GET.get('page_size', self.page_size))
+        except ValueError:
+            page_size = self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def _get_page(self, request):
+        try:
+            return max(1, int(request.GET.get('page', 1)))
+        except ValueError:
+            return 1
+
+    async def get(self, request):
+        query = request.GET.get('q', '')
         if not query:
-            return Response({'error': '검색어(q)가 필요합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            return json_response({'error': '검색어(q)가 필요합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             # 1. Generate Query Embedding
-            import time
-            t0 = time.time()
-            bedrock_client = BedrockClient()
-            query_vector = bedrock_client.get_embedding(query)
+            query_vector = await run_blocking(get_search_embedding, query)
             
             if not query_vector:
-                 return Response({'error': '검색어 처리에 실패했습니다. (Embedding Error)'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-            # 2. Search OpenSearch
-            os_client = OpenSearchClient()
-            # Use search_posts which we verified in our test script
-            hits = os_client.search_posts(query_vector, size=10)
+                 return json_response({'error': '검색어 처리에 실패했습니다. (Embedding Error)'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+            # 2. Search OpenSearch (ids + scores only, one page)
+            filters = get_search_filters(request.user)
+            category = request.GET.get('category')
+            if category:
+                filters['category'] = category
+
+            page_size = self._get_page_size(request)
+            page = self._get_page(request)
+            offset = (page - 1) * page_size
+            if offset + page_size > self.max_depth:
+                return json_response({'page': page, 'next': None, 'previous': None, 'count': 0, 'results': []})
+
+            # One extra hit tells us whether there is a next page
+            hits = await OpenSearchClient().asearch_posts(
+                query_vector,
+                size=page_size + 1,
+                filters=filters,
+                exclude_ids=await run_orm(get_reported_post_ids, request.user),
+                source=False,
+                offset=offset,
+            )
+            has_next = len(hits) > page_size
+            hits = hits[:page_size]
             
-            # 3. Format Results
-            results = []
-            for hit in hits:
-                source = hit['_source']
-                results.append({
-                    'id': source.get('id'),
-                    'title': source.get('title'),
-                    'preview': source.get('content', '')[:200],
-                    'author': source.get('author'),
-                    'score': hit['_score']
-                })
-                
-            return Response({
+            # 3. Hydrate from Postgres in hit order
+            results = await run_orm(self._serialize, hits, request)
+
+            url = request.build_absolute_uri()
+            return json_response({
+                'page': page,
+                'next': replace_query_param(url, 'page', page + 1) if has_next else None,
+                'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
                 'count': len(results),
                 'results': results
             })
 
         except Exception as e:
             logger.error(f"Semantic search error: {e}")
-            return Response({'error': str(e)}, status=500)
+            return json_response({'error': str(e)}, status=500)
+
+    def _serialize(self, hits, request):
+        with replica_reads():
+            posts = hydrate_hits(hits, request.user)
+        with span('serialize'):
+            return SemanticSearchResultSerializer(posts, many=True, context={'request': request}).data